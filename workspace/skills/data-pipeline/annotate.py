@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – LLM Annotation Stage
+Adds label or instruction/response columns to collected records.
+
+Many records are packed into each LLM request, requests run concurrently
+within a requests-per-minute budget, and every answer is stored in a
+content-hash cache so re-running the same job costs nothing.
+
+Usage (standalone, on an existing JSONL file):
+  python annotate.py --input refined.jsonl --mode labels --labels "positive,negative,neutral" \
+                     --api-provider openai --output annotated.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from llm_client import LLMClient, LLMMetrics
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[annotate] {msg}", flush=True)
+
+def sha256_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+LABEL_TASKS = {"classification", "ner"}
+
+ANNOTATE_SYSTEM_PROMPT = """You are a meticulous data annotator building a machine-learning dataset.
+You will receive numbered items. Annotate EVERY item independently.
+Return ONLY a JSON array, one object per item, in the same order, each with the item's "id"."""
+
+LABEL_INSTRUCTIONS = """Task: assign exactly one label to each item.
+Allowed labels: {labels}
+Domain: {domain}
+Return objects of the form {{"id": <id>, "label": "<one allowed label>"}}."""
+
+INSTRUCTION_INSTRUCTIONS = """Task: turn each item into one instruction/response training pair grounded in the item's text.
+The instruction is what a user would ask; the response answers it using only facts from the text.
+Domain: {domain}
+Return objects of the form {{"id": <id>, "instruction": "...", "response": "..."}}."""
+
+LABELSET_PROMPT = """Propose a compact label set (3-8 labels) for a {task_type} dataset.
+Domain: {domain}
+Quality criteria: {criteria}
+Return ONLY a JSON array of short lowercase label strings."""
+
+
+def resolve_mode(mode, plan):
+    """Map 'auto' onto labels/instructions using the plan's task type."""
+    if mode != "auto":
+        return mode
+    return "labels" if (plan or {}).get("task_type") in LABEL_TASKS else "instructions"
+
+
+def _extract_json(raw):
+    match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw, re.DOTALL)
+    if match:
+        raw = match.group(1)
+    start = raw.find("[")
+    end = raw.rfind("]")
+    if start != -1 and end > start:
+        raw = raw[start:end + 1]
+    return json.loads(raw.strip())
+
+# ---------------------------------------------------------------------------
+# Cache & rate budget
+# ---------------------------------------------------------------------------
+
+class AnnotationCache:
+    """Append-only JSONL cache keyed by a hash of the annotation request."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["value"]
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put_many(self, items):
+        with self._lock:
+            new = [(k, v) for k, v in items if k not in self._entries]
+            for key, value in new:
+                self._entries[key] = value
+            if self.path and new:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    for key, value in new:
+                        fh.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+
+
+class RateBudget:
+    """Spaces request starts so no more than `per_minute` begin each minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+# ---------------------------------------------------------------------------
+# Annotation
+# ---------------------------------------------------------------------------
+
+def propose_labels(client, plan):
+    """Ask the LLM for a label set when the user did not give one."""
+    plan = plan or {}
+    raw = client.complete(
+        LABELSET_PROMPT.format(
+            task_type=plan.get("task_type", "classification"),
+            domain=plan.get("domain", ""),
+            criteria=plan.get("quality_criteria", ""),
+        ),
+        "You design annotation schemas.",
+        max_tokens=200,
+        purpose="annotation",
+    )
+    labels = [str(l).strip().lower() for l in _extract_json(raw) if str(l).strip()]
+    if not labels:
+        raise ValueError("LLM proposed an empty label set")
+    return labels
+
+
+def make_batches(items, batch_size, max_chars):
+    """Pack (key, text) items into batches bounded by count and characters."""
+    batch, size = [], 0
+    for item in items:
+        n = len(item[1])
+        if batch and (len(batch) >= batch_size or size + n > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(item)
+        size += n
+    if batch:
+        yield batch
+
+
+def _annotate_batch(client, batch, mode, instructions, labels, max_item_chars, budget, depth=0):
+    """Annotate one batch; split it in half and retry when the reply is unusable."""
+    body = "\n\n".join(f"### Item {i}\n{text[:max_item_chars]}" for i, (_, text) in enumerate(batch))
+    budget.wait()
+    try:
+        raw = client.complete(f"{instructions}\n\n{body}", ANNOTATE_SYSTEM_PROMPT,
+                              max_tokens=min(4000, 120 + 350 * len(batch)), purpose="annotation")
+        answers = _extract_json(raw)
+        by_id = {int(a["id"]): a for a in answers if isinstance(a, dict) and "id" in a}
+    except Exception as e:
+        if len(batch) > 1 and depth < 3:
+            mid = len(batch) // 2
+            return (_annotate_batch(client, batch[:mid], mode, instructions, labels, max_item_chars, budget, depth + 1)
+                    + _annotate_batch(client, batch[mid:], mode, instructions, labels, max_item_chars, budget, depth + 1))
+        log(f"Batch of {len(batch)} failed: {e}")
+        return []
+
+    results = []
+    for i, (key, _) in enumerate(batch):
+        answer = by_id.get(i)
+        if not answer:
+            continue
+        if mode == "labels":
+            label = str(answer.get("label", "")).strip().lower()
+            if label in labels:
+                results.append((key, {"label": label}))
+        else:
+            instruction = str(answer.get("instruction", "")).strip()
+            response = str(answer.get("response", "")).strip()
+            if instruction and response:
+                results.append((key, {"instruction": instruction, "response": response}))
+    return results
+
+
+def annotate_records(records, client, plan=None, mode="auto", labels=None, cache_path=None,
+                     batch_size=20, max_batch_chars=24000, max_item_chars=2000,
+                     concurrency=4, requests_per_minute=60):
+    """
+    Annotate records in place with `label` or `instruction`/`response` columns.
+    Returns a stats dict for the dataset card.
+    """
+    mode = resolve_mode(mode, plan)
+    domain = (plan or {}).get("domain", "")
+    cache = AnnotationCache(cache_path)
+
+    if mode == "labels":
+        if not labels:
+            labels = propose_labels(client, plan)
+        labels = [l.strip().lower() for l in labels if l.strip()]
+        instructions = LABEL_INSTRUCTIONS.format(labels=", ".join(labels), domain=domain)
+    else:
+        instructions = INSTRUCTION_INSTRUCTIONS.format(domain=domain)
+
+    request_fingerprint = sha256_hash(f"{mode}|{client.provider}|{client.model}|{instructions}")
+    pending = {}
+    annotated = 0
+    for record in records:
+        text = record.get("text", "")
+        if not text:
+            continue
+        key = sha256_hash(f"{request_fingerprint}|{text[:max_item_chars]}")
+        cached = cache.get(key)
+        if cached is not None:
+            record.update(cached)
+            annotated += 1
+        else:
+            pending.setdefault(key, (text, []))[1].append(record)
+
+    log(f"Annotating ({mode}): {annotated} from cache, {len(pending)} to request")
+    batches = list(make_batches([(k, v[0]) for k, v in pending.items()], batch_size, max_batch_chars))
+    budget = RateBudget(requests_per_minute)
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(_annotate_batch, client, batch, mode, instructions,
+                                   labels, max_item_chars, budget) for batch in batches]
+        for future in as_completed(futures):
+            results = future.result()
+            cache.put_many(results)
+            for key, value in results:
+                for record in pending[key][1]:
+                    record.update(value)
+                    annotated += 1
+
+    for key, (_, recs) in pending.items():
+        if not any(("label" in r) or ("instruction" in r) for r in recs):
+            failed += len(recs)
+
+    stats = {
+        "mode": mode,
+        "annotated_records": annotated,
+        "unannotated_records": failed,
+        "requests": len(batches),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+    }
+    if mode == "labels":
+        stats["labels"] = labels
+    log(f"Annotation done: {annotated} annotated, {failed} failed, {len(batches)} requests")
+    return stats
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – LLM Annotation Stage")
+    parser.add_argument("--input", required=True, help="JSONL file with a 'text' field per record")
+    parser.add_argument("--output", required=True, help="Annotated JSONL output path")
+    parser.add_argument("--mode", default="instructions", choices=["labels", "instructions"])
+    parser.add_argument("--labels", default="", help="Comma-separated label set (labels mode)")
+    parser.add_argument("--domain", default="", help="Domain description given to the annotator")
+    parser.add_argument("--api-key", default="", help="LLM API key")
+    parser.add_argument("--api-provider", default="openai",
+                        choices=["openai", "anthropic", "google", "gemini", "openrouter"])
+    parser.add_argument("--llm-model", default=None)
+    parser.add_argument("--llm-base-url", default=None)
+    parser.add_argument("--cache", default="./output/.annotation_cache.jsonl", help="Annotation cache file")
+    parser.add_argument("--batch-size", type=int, default=20, help="Records packed per LLM request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM requests")
+    parser.add_argument("--rpm", type=int, default=60, help="Max LLM requests started per minute")
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.environ.get(f"{args.api_provider.upper()}_API_KEY", "")
+    if not api_key:
+        log("ERROR: No API key provided.")
+        sys.exit(1)
+
+    with open(args.input, "r", encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+
+    metrics = LLMMetrics()
+    client = LLMClient(api_key, args.api_provider, model=args.llm_model, base_url=args.llm_base_url,
+                       max_concurrency=args.concurrency, metrics=metrics)
+    labels = [l for l in args.labels.split(",") if l.strip()]
+    stats = annotate_records(records, client, plan={"domain": args.domain}, mode=args.mode,
+                             labels=labels, cache_path=args.cache, batch_size=args.batch_size,
+                             concurrency=args.concurrency, requests_per_minute=args.rpm)
+    client.close()
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+    log(f"Wrote {len(records)} records to {args.output}")
+    log(json.dumps({"annotation": stats, "llm": metrics.summary()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,34 @@ Dataset Creator – External API Aggregation Engine
 Fetches datasets from public APIs (Kaggle, YouTube, PubMed, Wikipedia, HuggingFace).
 Called by dataset-worker.mjs when an API aggregation job is dispatched.
 
+Several providers and/or queries run as one fan-out job: every combination is
+fetched concurrently over shared keep-alive connections, records are
+deduplicated by (provider, id) and by URL, and a single (sharded) JSONL output
+plus a manifest with per-provider stats and cross-provider overlap is written.
+
 Usage:
   python api_aggregate.py --provider kaggle --query "dog heartbeat" --output-format jsonl
+  python api_aggregate.py --provider youtube --query "dog barking" --download   # also fetch the files
+  python api_aggregate.py --provider pubmed,wikipedia,huggingface --query "sleep apnea" --query "snoring"
 """
 
 import argparse
+import base64
+import gzip
+import http.client
 import json
 import os
 import sys
+import threading
 import time
 import hashlib
+import urllib.error
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urljoin, urlsplit
+
+from jsonl_sink import JsonlSink
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -33,17 +49,101 @@ def write_jsonl(records, output_path):
             fh.write(json.dumps(record, ensure_ascii=False) + "\n")
     log(f"Wrote {len(records)} records to {output_path}")
 
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections shared by every fetcher thread; up to
+    max_idle_per_host connections per host are kept open between requests.
+    """
+
+    def __init__(self, max_idle_per_host=4, timeout=30):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+
+    def _acquire(self, scheme, netloc):
+        with self._lock:
+            if self._idle[(scheme, netloc)]:
+                return self._idle[(scheme, netloc)].pop()
+            self.opened += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _release(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle[(scheme, netloc)]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, headers):
+        """GET url; returns (status, reason, headers, body)."""
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in (1, 2):
+            conn = self._acquire(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                # An idle keep-alive connection may have been closed by the server; retry once on a fresh one.
+                conn.close()
+                if attempt == 2:
+                    raise
+                continue
+            with self._lock:
+                self.requests += 1
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(parts.scheme, parts.netloc, conn)
+            return resp.status, resp.reason, resp.headers, body
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+POOL = ConnectionPool()
+
+
 def http_get_json(url, headers=None):
-    """Simple HTTP GET returning parsed JSON, using only stdlib."""
+    """HTTP GET returning parsed JSON, over the shared keep-alive connection pool."""
     import urllib.request
-    req = urllib.request.Request(url, headers=headers or {"User-Agent": "Text2LLM-DatasetCreator/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    headers = {"User-Agent": "Text2LLM-DatasetCreator/1.0", "Accept-Encoding": "gzip", **(headers or {})}
+    if urllib.request.getproxies():
+        # http.client does not speak proxies; let urllib handle those environments.
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            body = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return json.loads(body.decode("utf-8"))
+    for _ in range(5):
+        status, reason, resp_headers, body = POOL.get(url, headers)
+        if status in (301, 302, 303, 307, 308) and resp_headers.get("Location"):
+            url = urljoin(url, resp_headers["Location"])
+            continue
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, resp_headers, None)
+        if resp_headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body.decode("utf-8"))
+    raise urllib.error.URLError(f"too many redirects for {url}")
 
 # ---------------------------------------------------------------------------
 # Kaggle
 # ---------------------------------------------------------------------------
 
+KAGGLE_DOWNLOAD_URL = "https://www.kaggle.com/api/v1/datasets/download"
+
 def fetch_kaggle(query):
     """
     Searches Kaggle for datasets matching the query.
@@ -68,6 +168,7 @@ def fetch_kaggle(query):
                     "title": str(ds.title),
                     "size": str(ds.totalBytes) if hasattr(ds, "totalBytes") else "unknown",
                     "url": f"https://www.kaggle.com/datasets/{ds.ref}",
+                    "download_url": f"{KAGGLE_DOWNLOAD_URL}/{ds.ref}",
                     "description": str(getattr(ds, "subtitle", "")),
                     "last_updated": str(getattr(ds, "lastUpdated", "")),
                     "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
@@ -84,6 +185,7 @@ def fetch_kaggle(query):
                         "id": ds.get("ref", ""),
                         "title": ds.get("title", ""),
                         "url": f"https://www.kaggle.com/datasets/{ds.get('ref', '')}",
+                        "download_url": f"{KAGGLE_DOWNLOAD_URL}/{ds.get('ref', '')}",
                         "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
                     })
             except Exception as e:
@@ -150,39 +252,38 @@ def fetch_youtube(query):
 # PubMed (medical/scientific articles)
 # ---------------------------------------------------------------------------
 
-def fetch_pubmed(query):
-    """Fetches article metadata from PubMed E-utilities (no API key required for low-volume)."""
+def fetch_pubmed(query, max_records=50):
+    """
+    Fetches abstracts from PubMed E-utilities: one relevance-ordered esearch
+    onto the history server, then one batched efetch (no API key required for
+    low volume). Articles without an abstract are kept with their title as text.
+    For tens of thousands of abstracts use pubmed_harvest.py.
+    """
+    from pubmed_harvest import REQUEST_DELAY, Throttle, efetch_batch, esearch
     records = []
-    base = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    throttle = Throttle(REQUEST_DELAY)
 
     try:
-        # Step 1: Search for IDs
-        search_url = f"{base}/esearch.fcgi?db=pubmed&term={quote_plus(query)}&retmax=50&retmode=json"
-        search_data = http_get_json(search_url)
-        ids = search_data.get("esearchresult", {}).get("idlist", [])
-
-        if not ids:
+        history = esearch(query, throttle, sort="relevance")
+        if not history["count"]:
             log("No PubMed results found.")
             return records
 
-        # Step 2: Fetch summaries
-        id_str = ",".join(ids)
-        summary_url = f"{base}/esummary.fcgi?db=pubmed&id={id_str}&retmode=json"
-        summary_data = http_get_json(summary_url)
-        results = summary_data.get("result", {})
-
-        for pmid in ids:
-            article = results.get(pmid, {})
-            if not isinstance(article, dict):
-                continue
+        articles, _ = efetch_batch(history, 0, min(max_records, history["count"]), throttle, require_abstract=False)
+        for article in articles:
+            meta = article["metadata"]
             records.append({
                 "provider": "pubmed",
-                "id": pmid,
-                "title": article.get("title", ""),
-                "authors": [a.get("name", "") for a in article.get("authors", [])],
-                "source": article.get("source", ""),
-                "pub_date": article.get("pubdate", ""),
-                "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+                "id": meta["pmid"],
+                "title": article["title"],
+                "authors": meta["authors"],
+                "source": meta["journal"],
+                "pub_date": meta["year"],
+                "url": article["url"],
+                "content_length": len(article["text"]),
+                "text": article["text"],
+                "mesh": meta["mesh"],
+                "doi": meta["doi"],
                 "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             })
 
@@ -267,7 +368,48 @@ def fetch_huggingface(query):
     return records
 
 # ---------------------------------------------------------------------------
-# Main
+# Downloads
+# ---------------------------------------------------------------------------
+
+def download_items(provider, records):
+    """Download-manager items for records that point at actual files (Kaggle archives, YouTube audio)."""
+    items = []
+    if provider == "kaggle":
+        username = os.environ.get("KAGGLE_USERNAME", "")
+        key = os.environ.get("KAGGLE_KEY", "")
+        if not (username and key):
+            log("Kaggle downloads need KAGGLE_USERNAME/KAGGLE_KEY; skipping.")
+            return items
+        auth = "Basic " + base64.b64encode(f"{username}:{key}".encode("utf-8")).decode("ascii")
+        for record in records:
+            if record.get("download_url") and record.get("id"):
+                items.append({"url": record["download_url"], "filename": record["id"].replace("/", "__") + ".zip",
+                              "headers": {"Authorization": auth}, "source": record["url"]})
+    elif provider == "youtube":
+        try:
+            import yt_dlp
+        except ImportError:
+            log("yt-dlp not installed; cannot resolve YouTube audio streams.")
+            return items
+        with yt_dlp.YoutubeDL({"quiet": True, "format": "bestaudio/best"}) as ydl:
+            for record in records:
+                if not record.get("id"):
+                    continue
+                try:
+                    info = ydl.extract_info(record["url"], download=False)
+                except Exception as e:
+                    log(f"Could not resolve audio for {record['url']}: {e}")
+                    continue
+                items.append({"url": info["url"], "filename": f"{record['id']}.{info.get('ext', 'm4a')}",
+                              "headers": info.get("http_headers") or {}, "size": info.get("filesize"),
+                              "source": record["url"]})
+    else:
+        from download_manager import items_from_records
+        items = list(items_from_records(records))
+    return items
+
+# ---------------------------------------------------------------------------
+# Fan-out
 # ---------------------------------------------------------------------------
 
 PROVIDER_MAP = {
@@ -278,17 +420,172 @@ PROVIDER_MAP = {
     "huggingface": fetch_huggingface,
 }
 
+# Concurrent queries per provider; NCBI allows ~3 requests/s without an API key.
+PROVIDER_CONCURRENCY = {"pubmed": 1, "youtube": 2}
+DEFAULT_PROVIDER_CONCURRENCY = 3
+
+
+def run_fanout(providers, queries, stem, concurrency=8, shard_records=0):
+    """
+    Fetch every provider x query combination concurrently and stream the
+    deduplicated records into one sink. Returns (sink, manifest fields).
+    """
+    sink = JsonlSink(f"{stem}.jsonl", shard_records=shard_records)
+    limits = {p: threading.BoundedSemaphore(PROVIDER_CONCURRENCY.get(p, DEFAULT_PROVIDER_CONCURRENCY))
+              for p in providers}
+    stats = {p: Counter() for p in providers}
+    elapsed = Counter()
+    problems = []
+    seen_ids = set()
+    url_owner = {}
+    overlap = Counter()
+
+    def task(provider, query):
+        with limits[provider]:
+            started = time.monotonic()
+            try:
+                return provider, query, PROVIDER_MAP[provider](query), time.monotonic() - started
+            except Exception as e:
+                return provider, query, [{"provider": provider, "query": query, "error": str(e)}], \
+                    time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(task, p, q) for p in providers for q in queries]
+        for future in as_completed(futures):
+            provider, query, records, took = future.result()
+            st = stats[provider]
+            st["queries"] += 1
+            elapsed[provider] += took
+            for record in records:
+                st["fetched"] += 1
+                if record.get("error") or not (record.get("id") or record.get("url")):
+                    st["errors" if record.get("error") else "notes"] += 1
+                    problems.append({"provider": provider, "query": query,
+                                     **{k: record[k] for k in ("error", "note") if k in record}})
+                    continue
+                key = (provider, record.get("id") or record.get("url"))
+                url = record.get("url")
+                if key in seen_ids:
+                    st["duplicates"] += 1
+                    continue
+                seen_ids.add(key)
+                if url and url in url_owner:
+                    st["duplicates"] += 1
+                    if url_owner[url] != provider:
+                        overlap["&".join(sorted((url_owner[url], provider)))] += 1
+                    continue
+                if url:
+                    url_owner[url] = provider
+                record.setdefault("query", query)
+                sink.append(record)
+                st["kept"] += 1
+            log(f"{provider} / {query!r}: {len(records)} records in {took:.1f}s")
+
+    for provider, st in stats.items():
+        st["elapsed_s"] = round(elapsed[provider], 2)
+    fields = {
+        "providers": providers,
+        "queries": queries,
+        "provider_stats": {p: dict(st) for p, st in stats.items()},
+        "cross_provider_overlap": dict(overlap),
+        "problems": problems,
+        "http": {"connections_opened": POOL.opened, "requests": POOL.requests},
+        "elapsed_s": round(time.monotonic() - started, 2),
+    }
+    return sink, fields
+
+
+def main_fanout(args, providers, queries):
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = args.name or time.strftime("%Y%m%d_%H%M%S")
+    stem = os.path.join(args.output_dir, f"aggregate_{name}")
+    log(f"Starting fan-out aggregation: {len(providers)} provider(s) x {len(queries)} query(ies)")
+    sink, fields = run_fanout(providers, queries, stem, concurrency=args.concurrency,
+                              shard_records=args.shard_records)
+    sink.close()
+    POOL.close()
+    log(f"Kept {len(sink)} unique records; overlap {fields['cross_provider_overlap'] or 'none'}")
+
+    outputs = list(sink.shards)
+    if args.output_format in ("parquet", "csv"):
+        try:
+            import pandas as pd
+            outputs = []
+            for shard in sink.shards:
+                df = pd.read_json(shard, lines=True)
+                output_path = f"{shard[:-len('.jsonl')]}.{args.output_format}"
+                if args.output_format == "parquet":
+                    df.to_parquet(output_path, index=False)
+                else:
+                    df.to_csv(output_path, index=False)
+                outputs.append(output_path)
+                log(f"Wrote {len(df)} records to {output_path}")
+        except ImportError:
+            log("WARNING: pandas/pyarrow not installed. Output left as JSONL.")
+
+    manifest = {
+        "format": args.output_format if outputs and not outputs[0].endswith(".jsonl") else "jsonl",
+        "shards": [{"path": os.path.basename(out), "records": n} for out, n in zip(outputs, sink.shards.values())],
+        "total_records": len(sink),
+        **fields,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    if args.download:
+        from download_manager import DownloadManager
+        by_provider = defaultdict(list)
+        for shard in sink.shards:
+            with open(shard, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    record = json.loads(line)
+                    by_provider[record["provider"]].append(record)
+        items = [item for provider, records in by_provider.items() for item in download_items(provider, records)]
+        if items:
+            manager = DownloadManager(f"{stem}_files", unpack_archives=args.unpack_archives)
+            summary = manager.run(items)
+            manifest["downloads"] = {"dir": os.path.basename(manager.dest_dir),
+                                     **{k: summary[k] for k in ("ok", "failed", "bytes")}}
+
+    with open(f"{stem}_manifest.json", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    log(f"Manifest written to {stem}_manifest.json")
+    log("Aggregation complete.")
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
 def main():
     parser = argparse.ArgumentParser(description="Dataset Creator – External API Aggregation")
-    parser.add_argument("--provider", required=True, choices=PROVIDER_MAP.keys())
-    parser.add_argument("--query", required=True, help="Search query or resource ID")
+    parser.add_argument("--provider", required=True,
+                        help=f"Provider, or comma-separated providers: {', '.join(PROVIDER_MAP)}")
+    parser.add_argument("--query", required=True, action="append",
+                        help="Search query or resource ID (repeat for several queries)")
+    parser.add_argument("--name", default="", help="Fan-out output name (default: timestamp)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Provider/query combinations fetched at once")
+    parser.add_argument("--shard-records", type=int, default=0,
+                        help="Fan-out: roll the merged JSONL over every N records (0 = single file)")
     parser.add_argument("--output-format", default="jsonl", choices=["jsonl", "parquet", "csv"])
     parser.add_argument("--output-dir", default="./output", help="Directory to write results")
+    parser.add_argument("--download", action="store_true",
+                        help="Also download the referenced files (resumable) into <output-dir>/<provider>_files")
+    parser.add_argument("--unpack-archives", action="store_true", help="Extract downloaded zip/tar/gz archives")
     args = parser.parse_args()
 
-    if not args.query.strip():
+    providers = list(dict.fromkeys(p.strip() for p in args.provider.split(",") if p.strip()))
+    unknown = [p for p in providers if p not in PROVIDER_MAP]
+    if unknown or not providers:
+        log(f"ERROR: Unknown provider(s) {', '.join(unknown) or '(none)'}; choose from {', '.join(PROVIDER_MAP)}.")
+        sys.exit(1)
+    queries = list(dict.fromkeys(q.strip() for q in args.query if q.strip()))
+    if not queries:
         log("ERROR: Empty query provided.")
         sys.exit(1)
+    if len(providers) > 1 or len(queries) > 1:
+        main_fanout(args, providers, queries)
+        return
+    args.provider, args.query = providers[0], queries[0]
 
     log(f"Starting API aggregation: provider={args.provider}, query={args.query}")
 
@@ -327,6 +624,16 @@ def main():
             output_path = os.path.join(args.output_dir, f"{args.provider}_{timestamp}.jsonl")
             write_jsonl(records, output_path)
 
+    if args.download:
+        from download_manager import DownloadManager
+        items = download_items(args.provider, records)
+        if items:
+            manager = DownloadManager(os.path.join(args.output_dir, f"{args.provider}_files"),
+                                      unpack_archives=args.unpack_archives)
+            manager.run(items)
+        else:
+            log("Nothing to download.")
+
     log("Aggregation complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Bulk arXiv Harvester
+Collects tens of thousands of arXiv abstracts for scientific-domain datasets.
+
+Two modes:
+  search  pages the export API (search_query + start/max_results)
+  oai     harvests OAI-PMH ListRecords by set and date range, following
+          resumption tokens
+
+Responses are stream-parsed with iterparse (entries are handled and freed as
+they arrive), the documented 3-second inter-request delay is respected, and a
+state file records the next page/token so an interrupted harvest resumes where
+it stopped.
+
+Usage:
+  python arxiv_harvest.py --mode search --query "graph neural networks" --max-records 20000
+  python arxiv_harvest.py --mode oai --set cs --from 2024-01-01 --until 2024-03-31
+  python arxiv_harvest.py ... --resume        # continue from the state file
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[arxiv] {msg}", flush=True)
+
+API_URL = "http://export.arxiv.org/api/query"
+OAI_URL = "http://export.arxiv.org/oai2"
+USER_AGENT = "Text2LLM-DatasetCreator/2.0 (bulk harvest)"
+
+# arXiv asks clients to wait 3 seconds between consecutive calls.
+REQUEST_DELAY = 3.0
+SEARCH_PAGE_SIZE = 200
+MAX_RETRIES = 5
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+OAI = "{http://www.openarchives.org/OAI/2.0/}"
+ARXIV_META = "{http://arxiv.org/OAI/arXiv/}"
+
+
+class Throttle:
+    """Enforces a minimum delay between consecutive requests."""
+
+    def __init__(self, delay=REQUEST_DELAY):
+        self.delay = delay
+        self._last = 0.0
+
+    def wait(self):
+        remaining = self._last + self.delay - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        self._last = time.monotonic()
+
+
+def open_stream(url, throttle, timeout=60):
+    """Open a throttled response stream, honouring 503 Retry-After (OAI flow control)."""
+    for attempt in range(1, MAX_RETRIES + 1):
+        throttle.wait()
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            return urllib.request.urlopen(req, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code not in (429, 500, 502, 503, 504) or attempt == MAX_RETRIES:
+                raise
+            retry_after = e.headers.get("Retry-After", "")
+            wait = float(retry_after) if retry_after.isdigit() else REQUEST_DELAY * attempt
+            log(f"HTTP {e.code}; retrying in {wait:.0f}s")
+            time.sleep(wait)
+        except OSError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            log(f"Connection error ({e}); retrying")
+            time.sleep(REQUEST_DELAY * attempt)
+
+
+def _clean(text):
+    return " ".join((text or "").split())
+
+
+def make_record(arxiv_id, title, abstract, url, extra=None):
+    metadata = {"type": "paper_abstract", "arxiv_id": arxiv_id}
+    metadata.update(extra or {})
+    return {
+        "text": f"{title}\n\n{abstract}",
+        "source": "arxiv",
+        "url": url,
+        "title": title,
+        "metadata": metadata,
+    }
+
+# ---------------------------------------------------------------------------
+# Stream parsers
+# ---------------------------------------------------------------------------
+
+def iter_atom_entries(stream):
+    """Yield records from an Atom feed as each <entry> closes, plus the total result count."""
+    total = None
+    for event, elem in ET.iterparse(stream, events=("end",)):
+        if elem.tag == "{http://a9.com/-/spec/opensearch/1.1/}totalResults":
+            total = int(elem.text or 0)
+        elif elem.tag == f"{ATOM}entry":
+            link = (elem.findtext(f"{ATOM}id") or "").strip()
+            title = _clean(elem.findtext(f"{ATOM}title"))
+            summary = _clean(elem.findtext(f"{ATOM}summary"))
+            categories = [c.get("term") for c in elem.findall(f"{ATOM}category")]
+            elem.clear()
+            if summary and len(summary) > 50:
+                arxiv_id = link.rsplit("/abs/", 1)[-1]
+                yield make_record(arxiv_id, title, summary, link,
+                                  {"categories": categories}), total
+
+
+def iter_oai_records(stream, on_token):
+    """Yield records from an OAI-PMH ListRecords page; reports the resumption token via on_token."""
+    for event, elem in ET.iterparse(stream, events=("end",)):
+        if elem.tag == f"{OAI}resumptionToken":
+            on_token((elem.text or "").strip(), elem.get("completeListSize"))
+        elif elem.tag == f"{OAI}error":
+            code = elem.get("code", "")
+            if code == "noRecordsMatch":
+                on_token("", "0")
+                return
+            raise RuntimeError(f"OAI-PMH error {code}: {elem.text}")
+        elif elem.tag == f"{OAI}record":
+            meta = elem.find(f"{OAI}metadata/{ARXIV_META}arXiv")
+            if meta is not None:
+                arxiv_id = (meta.findtext(f"{ARXIV_META}id") or "").strip()
+                title = _clean(meta.findtext(f"{ARXIV_META}title"))
+                abstract = _clean(meta.findtext(f"{ARXIV_META}abstract"))
+                extra = {
+                    "categories": (meta.findtext(f"{ARXIV_META}categories") or "").split(),
+                    "created": meta.findtext(f"{ARXIV_META}created") or "",
+                }
+                if abstract and len(abstract) > 50:
+                    elem.clear()
+                    yield make_record(arxiv_id, title, abstract,
+                                      f"http://arxiv.org/abs/{arxiv_id}", extra)
+                    continue
+            elem.clear()
+
+# ---------------------------------------------------------------------------
+# Harvesters
+# ---------------------------------------------------------------------------
+
+def harvest_search(query, max_records, state=None, throttle=None, page_size=SEARCH_PAGE_SIZE, on_page=None,
+                   sort_by="relevance"):
+    """
+    Page the export API with start/max_results. `state["start"]` tracks progress
+    and `on_page` is called after each fully consumed page.
+    """
+    state = state if state is not None else {}
+    throttle = throttle or Throttle()
+    state.setdefault("start", 0)
+    while state["start"] < max_records:
+        size = min(page_size, max_records - state["start"])
+        params = urlencode({
+            "search_query": f"all:{query}",
+            "start": state["start"],
+            "max_results": size,
+            "sortBy": sort_by,
+            "sortOrder": "descending",
+        })
+        got, total = 0, None
+        with open_stream(f"{API_URL}?{params}", throttle) as resp:
+            for record, total in iter_atom_entries(resp):
+                got += 1
+                yield record
+        state["start"] += size
+        if total is not None:
+            state["total"] = total
+        if on_page:
+            on_page()
+        # An empty page means the result set is exhausted (or the API hiccuped past its end).
+        if got == 0 or (total is not None and state["start"] >= total):
+            break
+    state["done"] = True
+
+
+def harvest_oai(set_spec=None, date_from=None, date_until=None, max_records=None, state=None,
+                throttle=None, on_page=None):
+    """
+    Walk OAI-PMH ListRecords, following resumption tokens. `state["token"]`
+    tracks progress and `on_page` is called after each fully consumed page.
+    """
+    state = state if state is not None else {}
+    throttle = throttle or Throttle()
+    count = 0
+    while True:
+        if state.get("token"):
+            params = {"verb": "ListRecords", "resumptionToken": state["token"]}
+        else:
+            params = {"verb": "ListRecords", "metadataPrefix": "arXiv"}
+            if set_spec:
+                params["set"] = set_spec
+            if date_from:
+                params["from"] = date_from
+            if date_until:
+                params["until"] = date_until
+
+        next_token = {}
+        def on_token(token, size):
+            next_token["token"] = token
+            if size:
+                state["complete_list_size"] = int(size)
+
+        with open_stream(f"{OAI_URL}?{urlencode(params)}", throttle) as resp:
+            for record in iter_oai_records(resp, on_token):
+                yield record
+                count += 1
+                if max_records and count >= max_records:
+                    return
+
+        state["token"] = next_token.get("token", "")
+        if not state["token"]:
+            state["done"] = True
+        if on_page:
+            on_page()
+        if state.get("done"):
+            return
+
+# ---------------------------------------------------------------------------
+# Resumable runner
+# ---------------------------------------------------------------------------
+
+def _load_state(path):
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+def _save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def run_harvest(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = args.name or ("search" if args.mode == "search" else f"oai_{args.set or 'all'}")
+    output_path = os.path.join(args.output_dir, f"arxiv_{name}.jsonl")
+    state_path = os.path.join(args.output_dir, f"arxiv_{name}.state.json")
+
+    params = {"mode": args.mode, "query": args.query, "sort": args.sort, "set": args.set,
+              "from": args.date_from, "until": args.date_until, "max_records": args.max_records}
+    state = _load_state(state_path) if args.resume else {}
+    if state and state.get("params") != params:
+        log("ERROR: State file was written for different parameters; refusing to resume.")
+        sys.exit(1)
+    if state.get("done"):
+        log(f"Harvest already complete: {state.get('harvested', 0)} records in {output_path}")
+        return output_path
+    if state:
+        log(f"Resuming after {state['harvested']} records")
+    else:
+        state = {"params": params, "harvested": 0, "output_offset": 0, "cursor": {}}
+
+    with open(output_path, "a+b") as fh:
+        # Drop records written after the last checkpoint; that page is fetched again.
+        fh.truncate(state["output_offset"])
+        fh.seek(state["output_offset"])
+
+        def checkpoint():
+            fh.flush()
+            state["output_offset"] = fh.tell()
+            _save_state(state_path, state)
+            log(f"  {state['harvested']} records harvested")
+
+        pending = [0]
+        def on_page():
+            state["harvested"] += pending[0]
+            pending[0] = 0
+            checkpoint()
+
+        cursor = state["cursor"]
+        if args.mode == "search":
+            records = harvest_search(args.query, args.max_records, state=cursor, on_page=on_page,
+                                     sort_by=args.sort)
+        else:
+            remaining = max(0, args.max_records - state["harvested"]) if args.max_records else None
+            records = harvest_oai(args.set, args.date_from, args.date_until, remaining,
+                                  state=cursor, on_page=on_page)
+
+        for record in records:
+            fh.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            pending[0] += 1
+        # A max_records cap can stop mid-page; those records are final, so keep them.
+        state["harvested"] += pending[0]
+        state["done"] = True
+        checkpoint()
+
+    log(f"Harvested {state['harvested']} records → {output_path}")
+    return output_path
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Bulk arXiv Harvester")
+    parser.add_argument("--mode", default="search", choices=["search", "oai"])
+    parser.add_argument("--query", default="", help="Search query (search mode)")
+    parser.add_argument("--sort", default="relevance", choices=["relevance", "submittedDate", "lastUpdatedDate"],
+                        help="Result ordering (search mode)")
+    parser.add_argument("--set", default="", help="OAI-PMH set, e.g. cs, physics:hep-th (oai mode)")
+    parser.add_argument("--from", dest="date_from", default="", help="OAI-PMH from date (YYYY-MM-DD)")
+    parser.add_argument("--until", dest="date_until", default="", help="OAI-PMH until date (YYYY-MM-DD)")
+    parser.add_argument("--max-records", type=int, default=10000, help="Stop after this many records (0 = no cap)")
+    parser.add_argument("--output-dir", default="./output", help="Directory for JSONL output and state")
+    parser.add_argument("--name", default="", help="Harvest name (output/state file stem)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the saved state file")
+    args = parser.parse_args()
+
+    if args.mode == "search" and not args.query.strip():
+        log("ERROR: --query is required in search mode.")
+        sys.exit(1)
+    if args.mode == "search" and not args.max_records:
+        log("ERROR: search mode needs --max-records (the API caps result sets).")
+        sys.exit(1)
+
+    run_harvest(args)
+
+
+if __name__ == "__main__":
+    main()
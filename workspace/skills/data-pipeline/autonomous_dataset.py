@@ -17,6 +17,10 @@ Usage:
 
   # Dry-run mode (just emit the plan, no collection):
   python autonomous_dataset.py --prompt "..." --dry-run
+
+  # Plan against a local mock provider (OpenAI-compatible):
+  python autonomous_dataset.py --prompt "..." --api-key test \
+    --llm-base-url http://127.0.0.1:8765/v1 --dry-run
 """
 
 import argparse
@@ -27,11 +31,20 @@ import time
 import hashlib
 import re
 import random
+import functools
+import threading
+from collections import Counter
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urlparse
 import ssl
 
+import arxiv_harvest
+import hf_parquet
+import profiling
+from llm_client import LLMClient, LLMMetrics
+from annotate import annotate_records
+
 # Fix SSL certificate verification on Windows
 try:
     _ssl_ctx = ssl.create_default_context()
@@ -61,8 +74,9 @@ def http_get_json(url, headers=None, timeout=30):
     if headers:
         default_headers.update(headers)
     req = urllib.request.Request(url, headers=default_headers)
-    with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    with profiling.span(f"GET {urlparse(url).netloc}", cat="http", url=url):
+        with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx) as resp:
+            return json.loads(resp.read().decode("utf-8"))
 
 def http_get_text(url, headers=None, timeout=30):
     import urllib.request
@@ -70,8 +84,9 @@ def http_get_text(url, headers=None, timeout=30):
     if headers:
         default_headers.update(headers)
     req = urllib.request.Request(url, headers=default_headers)
-    with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx) as resp:
-        return resp.read().decode("utf-8")
+    with profiling.span(f"GET {urlparse(url).netloc}", cat="http", url=url):
+        with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx) as resp:
+            return resp.read().decode("utf-8")
 
 def write_jsonl(records, path):
     with open(path, "w", encoding="utf-8") as f:
@@ -85,7 +100,8 @@ def write_jsonl(records, path):
 # ═══════════════════════════════════════════════════════════════════════════
 
 PLAN_SYSTEM_PROMPT = """You are an expert AI dataset architect. Given a user's dataset request, 
-produce a JSON collection plan. Be thorough and creative with search queries.
+produce a JSON collection plan. Be thorough and creative with search queries:
+give 2-4 complementary queries per source (synonyms, subtopics, phrasings) to broaden recall.
 
 Return ONLY valid JSON with this exact schema:
 {
@@ -94,83 +110,20 @@ Return ONLY valid JSON with this exact schema:
   "keywords": ["keyword1", "keyword2", ...],
   "target_sources": ["wikipedia","reddit","youtube","kaggle","huggingface","arxiv","news","github"],
   "search_queries": {
-    "wikipedia": "search query for wikipedia",
-    "reddit": "subreddit or search query",
-    "youtube": "search query for transcripts",
-    "kaggle": "dataset search query",
-    "huggingface": "dataset search query",
-    "arxiv": "academic paper search query",
-    "news": "news search query",
-    "github": "repository/code search query"
+    "wikipedia": ["search query for wikipedia", "complementary phrasing or subtopic"],
+    "reddit": ["subreddit or search query", "..."],
+    "youtube": ["search query for transcripts", "..."],
+    "kaggle": ["dataset search query", "..."],
+    "huggingface": ["dataset search query", "..."],
+    "arxiv": ["academic paper search query", "..."],
+    "news": ["news search query", "..."],
+    "github": ["repository/code search query", "..."]
   },
   "expected_schema": {"column_name": "type_description"},
   "quality_criteria": "description of what makes a high-quality record for this dataset"
 }"""
 
-def call_llm_api(prompt, system_prompt, api_key, api_provider="openai", max_tokens=2000):
-    """Call an LLM API to get a response. Supports OpenAI, Anthropic, and Google."""
-    import urllib.request
-
-    if api_provider in ("openai", "openrouter"):
-        base_url = "https://api.openai.com/v1" if api_provider == "openai" else "https://openrouter.ai/api/v1"
-        model = "gpt-4o-mini" if api_provider == "openai" else "openai/gpt-4o-mini"
-        
-        payload = json.dumps({
-            "model": model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": max_tokens,
-            "temperature": 0.3
-        }).encode("utf-8")
-        
-        req = urllib.request.Request(f"{base_url}/chat/completions", data=payload, headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        })
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return data["choices"][0]["message"]["content"]
-
-    elif api_provider == "anthropic":
-        payload = json.dumps({
-            "model": "claude-3-haiku-20240307",
-            "max_tokens": max_tokens,
-            "system": system_prompt,
-            "messages": [{"role": "user", "content": prompt}]
-        }).encode("utf-8")
-        
-        req = urllib.request.Request("https://api.anthropic.com/v1/messages", data=payload, headers={
-            "Content-Type": "application/json",
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01"
-        })
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return data["content"][0]["text"]
-
-    elif api_provider in ("google", "gemini"):
-        model = "gemini-2.0-flash"
-        payload = json.dumps({
-            "contents": [{"parts": [{"text": f"{system_prompt}\n\n{prompt}"}]}],
-            "generationConfig": {"maxOutputTokens": max_tokens, "temperature": 0.3}
-        }).encode("utf-8")
-        
-        req = urllib.request.Request(
-            f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
-            data=payload,
-            headers={"Content-Type": "application/json"}
-        )
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-
-    else:
-        raise ValueError(f"Unsupported API provider: {api_provider}")
-
-
-def create_collection_plan(user_prompt, api_key, api_provider, target_rows):
+def create_collection_plan(user_prompt, client, target_rows):
     """Phase 1: Use an LLM to expand the user's request into a structured plan."""
     log("Phase 1: AI Query Planning...")
     progress("planning", "Analyzing your request with AI...")
@@ -182,7 +135,7 @@ Target scale: approximately {target_rows} rows.
 Generate a comprehensive collection plan to gather training data from multiple internet sources."""
 
     try:
-        raw = call_llm_api(planning_prompt, PLAN_SYSTEM_PROMPT, api_key, api_provider)
+        raw = client.complete(planning_prompt, PLAN_SYSTEM_PROMPT, purpose="planning")
         
         # Extract JSON from the response (handle markdown code blocks)
         json_match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw, re.DOTALL)
@@ -210,6 +163,7 @@ def create_fallback_plan(user_prompt):
     stops = {"i", "need", "a", "the", "for", "to", "an", "of", "on", "in", "my", "that", "with", "and", "is", "this"}
     keywords = [w.strip(".,!?\"'") for w in words if w not in stops and len(w) > 2][:8]
     query = " ".join(keywords[:5])
+    queries = as_queries([query, " ".join(keywords[:3]), " ".join(keywords[3:6])])
     
     return {
         "task_type": "other",
@@ -217,14 +171,14 @@ def create_fallback_plan(user_prompt):
         "keywords": keywords,
         "target_sources": ["wikipedia", "reddit", "kaggle", "huggingface", "arxiv", "news", "github"],
         "search_queries": {
-            "wikipedia": query,
-            "reddit": query,
-            "youtube": query,
-            "kaggle": query,
-            "huggingface": query,
-            "arxiv": query,
-            "news": query,
-            "github": query
+            "wikipedia": queries,
+            "reddit": queries,
+            "youtube": queries,
+            "kaggle": queries,
+            "huggingface": queries,
+            "arxiv": queries,
+            "news": queries,
+            "github": queries
         },
         "expected_schema": {"text": "string", "source": "string", "label": "string"},
         "quality_criteria": f"Relevant to: {user_prompt}"
@@ -235,157 +189,245 @@ def create_fallback_plan(user_prompt):
 # PHASE 2: Multi-Source Collection Adapters
 # ═══════════════════════════════════════════════════════════════════════════
 
-def collect_wikipedia(query, max_records=200):
+TRACKING_PARAMS = {"ref", "ref_src", "fbclid", "gclid", "share"}
+
+def _is_tracking_param(name):
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def url_key(url):
+    """Canonical form of a URL used for run-wide dedup (host case, fragment, tracking params)."""
+    parts = urlparse(url.strip())
+    query = "&".join(sorted(
+        p for p in parts.query.split("&")
+        if p and not _is_tracking_param(p.split("=", 1)[0].lower())
+    ))
+    path = parts.path.rstrip("/") or "/"
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+class SeenUrls:
+    """Run-wide set of claimed URLs/ids shared by all adapters (thread-safe)."""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.claimed = Counter()
+        self.skipped = Counter()
+
+    def claim(self, url, source=""):
+        """Return True the first time a URL is seen; callers skip the fetch otherwise."""
+        if not url:
+            return True
+        key = url_key(url)
+        with self._lock:
+            if key in self._seen:
+                self.skipped[source] += 1
+                return False
+            self._seen.add(key)
+            self.claimed[source] += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "unique_urls": len(self._seen),
+                "claimed_per_source": dict(self.claimed),
+                "skipped_duplicates_per_source": dict(self.skipped),
+            }
+
+
+def as_queries(query):
+    """Plans may give one query string or a list of expanded queries per source."""
+    if isinstance(query, str):
+        query = [query]
+    out = []
+    for q in query or []:
+        q = str(q).strip()
+        if q and q not in out:
+            out.append(q)
+    return out
+
+
+def chunk_words(text, size=400):
+    """Split long text into ~size-word chunks (dropping tiny tails)."""
+    words = text.split()
+    for i in range(0, len(words), size):
+        chunk = " ".join(words[i:i + size])
+        if len(chunk) > 50:
+            yield chunk
+
+
+def collect_wikipedia(query, max_records=200, seen=None):
     """Fetch Wikipedia articles and extract text content."""
     records = []
-    try:
-        url = (f"https://en.wikipedia.org/w/api.php?action=query&list=search"
-               f"&srsearch={quote_plus(query)}&srlimit=50&format=json")
-        data = http_get_json(url)
-        results = data.get("query", {}).get("search", [])
-
-        for item in results[:max_records]:
-            page_id = item.get("pageid", "")
-            title = item.get("title", "")
-            
-            # Fetch full extract
-            extract_url = (f"https://en.wikipedia.org/w/api.php?action=query&pageids={page_id}"
-                          f"&prop=extracts&explaintext=true&exlimit=1&format=json")
-            try:
-                extract_data = http_get_json(extract_url)
-                page = extract_data.get("query", {}).get("pages", {}).get(str(page_id), {})
-                text = page.get("extract", "")
-                
-                if len(text) > 100:
-                    # Split long articles into chunks of ~500 words
-                    words = text.split()
-                    for i in range(0, len(words), 400):
-                        chunk = " ".join(words[i:i+400])
-                        if len(chunk) > 50:
-                            records.append({
-                                "text": chunk,
-                                "source": "wikipedia",
-                                "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
-                                "title": title,
-                                "metadata": {"page_id": page_id}
-                            })
-            except Exception:
-                continue
-    except Exception as e:
-        log(f"Wikipedia adapter error: {e}")
-    
-    return records
+    seen = seen or SeenUrls()
+    hits = {}
+    for q in as_queries(query):
+        try:
+            url = (f"https://en.wikipedia.org/w/api.php?action=query&list=search"
+                   f"&srsearch={quote_plus(q)}&srlimit=50&format=json")
+            data = http_get_json(url)
+            for item in data.get("query", {}).get("search", []):
+                hits.setdefault(item.get("pageid", ""), item)
+        except Exception as e:
+            log(f"Wikipedia adapter error: {e}")
+
+    for page_id, item in hits.items():
+        if len(records) >= max_records:
+            break
+        title = item.get("title", "")
+        page_url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+        if not seen.claim(page_url, "wikipedia"):
+            continue
+
+        # Fetch full extract
+        extract_url = (f"https://en.wikipedia.org/w/api.php?action=query&pageids={page_id}"
+                      f"&prop=extracts&explaintext=true&exlimit=1&format=json")
+        try:
+            extract_data = http_get_json(extract_url)
+            page = extract_data.get("query", {}).get("pages", {}).get(str(page_id), {})
+            text = page.get("extract", "")
+
+            if len(text) > 100:
+                # Split long articles into chunks of ~500 words
+                for chunk in chunk_words(text):
+                    records.append({
+                        "text": chunk,
+                        "source": "wikipedia",
+                        "url": page_url,
+                        "title": title,
+                        "metadata": {"page_id": page_id}
+                    })
+        except Exception:
+            continue
+
+    return records[:max_records]
 
 
-def collect_reddit(query, max_records=500):
+def collect_reddit(query, max_records=500, seen=None):
     """Fetch Reddit posts and comments via public JSON API."""
     records = []
-    try:
-        # Search posts
-        url = f"https://www.reddit.com/search.json?q={quote_plus(query)}&limit=100&sort=relevance&t=all"
-        data = http_get_json(url, headers={
-            "User-Agent": "Text2LLM-DatasetCreator/2.0 (research)"
-        })
-        
-        posts = data.get("data", {}).get("children", [])
-        for post in posts:
-            pd = post.get("data", {})
-            title = pd.get("title", "")
-            selftext = pd.get("selftext", "")
-            subreddit = pd.get("subreddit", "")
-            
-            text = f"{title}\n{selftext}".strip()
-            if len(text) > 30:
-                records.append({
-                    "text": text,
-                    "source": "reddit",
-                    "url": f"https://reddit.com{pd.get('permalink', '')}",
-                    "title": title,
-                    "metadata": {
-                        "subreddit": subreddit,
-                        "score": pd.get("score", 0),
-                        "num_comments": pd.get("num_comments", 0)
-                    }
-                })
-        
-        # Also fetch top comments from top posts
-        for post in posts[:10]:
-            try:
-                permalink = post.get("data", {}).get("permalink", "")
-                if not permalink:
-                    continue
-                comment_url = f"https://www.reddit.com{permalink}.json?limit=25&sort=top"
-                cdata = http_get_json(comment_url, headers={
-                    "User-Agent": "Text2LLM-DatasetCreator/2.0 (research)"
-                })
-                if len(cdata) > 1:
-                    comments = cdata[1].get("data", {}).get("children", [])
-                    for c in comments:
-                        body = c.get("data", {}).get("body", "")
-                        if len(body) > 30 and body != "[deleted]" and body != "[removed]":
-                            records.append({
-                                "text": body,
-                                "source": "reddit",
-                                "url": f"https://reddit.com{permalink}",
-                                "title": f"Comment on: {post.get('data', {}).get('title', '')}",
-                                "metadata": {
-                                    "type": "comment",
-                                    "score": c.get("data", {}).get("score", 0)
-                                }
-                            })
-            except Exception:
+    seen = seen or SeenUrls()
+    headers = {"User-Agent": "Text2LLM-DatasetCreator/2.0 (research)"}
+    posts = {}
+    for q in as_queries(query):
+        try:
+            url = f"https://www.reddit.com/search.json?q={quote_plus(q)}&limit=100&sort=relevance&t=all"
+            data = http_get_json(url, headers=headers)
+            for post in data.get("data", {}).get("children", []):
+                pd = post.get("data", {})
+                posts.setdefault(pd.get("permalink") or pd.get("id", ""), pd)
+        except Exception as e:
+            log(f"Reddit adapter error: {e}")
+
+    fresh = []
+    for permalink, pd in posts.items():
+        post_url = f"https://reddit.com{pd.get('permalink', '')}"
+        if not seen.claim(post_url, "reddit"):
+            continue
+        fresh.append(pd)
+        title = pd.get("title", "")
+        text = f"{title}\n{pd.get('selftext', '')}".strip()
+        if len(text) > 30:
+            records.append({
+                "text": text,
+                "source": "reddit",
+                "url": post_url,
+                "title": title,
+                "metadata": {
+                    "subreddit": pd.get("subreddit", ""),
+                    "score": pd.get("score", 0),
+                    "num_comments": pd.get("num_comments", 0)
+                }
+            })
+
+    # Also fetch top comments from the top posts not already claimed by another query/source
+    fresh.sort(key=lambda pd: pd.get("score", 0), reverse=True)
+    for pd in fresh[:10]:
+        if len(records) >= max_records:
+            break
+        try:
+            permalink = pd.get("permalink", "")
+            if not permalink:
                 continue
-                
-    except Exception as e:
-        log(f"Reddit adapter error: {e}")
-    
+            comment_url = f"https://www.reddit.com{permalink}.json?limit=25&sort=top"
+            cdata = http_get_json(comment_url, headers=headers)
+            if len(cdata) > 1:
+                comments = cdata[1].get("data", {}).get("children", [])
+                for c in comments:
+                    body = c.get("data", {}).get("body", "")
+                    if len(body) > 30 and body != "[deleted]" and body != "[removed]":
+                        records.append({
+                            "text": body,
+                            "source": "reddit",
+                            "url": f"https://reddit.com{permalink}",
+                            "title": f"Comment on: {pd.get('title', '')}",
+                            "metadata": {
+                                "type": "comment",
+                                "score": c.get("data", {}).get("score", 0)
+                            }
+                        })
+        except Exception:
+            continue
+
     return records[:max_records]
 
 
-def collect_youtube_transcripts(query, max_records=200):
+INVIDIOUS_INSTANCES = ["https://vid.puffyan.us", "https://invidious.fdn.fr"]
+
+def collect_youtube_transcripts(query, max_records=200, seen=None):
     """Fetch YouTube video transcripts via youtube-transcript-api or fallback."""
     records = []
-    try:
-        # Search YouTube via invidious (no API key needed)
-        search_url = f"https://vid.puffyan.us/api/v1/search?q={quote_plus(query)}&type=video&sort_by=relevance"
-        try:
-            videos = http_get_json(search_url)
-        except Exception:
-            # Fallback: try another invidious instance
+    seen = seen or SeenUrls()
+    videos = {}
+    for q in as_queries(query):
+        # Search YouTube via invidious (no API key needed), trying each instance in turn
+        for instance in INVIDIOUS_INSTANCES:
             try:
-                search_url = f"https://invidious.fdn.fr/api/v1/search?q={quote_plus(query)}&type=video&sort_by=relevance"
-                videos = http_get_json(search_url)
+                results = http_get_json(f"{instance}/api/v1/search?q={quote_plus(q)}&type=video&sort_by=relevance")
+                for v in results[:30]:
+                    if v.get("videoId"):
+                        videos.setdefault(v["videoId"], v)
+                break
             except Exception:
-                log("YouTube search unavailable (no Invidious instance reachable)")
-                return records
+                continue
+    if not videos:
+        log("YouTube search unavailable (no Invidious instance reachable)")
+        return records
 
-        video_ids = [v.get("videoId") for v in videos[:30] if v.get("videoId")]
-        
+    fresh = [v for vid, v in videos.items()
+             if seen.claim(f"https://www.youtube.com/watch?v={vid}", "youtube")]
+
+    try:
         # Try youtube-transcript-api
         try:
             from youtube_transcript_api import YouTubeTranscriptApi
-            for vid in video_ids:
+            for v in fresh:
+                if len(records) >= max_records:
+                    break
+                vid = v["videoId"]
                 try:
                     transcript = YouTubeTranscriptApi.get_transcript(vid, languages=['en'])
                     full_text = " ".join([t["text"] for t in transcript])
                     if len(full_text) > 100:
                         # Chunk long transcripts
-                        words = full_text.split()
-                        for i in range(0, len(words), 400):
-                            chunk = " ".join(words[i:i+400])
-                            if len(chunk) > 50:
-                                records.append({
-                                    "text": chunk,
-                                    "source": "youtube",
-                                    "url": f"https://www.youtube.com/watch?v={vid}",
-                                    "title": next((v.get("title", "") for v in videos if v.get("videoId") == vid), ""),
-                                    "metadata": {"type": "transcript", "video_id": vid}
-                                })
+                        for chunk in chunk_words(full_text):
+                            records.append({
+                                "text": chunk,
+                                "source": "youtube",
+                                "url": f"https://www.youtube.com/watch?v={vid}",
+                                "title": v.get("title", ""),
+                                "metadata": {"type": "transcript", "video_id": vid}
+                            })
                 except Exception:
                     continue
         except ImportError:
             log("youtube-transcript-api not installed. Storing video metadata only.")
-            for v in videos[:30]:
+            for v in fresh:
                 records.append({
                     "text": f"{v.get('title', '')}. {v.get('description', '')}".strip(),
                     "source": "youtube",
@@ -393,221 +435,260 @@ def collect_youtube_transcripts(query, max_records=200):
                     "title": v.get("title", ""),
                     "metadata": {"type": "metadata_only", "video_id": v.get("videoId", "")}
                 })
-                
+
     except Exception as e:
         log(f"YouTube adapter error: {e}")
-    
+
     return records[:max_records]
 
 
-def collect_kaggle(query, max_records=100):
+def collect_kaggle(query, max_records=100, seen=None):
     """Search Kaggle for relevant datasets."""
     records = []
-    try:
-        url = f"https://www.kaggle.com/api/v1/datasets/list?search={quote_plus(query)}&sortBy=relevance"
+    seen = seen or SeenUrls()
+    for q in as_queries(query):
         try:
-            datasets = http_get_json(url)
-        except Exception:
-            datasets = []
-        
-        for ds in (datasets if isinstance(datasets, list) else []):
-            ref = ds.get("ref", "")
-            records.append({
-                "text": f"Dataset: {ds.get('title', '')}. {ds.get('subtitle', '')}",
-                "source": "kaggle",
-                "url": f"https://www.kaggle.com/datasets/{ref}",
-                "title": ds.get("title", ""),
-                "metadata": {
-                    "ref": ref,
-                    "type": "dataset_catalog",
-                    "size_bytes": ds.get("totalBytes", 0),
-                    "download_count": ds.get("downloadCount", 0)
-                }
-            })
-    except Exception as e:
-        log(f"Kaggle adapter error: {e}")
-    
-    return records[:max_records]
-
-
-def collect_huggingface(query, max_records=100):
-    """Search HuggingFace Hub for datasets and sample their contents."""
-    records = []
-    try:
-        url = f"https://huggingface.co/api/datasets?search={quote_plus(query)}&limit=50&sort=downloads"
-        datasets = http_get_json(url)
-        
-        for ds in (datasets if isinstance(datasets, list) else []):
-            ds_id = ds.get("id", "")
-            
-            # Try to fetch a preview of the dataset content
+            url = f"https://www.kaggle.com/api/v1/datasets/list?search={quote_plus(q)}&sortBy=relevance"
             try:
-                preview_url = f"https://datasets-server.huggingface.co/first-rows?dataset={quote_plus(ds_id)}&config=default&split=train"
-                preview = http_get_json(preview_url, timeout=10)
-                rows = preview.get("rows", [])
-                for row in rows[:20]:
-                    row_data = row.get("row", {})
-                    # Find the main text column
-                    text = ""
-                    for key in ["text", "content", "sentence", "question", "input", "instruction"]:
-                        if key in row_data and isinstance(row_data[key], str):
-                            text = row_data[key]
-                            break
-                    if not text:
-                        # Take the longest string value
-                        str_vals = [(k, v) for k, v in row_data.items() if isinstance(v, str) and len(v) > 20]
-                        if str_vals:
-                            text = max(str_vals, key=lambda x: len(x[1]))[1]
-                    
-                    if text and len(text) > 20:
-                        records.append({
-                            "text": text,
-                            "source": "huggingface",
-                            "url": f"https://huggingface.co/datasets/{ds_id}",
-                            "title": ds_id,
-                            "metadata": {"type": "dataset_row", "row_data": {k: str(v)[:200] for k, v in row_data.items()}}
-                        })
+                datasets = http_get_json(url)
             except Exception:
-                # Just add catalog entry
+                datasets = []
+
+            for ds in (datasets if isinstance(datasets, list) else []):
+                ref = ds.get("ref", "")
+                ds_url = f"https://www.kaggle.com/datasets/{ref}"
+                if not seen.claim(ds_url, "kaggle"):
+                    continue
                 records.append({
-                    "text": f"Dataset: {ds_id}. Tags: {', '.join(ds.get('tags', [])[:5])}",
-                    "source": "huggingface",
-                    "url": f"https://huggingface.co/datasets/{ds_id}",
-                    "title": ds_id,
-                    "metadata": {"type": "catalog", "downloads": ds.get("downloads", 0)}
+                    "text": f"Dataset: {ds.get('title', '')}. {ds.get('subtitle', '')}",
+                    "source": "kaggle",
+                    "url": ds_url,
+                    "title": ds.get("title", ""),
+                    "metadata": {
+                        "ref": ref,
+                        "type": "dataset_catalog",
+                        "size_bytes": ds.get("totalBytes", 0),
+                        "download_count": ds.get("downloadCount", 0)
+                    }
                 })
-    except Exception as e:
-        log(f"HuggingFace adapter error: {e}")
-    
+        except Exception as e:
+            log(f"Kaggle adapter error: {e}")
+
     return records[:max_records]
 
 
-def collect_arxiv(query, max_records=100):
-    """Fetch academic paper abstracts from arXiv."""
+HF_ROWS_PER_DATASET = 200
+
+
+def collect_huggingface(query, max_records=100, seen=None):
+    """
+    Search HuggingFace Hub for datasets and sample their contents: Parquet
+    shards are streamed with range reads when pyarrow is available, otherwise
+    (or on failure) the 20-row first-rows preview is used.
+    """
     records = []
-    try:
-        import xml.etree.ElementTree as ET
-        url = (f"http://export.arxiv.org/api/query?search_query=all:{quote_plus(query)}"
-               f"&max_results=50&sortBy=relevance&sortOrder=descending")
-        xml_text = http_get_text(url)
-        root = ET.fromstring(xml_text)
-        
-        ns = {"atom": "http://www.w3.org/2005/Atom"}
-        for entry in root.findall("atom:entry", ns):
-            title = entry.findtext("atom:title", "", ns).strip()
-            summary = entry.findtext("atom:summary", "", ns).strip()
-            link_el = entry.find("atom:id", ns)
-            link = link_el.text.strip() if link_el is not None else ""
-            
-            if summary and len(summary) > 50:
-                records.append({
-                    "text": f"{title}\n\n{summary}",
-                    "source": "arxiv",
-                    "url": link,
-                    "title": title,
-                    "metadata": {"type": "paper_abstract"}
-                })
-    except Exception as e:
-        log(f"arXiv adapter error: {e}")
-    
+    seen = seen or SeenUrls()
+    hits = {}
+    for q in as_queries(query):
+        try:
+            url = f"https://huggingface.co/api/datasets?search={quote_plus(q)}&limit=50&sort=downloads"
+            datasets = http_get_json(url)
+            for ds in (datasets if isinstance(datasets, list) else []):
+                hits.setdefault(ds.get("id", ""), ds)
+        except Exception as e:
+            log(f"HuggingFace adapter error: {e}")
+
+    for ds_id, ds in hits.items():
+        if len(records) >= max_records:
+            break
+        ds_url = f"https://huggingface.co/datasets/{ds_id}"
+        if not seen.claim(ds_url, "huggingface"):
+            continue
+
+        # Stream rows from the dataset's Parquet shards (range reads; media columns are not fetched)
+        if hf_parquet.pq is not None:
+            try:
+                per_dataset = min(HF_ROWS_PER_DATASET, max_records - len(records))
+                streamed = list(hf_parquet.iter_records(ds_id, max_records=per_dataset))
+                for record in streamed:
+                    record["metadata"]["row_data"] = {k: str(v)[:200] for k, v in record["metadata"]["row_data"].items()}
+                records.extend(streamed)
+                if streamed:
+                    continue
+            except Exception as e:
+                log(f"HuggingFace Parquet stream failed for {ds_id}: {e}; falling back to first-rows")
+
+        # Try to fetch a preview of the dataset content
+        try:
+            preview_url = f"https://datasets-server.huggingface.co/first-rows?dataset={quote_plus(ds_id)}&config=default&split=train"
+            preview = http_get_json(preview_url, timeout=10)
+            rows = preview.get("rows", [])
+            for row in rows[:20]:
+                row_data = row.get("row", {})
+                # Find the main text column
+                text = ""
+                for key in ["text", "content", "sentence", "question", "input", "instruction"]:
+                    if key in row_data and isinstance(row_data[key], str):
+                        text = row_data[key]
+                        break
+                if not text:
+                    # Take the longest string value
+                    str_vals = [(k, v) for k, v in row_data.items() if isinstance(v, str) and len(v) > 20]
+                    if str_vals:
+                        text = max(str_vals, key=lambda x: len(x[1]))[1]
+
+                if text and len(text) > 20:
+                    records.append({
+                        "text": text,
+                        "source": "huggingface",
+                        "url": ds_url,
+                        "title": ds_id,
+                        "metadata": {"type": "dataset_row", "row_data": {k: str(v)[:200] for k, v in row_data.items()}}
+                    })
+        except Exception:
+            # Just add catalog entry
+            records.append({
+                "text": f"Dataset: {ds_id}. Tags: {', '.join(ds.get('tags', [])[:5])}",
+                "source": "huggingface",
+                "url": ds_url,
+                "title": ds_id,
+                "metadata": {"type": "catalog", "downloads": ds.get("downloads", 0)}
+            })
+
     return records[:max_records]
 
 
-def collect_news(query, max_records=200):
+def collect_arxiv(query, max_records=100, seen=None, bulk_records=0):
+    """
+    Fetch academic paper abstracts from arXiv.
+    With bulk_records > 0 the export API is paged (stream-parsed, 3s apart)
+    until that many abstracts are collected across the queries.
+    """
+    records = []
+    seen = seen or SeenUrls()
+    queries = as_queries(query)
+    target = max(max_records, bulk_records) if bulk_records else max_records
+    per_query = max(1, target // max(len(queries), 1)) if bulk_records else 50
+    throttle = arxiv_harvest.Throttle()
+    for q in queries:
+        try:
+            for record in arxiv_harvest.harvest_search(q, per_query, throttle=throttle):
+                if seen.claim(record["url"], "arxiv"):
+                    records.append(record)
+                if len(records) >= target:
+                    # Later queries would only add throttled requests whose results are dropped.
+                    return records
+        except Exception as e:
+            log(f"arXiv adapter error: {e}")
+
+    return records
+
+
+def collect_news(query, max_records=200, seen=None):
     """Fetch news articles using DuckDuckGo instant answer API and web scraping."""
     records = []
-    try:
-        # DuckDuckGo instant answers
-        url = f"https://api.duckduckgo.com/?q={quote_plus(query)}&format=json&no_redirect=1"
-        data = http_get_json(url)
-        
-        abstract = data.get("Abstract", "")
-        if abstract and len(abstract) > 50:
-            records.append({
-                "text": abstract,
-                "source": "news",
-                "url": data.get("AbstractURL", ""),
-                "title": data.get("Heading", query),
-                "metadata": {"type": "instant_answer"}
-            })
-        
-        # Related topics
-        for topic in data.get("RelatedTopics", []):
-            if isinstance(topic, dict) and topic.get("Text"):
+    seen = seen or SeenUrls()
+    for q in as_queries(query):
+        try:
+            # DuckDuckGo instant answers
+            url = f"https://api.duckduckgo.com/?q={quote_plus(q)}&format=json&no_redirect=1"
+            data = http_get_json(url)
+
+            abstract = data.get("Abstract", "")
+            if abstract and len(abstract) > 50 and seen.claim(data.get("AbstractURL", ""), "news"):
                 records.append({
-                    "text": topic["Text"],
+                    "text": abstract,
                     "source": "news",
-                    "url": topic.get("FirstURL", ""),
-                    "title": topic.get("Text", "")[:80],
-                    "metadata": {"type": "related_topic"}
+                    "url": data.get("AbstractURL", ""),
+                    "title": data.get("Heading", q),
+                    "metadata": {"type": "instant_answer"}
                 })
-            elif isinstance(topic, dict) and topic.get("Topics"):
-                for sub in topic["Topics"]:
-                    if sub.get("Text"):
-                        records.append({
-                            "text": sub["Text"],
-                            "source": "news",
-                            "url": sub.get("FirstURL", ""),
-                            "title": sub.get("Text", "")[:80],
-                            "metadata": {"type": "related_subtopic"}
-                        })
-    except Exception as e:
-        log(f"News adapter error: {e}")
-    
+
+            # Related topics
+            for topic in data.get("RelatedTopics", []):
+                if isinstance(topic, dict) and topic.get("Text"):
+                    if not seen.claim(topic.get("FirstURL", ""), "news"):
+                        continue
+                    records.append({
+                        "text": topic["Text"],
+                        "source": "news",
+                        "url": topic.get("FirstURL", ""),
+                        "title": topic.get("Text", "")[:80],
+                        "metadata": {"type": "related_topic"}
+                    })
+                elif isinstance(topic, dict) and topic.get("Topics"):
+                    for sub in topic["Topics"]:
+                        if sub.get("Text") and seen.claim(sub.get("FirstURL", ""), "news"):
+                            records.append({
+                                "text": sub["Text"],
+                                "source": "news",
+                                "url": sub.get("FirstURL", ""),
+                                "title": sub.get("Text", "")[:80],
+                                "metadata": {"type": "related_subtopic"}
+                            })
+        except Exception as e:
+            log(f"News adapter error: {e}")
+
     return records[:max_records]
 
 
-def collect_github(query, max_records=100):
+def collect_github(query, max_records=100, seen=None):
     """Search GitHub for relevant repositories and their README content."""
     records = []
-    try:
-        url = f"https://api.github.com/search/repositories?q={quote_plus(query)}&sort=stars&per_page=30"
-        data = http_get_json(url, headers={"Accept": "application/vnd.github.v3+json"})
-        
-        for repo in data.get("items", []):
-            full_name = repo.get("full_name", "")
-            description = repo.get("description", "") or ""
-            
-            # Try to fetch README
-            readme_text = ""
-            try:
-                readme_url = f"https://api.github.com/repos/{full_name}/readme"
-                readme_data = http_get_json(readme_url, headers={"Accept": "application/vnd.github.v3+json"})
-                if readme_data.get("encoding") == "base64":
-                    import base64
-                    readme_text = base64.b64decode(readme_data.get("content", "")).decode("utf-8", errors="replace")
-                    # Strip markdown images and links, keep text
-                    readme_text = re.sub(r'!\[.*?\]\(.*?\)', '', readme_text)
-                    readme_text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', readme_text)
-                    readme_text = re.sub(r'#{1,6}\s+', '', readme_text)
-                    readme_text = readme_text[:5000]
-            except Exception:
-                pass
-            
-            text = f"{repo.get('name', '')}: {description}"
-            if readme_text:
-                text += f"\n\n{readme_text}"
-            
-            if len(text) > 50:
-                # Chunk if large
-                words = text.split()
-                for i in range(0, len(words), 400):
-                    chunk = " ".join(words[i:i+400])
-                    if len(chunk) > 50:
-                        records.append({
-                            "text": chunk,
-                            "source": "github",
-                            "url": repo.get("html_url", ""),
-                            "title": full_name,
-                            "metadata": {
-                                "stars": repo.get("stargazers_count", 0),
-                                "language": repo.get("language", ""),
-                                "type": "repository"
-                            }
-                        })
-    except Exception as e:
-        log(f"GitHub adapter error: {e}")
-    
+    seen = seen or SeenUrls()
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    repos = {}
+    for q in as_queries(query):
+        try:
+            url = f"https://api.github.com/search/repositories?q={quote_plus(q)}&sort=stars&per_page=30"
+            data = http_get_json(url, headers=headers)
+            for repo in data.get("items", []):
+                repos.setdefault(repo.get("full_name", ""), repo)
+        except Exception as e:
+            log(f"GitHub adapter error: {e}")
+
+    for full_name, repo in repos.items():
+        if len(records) >= max_records:
+            break
+        if not seen.claim(repo.get("html_url", ""), "github"):
+            continue
+        description = repo.get("description", "") or ""
+
+        # Try to fetch README
+        readme_text = ""
+        try:
+            readme_url = f"https://api.github.com/repos/{full_name}/readme"
+            readme_data = http_get_json(readme_url, headers=headers)
+            if readme_data.get("encoding") == "base64":
+                import base64
+                readme_text = base64.b64decode(readme_data.get("content", "")).decode("utf-8", errors="replace")
+                # Strip markdown images and links, keep text
+                readme_text = re.sub(r'!\[.*?\]\(.*?\)', '', readme_text)
+                readme_text = re.sub(r'\[([^\]]+)\]\(.*?\)', r'\1', readme_text)
+                readme_text = re.sub(r'#{1,6}\s+', '', readme_text)
+                readme_text = readme_text[:5000]
+        except Exception:
+            pass
+
+        text = f"{repo.get('name', '')}: {description}"
+        if readme_text:
+            text += f"\n\n{readme_text}"
+
+        if len(text) > 50:
+            # Chunk if large
+            for chunk in chunk_words(text):
+                records.append({
+                    "text": chunk,
+                    "source": "github",
+                    "url": repo.get("html_url", ""),
+                    "title": full_name,
+                    "metadata": {
+                        "stars": repo.get("stargazers_count", 0),
+                        "language": repo.get("language", ""),
+                        "type": "repository"
+                    }
+                })
+
     return records[:max_records]
 
 
@@ -624,8 +705,20 @@ SOURCE_ADAPTERS = {
 }
 
 
-def run_collection(plan, target_rows):
-    """Phase 2: Dispatch parallel agents to all target sources."""
+MAX_QUERIES_PER_SOURCE = 4
+
+def _run_adapter(source, adapter, queries, max_records, seen):
+    with profiling.span(f"adapter:{source}", cat="adapter", queries=" | ".join(queries)):
+        return adapter(queries, max_records, seen=seen)
+
+
+def run_collection(plan, target_rows, seen=None):
+    """
+    Phase 2: Dispatch parallel agents to all target sources.
+    Each source receives all of its expanded queries; search hits are merged and
+    claimed in the shared `seen` set before any detail fetch, so the same URL is
+    never downloaded twice in one run.
+    """
     log("Phase 2: Multi-Source Collection...")
     progress("collecting", "Dispatching agents to internet sources...")
     
@@ -638,15 +731,16 @@ def run_collection(plan, target_rows):
     
     all_records = []
     source_stats = {}
+    seen = seen if seen is not None else SeenUrls()
     
     with ThreadPoolExecutor(max_workers=6) as executor:
         futures = {}
         for source in sources:
             if source not in SOURCE_ADAPTERS:
                 continue
-            query = queries.get(source, fallback_query)
+            source_queries = as_queries(queries.get(source) or fallback_query)[:MAX_QUERIES_PER_SOURCE]
             adapter = SOURCE_ADAPTERS[source]
-            futures[executor.submit(adapter, query, per_source)] = source
+            futures[executor.submit(_run_adapter, source, adapter, source_queries, per_source, seen)] = source
         
         for future in as_completed(futures):
             source = futures[future]
@@ -661,7 +755,9 @@ def run_collection(plan, target_rows):
                 progress("collecting", f"✗ {source}: failed ({e})")
                 log(f"  ✗ {source} failed: {e}")
     
-    log(f"Total raw records collected: {len(all_records)} from {len(source_stats)} sources")
+    skipped = sum(seen.skipped.values())
+    log(f"Total raw records collected: {len(all_records)} from {len(source_stats)} sources "
+        f"({skipped} duplicate URLs skipped before fetch)")
     return all_records, source_stats
 
 
@@ -764,24 +860,28 @@ def refine_records(records, target_rows, min_quality=0.4):
     initial_count = len(records)
     
     # Step 1: Remove empty/too-short records
-    records = [r for r in records if r.get("text") and len(r["text"].strip()) > 20]
+    with profiling.span("length_filter", cat="refine"):
+        records = [r for r in records if r.get("text") and len(r["text"].strip()) > 20]
     log(f"  After length filter: {len(records)} (removed {initial_count - len(records)} short)")
     
     # Step 2: PII scrubbing
     progress("refining", "Removing personal information...")
-    for r in records:
-        r["text"] = scrub_pii(r["text"])
+    with profiling.span("pii_scrub", cat="refine", records=len(records)), profiling.cpu_section():
+        for r in records:
+            r["text"] = scrub_pii(r["text"])
     
     # Step 3: Deduplication
     progress("refining", "Removing duplicates...")
     before_dedup = len(records)
-    records = deduplicate_records(records)
+    with profiling.span("dedup", cat="refine", records=before_dedup), profiling.cpu_section():
+        records = deduplicate_records(records)
     log(f"  After dedup: {len(records)} (removed {before_dedup - len(records)} duplicates)")
     
     # Step 4: Quality scoring
     progress("refining", "Scoring quality...")
-    for r in records:
-        r["quality_score"] = score_quality(r)
+    with profiling.span("quality_score", cat="refine", records=len(records)), profiling.cpu_section():
+        for r in records:
+            r["quality_score"] = score_quality(r)
     
     # Step 5: Filter by quality
     records = [r for r in records if r.get("quality_score", 0) >= min_quality]
@@ -826,7 +926,8 @@ def split_dataset(records, train=0.8, val=0.1, test=0.1):
     return train_set, val_set, test_set
 
 
-def generate_dataset_card(output_dir, records, plan, source_stats, args, train_n, val_n, test_n):
+def generate_dataset_card(output_dir, records, plan, source_stats, args, train_n, val_n, test_n,
+                          run_metrics=None):
     """Generate a comprehensive dataset card."""
     from collections import Counter
     
@@ -862,6 +963,8 @@ def generate_dataset_card(output_dir, records, plan, source_stats, args, train_n
         "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "generator": "Text2LLM Autonomous Dataset Creator v2.0",
     }
+    if run_metrics:
+        card["run_metrics"] = run_metrics
     
     card_path = os.path.join(output_dir, "dataset_card.json")
     with open(card_path, "w", encoding="utf-8") as f:
@@ -870,7 +973,7 @@ def generate_dataset_card(output_dir, records, plan, source_stats, args, train_n
     return card
 
 
-def assemble_and_deliver(records, plan, source_stats, args):
+def assemble_and_deliver(records, plan, source_stats, args, run_metrics=None):
     """Phase 4: Split, write, and generate dataset card."""
     log("Phase 4: Assembling final dataset...")
     progress("assembling", "Splitting into train/val/test...")
@@ -889,12 +992,15 @@ def assemble_and_deliver(records, plan, source_stats, args):
         try:
             import pandas as pd
             for name, split in [("train", train), ("val", val), ("test", test)]:
+                annotation_cols = [c for c in ("label", "instruction", "response")
+                                   if any(c in r for r in records)]
                 flat = [{
                     "text": r.get("text", ""),
                     "source": r.get("source", ""),
                     "url": r.get("url", ""),
                     "title": r.get("title", ""),
                     "quality_score": r.get("quality_score", 0),
+                    **{c: r.get(c, "") for c in annotation_cols},
                 } for r in split]
                 df = pd.DataFrame(flat)
                 ext = args.output_format
@@ -911,7 +1017,7 @@ def assemble_and_deliver(records, plan, source_stats, args):
             write_jsonl(test, os.path.join(output_dir, f"test_{ts}.jsonl"))
     
     card = generate_dataset_card(output_dir, records, plan, source_stats, args,
-                                  len(train), len(val), len(test))
+                                  len(train), len(val), len(test), run_metrics=run_metrics)
     
     progress("completed", f"Dataset ready: {len(records)} records")
     return card
@@ -921,6 +1027,12 @@ def assemble_and_deliver(records, plan, source_stats, args):
 # Main Entry Point
 # ═══════════════════════════════════════════════════════════════════════════
 
+def write_profile(output_dir):
+    """Write the --profile trace/pstats files next to the dataset card."""
+    for kind, path in profiling.write_outputs(output_dir).items():
+        log(f"Profile {kind}: {path}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Autonomous Dataset Creator — Describe → Collect → Refine → Deliver"
@@ -935,6 +1047,27 @@ def main():
     parser.add_argument("--output-dir", default="./output/autonomous", help="Output directory")
     parser.add_argument("--min-quality", type=float, default=0.4, help="Min quality score (0-1)")
     parser.add_argument("--dry-run", action="store_true", help="Only emit the plan, no collection")
+    parser.add_argument("--llm-model", default=None, help="Override the provider's default model")
+    parser.add_argument("--llm-base-url", default=None,
+                        help="Override the provider base URL (e.g. a local mock server)")
+    parser.add_argument("--llm-timeout", type=float, default=60, help="Per-request LLM timeout (seconds)")
+    parser.add_argument("--llm-max-retries", type=int, default=4, help="Retries on 429/5xx/network errors")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Max in-flight LLM requests")
+    parser.add_argument("--annotate", default="off", choices=["off", "auto", "labels", "instructions"],
+                        help="LLM annotation stage: add label or instruction/response columns")
+    parser.add_argument("--labels", default="", help="Comma-separated label set for --annotate labels")
+    parser.add_argument("--annotate-batch-size", type=int, default=20, help="Records packed per LLM request")
+    parser.add_argument("--annotate-rpm", type=int, default=60, help="Max annotation requests per minute")
+    parser.add_argument("--arxiv-bulk", type=int, default=0,
+                        help="Page arXiv until this many abstracts are collected (0 = single page per query)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record span timings and write a Chrome trace next to the dataset card")
+    parser.add_argument("--profile-cpu", action="store_true",
+                        help="With --profile, also dump cProfile stats for the CPU-bound refine stages")
+    parser.add_argument("--annotation-cache",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             "output", ".annotation_cache.jsonl"),
+                        help="Content-hash cache file shared across runs")
     args = parser.parse_args()
 
     # ── Auto-detect API key from environment variables (set by Infra page) ──
@@ -966,12 +1099,31 @@ def main():
         log(f"LLM Provider: {api_provider} (key: {masked})")
     log("")
 
-    # ── Phase 1: Plan ──
+    if args.profile:
+        profiling.enable(cpu=args.profile_cpu)
+    if args.arxiv_bulk:
+        SOURCE_ADAPTERS["arxiv"] = functools.partial(collect_arxiv, bulk_records=args.arxiv_bulk)
+
+    llm_metrics = LLMMetrics()
+    llm_client = None
     if api_key:
-        plan = create_collection_plan(args.prompt, api_key, api_provider, args.target_rows)
-    else:
-        log("No API key found in args or environment. Using keyword-based fallback planning.")
-        plan = create_fallback_plan(args.prompt)
+        llm_client = LLMClient(
+            api_key, api_provider,
+            model=args.llm_model,
+            base_url=args.llm_base_url,
+            timeout=args.llm_timeout,
+            max_retries=args.llm_max_retries,
+            max_concurrency=args.llm_concurrency,
+            metrics=llm_metrics,
+        )
+
+    # ── Phase 1: Plan ──
+    with profiling.span("planning", cat="phase"):
+        if llm_client:
+            plan = create_collection_plan(args.prompt, llm_client, args.target_rows)
+        else:
+            log("No API key found in args or environment. Using keyword-based fallback planning.")
+            plan = create_fallback_plan(args.prompt)
     
     log(f"\nCollection Plan:")
     log(f"  Task Type: {plan.get('task_type', 'unknown')}")
@@ -981,27 +1133,65 @@ def main():
     log("")
     
     if args.dry_run:
+        if llm_client:
+            llm_client.close()
         print(json.dumps(plan, indent=2))
         return
 
     # ── Phase 2: Collect ──
-    raw_records, source_stats = run_collection(plan, args.target_rows)
+    seen_urls = SeenUrls()
+    with profiling.span("collection", cat="phase"):
+        raw_records, source_stats = run_collection(plan, args.target_rows, seen=seen_urls)
     
     if not raw_records:
         log("ERROR: No records collected from any source.")
         progress("failed", "No data could be collected")
+        write_profile(args.output_dir)
         sys.exit(1)
     
     # ── Phase 3: Refine ──
-    refined = refine_records(raw_records, args.target_rows, args.min_quality)
+    with profiling.span("refine", cat="phase"):
+        refined = refine_records(raw_records, args.target_rows, args.min_quality)
     
     if not refined:
         log("ERROR: All records were filtered out during refinement.")
         progress("failed", "All collected data was below quality threshold")
+        write_profile(args.output_dir)
         sys.exit(1)
     
+    # ── Phase 3b: Annotate (optional) ──
+    annotation_stats = None
+    if args.annotate != "off":
+        if not llm_client:
+            log("WARNING: --annotate needs an LLM API key. Skipping annotation.")
+        else:
+            progress("annotating", "Labeling records with AI...")
+            try:
+                with profiling.span("annotation", cat="phase"):
+                    annotation_stats = annotate_records(
+                        refined, llm_client, plan=plan, mode=args.annotate,
+                        labels=[l for l in args.labels.split(",") if l.strip()],
+                        cache_path=args.annotation_cache,
+                        batch_size=args.annotate_batch_size,
+                        concurrency=args.llm_concurrency,
+                        requests_per_minute=args.annotate_rpm,
+                    )
+            except Exception as e:
+                log(f"WARNING: Annotation failed: {e}")
+
     # ── Phase 4: Assemble & Deliver ──
-    card = assemble_and_deliver(refined, plan, source_stats, args)
+    run_metrics = {"url_dedup": seen_urls.stats()}
+    if llm_client:
+        run_metrics["llm"] = llm_metrics.summary()
+    if annotation_stats:
+        run_metrics["annotation"] = annotation_stats
+    if profiling.active():
+        run_metrics["profile"] = profiling.active().summary()
+    with profiling.span("assembly", cat="phase"):
+        card = assemble_and_deliver(refined, plan, source_stats, args, run_metrics=run_metrics)
+    if llm_client:
+        llm_client.close()
+    write_profile(args.output_dir)
     
     log("")
     log("═" * 60)
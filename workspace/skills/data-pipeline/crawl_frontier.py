@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Crawl Frontier
+URL canonicalization, a compact visited filter and a politeness-aware
+priority frontier shared by the scrape engines.
+
+  canonicalize_url()  collapses ?utm=/#fragment/default-port/case variants
+  BloomFilter         fixed-memory visited set (~1.8 MB per million URLs at 0.1%)
+  Frontier            priority queue with per-host concurrency and crawl-delay
+  run_crawl()         asyncio loop keeping many fetches in flight
+
+Usage:
+  frontier = Frontier(per_host_concurrency=4, crawl_delay=0.5)
+  frontier.push("https://example.com/", depth=0)
+  asyncio.run(run_crawl(frontier, process_item, concurrency=32))
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import os
+import posixpath
+import time
+from collections import Counter, namedtuple
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+# ---------------------------------------------------------------------------
+# URL canonicalization
+# ---------------------------------------------------------------------------
+
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "dclid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Characters that may stay literal in a path; everything else is percent-encoded.
+_PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url, base=None):
+    """
+    Normalize a URL so trivially different spellings map to one key.
+    Returns "" for non-http(s) or unparsable URLs.
+    """
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return ""
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return ""
+
+    host = parts.hostname.lower().rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    try:
+        port = parts.port
+    except ValueError:
+        return ""
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    path = quote(unquote(path), safe=_PATH_SAFE)
+    if "/." in path or "//" in path:
+        trailing = path.endswith("/")
+        path = posixpath.normpath(path)
+        if trailing and path != "/":
+            path += "/"
+    if not path.startswith("/"):
+        path = "/" + path
+
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+              if not _is_tracking_param(k)]
+    query = urlencode(sorted(params), doseq=True)
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def host_of(url):
+    return urlsplit(url).netloc
+
+# ---------------------------------------------------------------------------
+# Visited filter
+# ---------------------------------------------------------------------------
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set. False positives (a new URL treated as seen)
+    happen at roughly `error_rate`; false negatives never happen.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Add item; return True if it was (probably) not present before."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        """Write the filter atomically: JSON header line followed by the raw bit array."""
+        header = {"capacity": self.capacity, "error_rate": self.error_rate, "num_bits": self.num_bits,
+                  "num_hashes": self.num_hashes, "count": self.count}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(json.dumps(header).encode("utf-8") + b"\n")
+            fh.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            bits = bytearray(fh.read())
+        bloom = cls(header["capacity"], header["error_rate"])
+        if len(bits) != len(bloom.bits) or bloom.num_hashes != header["num_hashes"]:
+            raise ValueError(f"{path}: bit array does not match its header")
+        bloom.bits = bits
+        bloom.count = header["count"]
+        return bloom
+
+# ---------------------------------------------------------------------------
+# Frontier
+# ---------------------------------------------------------------------------
+
+CrawlItem = namedtuple("CrawlItem", "url depth priority")
+
+
+class Frontier:
+    """
+    Priority frontier with per-host back queues.
+
+    Lower priority values are crawled first (default: depth). A host is
+    eligible when it has fewer than `per_host_concurrency` fetches in flight
+    and its crawl-delay has elapsed since the last dispatch. Every URL is
+    canonicalized and recorded in the visited filter when it is pushed, so
+    the frontier never holds duplicates. `accept(url)`, when given, can veto
+    URLs (e.g. robots.txt rules) before they are recorded as visited.
+    """
+
+    def __init__(self, per_host_concurrency=2, crawl_delay=0.0, visited=None,
+                 max_depth=None, allowed_hosts=None, accept=None):
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.default_delay = crawl_delay
+        self.visited = visited if visited is not None else BloomFilter()
+        self.max_depth = max_depth
+        self.allowed_hosts = set(allowed_hosts) if allowed_hosts else None
+        self.accept = accept
+        self.rejected = 0
+        self._queues = {}           # host -> heap of (priority, seq, url, depth)
+        self._ready = []            # heap of (not_before, priority, seq, host)
+        self._scheduled = set()     # hosts currently present in _ready
+        self._inflight = Counter()
+        self._next_time = {}
+        self._delays = {}
+        self._active = {}           # url -> CrawlItem dispatched but not yet done
+        self._seq = 0
+        self.pending = 0
+        self.dispatched = 0
+
+    # ── politeness ──
+
+    def set_crawl_delay(self, host, seconds):
+        self._delays[host] = max(0.0, float(seconds))
+
+    def _delay(self, host):
+        return self._delays.get(host, self.default_delay)
+
+    def _schedule(self, host):
+        queue = self._queues.get(host)
+        if not queue or host in self._scheduled:
+            return
+        if self._inflight[host] >= self.per_host_concurrency:
+            return
+        self._seq += 1
+        heapq.heappush(self._ready, (self._next_time.get(host, 0.0), queue[0][0], self._seq, host))
+        self._scheduled.add(host)
+
+    # ── queue operations ──
+
+    def push(self, url, depth=0, priority=None, base=None):
+        """Canonicalize and enqueue url; returns the canonical URL or None if skipped."""
+        url = canonicalize_url(url, base)
+        if not url:
+            return None
+        if self.max_depth is not None and depth > self.max_depth:
+            return None
+        host = host_of(url)
+        if self.allowed_hosts is not None and host not in self.allowed_hosts:
+            return None
+        if self.accept is not None and url not in self.visited and not self.accept(url):
+            self.rejected += 1
+            return None
+        if not self.visited.add(url):
+            return None
+        self._enqueue(url, depth, depth if priority is None else priority)
+        return url
+
+    def _enqueue(self, url, depth, prio):
+        host = host_of(url)
+        self._seq += 1
+        heapq.heappush(self._queues.setdefault(host, []), (prio, self._seq, url, depth))
+        self.pending += 1
+        self._schedule(host)
+
+    def pop(self, now=None):
+        """Return the next eligible CrawlItem, or None if nothing is ready yet."""
+        now = time.monotonic() if now is None else now
+        while self._ready and self._ready[0][0] <= now:
+            _, _, _, host = heapq.heappop(self._ready)
+            self._scheduled.discard(host)
+            queue = self._queues.get(host)
+            if not queue or self._inflight[host] >= self.per_host_concurrency:
+                continue
+            prio, _, url, depth = heapq.heappop(queue)
+            if not queue:
+                del self._queues[host]
+            self.pending -= 1
+            self.dispatched += 1
+            self._inflight[host] += 1
+            self._next_time[host] = now + self._delay(host)
+            self._schedule(host)
+            item = CrawlItem(url, depth, prio)
+            self._active[url] = item
+            return item
+        return None
+
+    def done(self, item):
+        """Mark a dispatched item finished, freeing its host slot."""
+        host = host_of(item.url)
+        self._active.pop(item.url, None)
+        self._inflight[host] -= 1
+        if self._inflight[host] <= 0:
+            del self._inflight[host]
+        self._schedule(host)
+
+    def next_ready_in(self, now=None):
+        """Seconds until some host becomes eligible (None if all are blocked on in-flight work)."""
+        if not self._ready:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._ready[0][0] - now)
+
+    @property
+    def in_flight(self):
+        return sum(self._inflight.values())
+
+    def __len__(self):
+        return self.pending
+
+    # ── persistence ──
+
+    def snapshot(self):
+        """
+        JSON-serializable queue state. In-flight items are included as pending
+        so a resumed crawl fetches them again. The visited filter is saved
+        separately (BloomFilter.save).
+        """
+        pending = [[url, depth, prio] for queue in self._queues.values() for prio, _, url, depth in queue]
+        pending.extend([item.url, item.depth, item.priority] for item in self._active.values())
+        return {"pending": pending, "dispatched": self.dispatched, "crawl_delays": dict(self._delays)}
+
+    def restore(self, snapshot):
+        """Re-queue a snapshot() without consulting the visited filter (its URLs are already in it)."""
+        self._delays.update(snapshot.get("crawl_delays", {}))
+        self.dispatched = snapshot.get("dispatched", 0)
+        for url, depth, prio in snapshot.get("pending", []):
+            self._enqueue(url, depth, prio)
+
+# ---------------------------------------------------------------------------
+# Async crawl loop
+# ---------------------------------------------------------------------------
+
+async def run_crawl(frontier, process, concurrency=16, max_pages=None, on_checkpoint=None,
+                    checkpoint_every=0):
+    """
+    Drive `process(item) -> iterable of (url, depth[, priority])` with up to
+    `concurrency` items in flight until the frontier drains.
+
+    `on_checkpoint()` runs every `checkpoint_every` completed items and once
+    when the crawl stops (including on cancellation), always between frontier
+    updates so it sees a consistent state.
+    """
+    cond = asyncio.Condition()
+    active = 0
+    completed = 0
+
+    async def worker():
+        nonlocal active, completed
+        while True:
+            async with cond:
+                while True:
+                    if max_pages and frontier.dispatched >= max_pages:
+                        return
+                    item = frontier.pop()
+                    if item:
+                        active += 1
+                        break
+                    if active == 0 and frontier.pending == 0:
+                        cond.notify_all()
+                        return
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=frontier.next_ready_in())
+                    except asyncio.TimeoutError:
+                        pass
+
+            children = None
+            cancelled = False
+            try:
+                children = await process(item)
+            except asyncio.CancelledError:
+                # Leave the item dispatched so the final checkpoint re-queues it.
+                cancelled = True
+                raise
+            finally:
+                if not cancelled:
+                    async with cond:
+                        frontier.done(item)
+                        for child in children or ():
+                            priority = child[2] if len(child) > 2 else None
+                            frontier.push(child[0], child[1], priority, base=item.url)
+                        active -= 1
+                        completed += 1
+                        if on_checkpoint and checkpoint_every and completed % checkpoint_every == 0:
+                            on_checkpoint()
+                        cond.notify_all()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        if on_checkpoint:
+            on_checkpoint()
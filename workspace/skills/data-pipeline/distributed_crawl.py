@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Distributed Crawl
+Multi-process crawling over a shared SQLite (WAL) frontier store.
+
+Any number of worker processes, on one machine or on several machines that
+share a filesystem, lease URLs from the store, fetch and extract them with
+the fallback engine's fetch layer, record completions and new links, and
+append records to their own output shard. Leases that are not completed in
+time (crashed or preempted worker) go back to the queue. `merge` summarizes
+all shards into one manifest.
+
+Usage:
+  python distributed_crawl.py run    --store crawl.db --urls "https://a.com" --depth 3 --workers 8
+  python distributed_crawl.py init   --store crawl.db --urls "https://a.com" --depth 3
+  python distributed_crawl.py worker --store crawl.db --output-dir out     # one per core / node
+  python distributed_crawl.py merge  --store crawl.db --output-dir out
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from crawl_frontier import canonicalize_url, host_of
+from url_discovery import RobotsCache, discover
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[distributed] {msg}", flush=True)
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url           TEXT PRIMARY KEY,
+    host          TEXT NOT NULL,
+    depth         INTEGER NOT NULL,
+    priority      REAL NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+    worker        TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_queue ON urls (status, priority);
+CREATE TABLE IF NOT EXISTS hosts (
+    host        TEXT PRIMARY KEY,
+    crawl_delay REAL NOT NULL DEFAULT 0,
+    next_time   REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS workers (
+    worker    TEXT PRIMARY KEY,
+    shard     TEXT NOT NULL,
+    started   REAL NOT NULL,
+    heartbeat REAL NOT NULL,
+    pages     INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# ---------------------------------------------------------------------------
+# Shared frontier store
+# ---------------------------------------------------------------------------
+
+class SharedFrontier:
+    """
+    SQLite-backed frontier safe to use from many processes. The urls table
+    doubles as the visited set; every state change is one short IMMEDIATE
+    transaction so writers queue on the database lock instead of failing.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _tx(self):
+        return _Transaction(self.db)
+
+    # ── configuration ──
+
+    def set_meta(self, **values):
+        with self._tx():
+            for key, value in values.items():
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def meta(self):
+        return {k: json.loads(v) for k, v in self.db.execute("SELECT key, value FROM meta")}
+
+    def set_crawl_delay(self, host, seconds):
+        with self._tx():
+            self.db.execute("INSERT INTO hosts (host, crawl_delay) VALUES (?, ?) "
+                            "ON CONFLICT(host) DO UPDATE SET crawl_delay = excluded.crawl_delay",
+                            (host, float(seconds)))
+
+    # ── queue operations ──
+
+    def add(self, entries):
+        """Insert (url, depth, priority) tuples of canonical URLs; already-known URLs are ignored."""
+        with self._tx():
+            return self._add(entries)
+
+    def _add(self, entries):
+        before = self.db.total_changes
+        self.db.executemany(
+            "INSERT OR IGNORE INTO urls (url, host, depth, priority) VALUES (?, ?, ?, ?)",
+            [(url, host_of(url), depth, depth if prio is None else prio) for url, depth, prio in entries])
+        self.db.executemany("INSERT OR IGNORE INTO hosts (host) VALUES (?)",
+                            {(host_of(url),) for url, _, _ in entries})
+        return self.db.total_changes - before
+
+    def lease(self, worker, limit, per_host=2):
+        """
+        Lease up to `limit` pending URLs to worker, lowest priority first,
+        honouring each host's crawl-delay across all workers. At most
+        `per_host` URLs of a host (one for hosts with a crawl-delay) are out
+        on lease at a time, counted over every worker's unexpired leases.
+        Expired leases are returned to the queue first.
+        """
+        now = time.time()
+        with self._tx():
+            self.db.execute("UPDATE urls SET status = 'pending', worker = NULL "
+                            "WHERE status = 'leased' AND lease_expires < ?", (now,))
+            per_host_count = dict(self.db.execute(
+                "SELECT host, COUNT(*) FROM urls WHERE status = 'leased' GROUP BY host").fetchall())
+            rows = self.db.execute(
+                "SELECT u.url, u.depth, u.priority, u.host, h.crawl_delay FROM urls u "
+                "JOIN hosts h ON h.host = u.host "
+                "WHERE u.status = 'pending' AND h.next_time <= ? AND u.host NOT IN ("
+                "  SELECT host FROM urls WHERE status = 'leased' GROUP BY host HAVING COUNT(*) >= ?) "
+                "ORDER BY u.priority LIMIT ?", (now, per_host, limit * 8)).fetchall()
+            picked, next_times = [], {}
+            for url, depth, priority, host, delay in rows:
+                if per_host_count.get(host, 0) >= (per_host if not delay else 1):
+                    continue
+                per_host_count[host] = per_host_count.get(host, 0) + 1
+                next_times[host] = now + delay
+                picked.append((url, depth, priority))
+                if len(picked) >= limit:
+                    break
+            self.db.executemany("UPDATE urls SET status = 'leased', worker = ?, lease_expires = ? WHERE url = ?",
+                                [(worker, now + self.lease_seconds, url) for url, _, _ in picked])
+            self.db.executemany("UPDATE hosts SET next_time = ? WHERE host = ? AND crawl_delay > 0",
+                                [(t, h) for h, t in next_times.items()])
+        return picked
+
+    def complete(self, worker, url, children=()):
+        """
+        Mark url done and enqueue its children. Returns False if the lease had
+        already expired and moved on, in which case the result should be dropped.
+        """
+        with self._tx():
+            cur = self.db.execute("UPDATE urls SET status = 'done', lease_expires = NULL "
+                                  "WHERE url = ? AND worker = ? AND status = 'leased'", (url, worker))
+            if cur.rowcount == 0:
+                return False
+            if children:
+                self._add(children)
+            self.db.execute("UPDATE workers SET pages = pages + 1, heartbeat = ? WHERE worker = ?",
+                            (time.time(), worker))
+        return True
+
+    def fail(self, worker, url):
+        """Return url to the queue, or mark it failed after MAX_ATTEMPTS. Returns True when final."""
+        with self._tx():
+            self.db.execute("UPDATE urls SET attempts = attempts + 1, worker = NULL, lease_expires = NULL, "
+                            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                            "WHERE url = ? AND worker = ? AND status = 'leased'", (MAX_ATTEMPTS, url, worker))
+            row = self.db.execute("SELECT status FROM urls WHERE url = ?", (url,)).fetchone()
+        return bool(row) and row[0] == "failed"
+
+    def register_worker(self, worker, shard):
+        now = time.time()
+        with self._tx():
+            self.db.execute("INSERT OR REPLACE INTO workers (worker, shard, started, heartbeat, pages) "
+                            "VALUES (?, ?, ?, ?, COALESCE((SELECT pages FROM workers WHERE worker = ?), 0))",
+                            (worker, shard, now, now, worker))
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+
+    def unfinished(self):
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def next_wait(self):
+        """Seconds until a pending URL's host or a lease becomes available again."""
+        now = time.time()
+        row = self.db.execute(
+            "SELECT MIN(h.next_time) FROM urls u JOIN hosts h ON h.host = u.host "
+            "WHERE u.status = 'pending'").fetchone()
+        lease = self.db.execute("SELECT MIN(lease_expires) FROM urls WHERE status = 'leased'").fetchone()
+        candidates = [t - now for t in (row[0], lease[0]) if t is not None]
+        return max(0.05, min(candidates)) if candidates else 0.5
+
+    def workers(self):
+        rows = self.db.execute("SELECT worker, shard, started, heartbeat, pages FROM workers ORDER BY started")
+        return [dict(zip(("worker", "shard", "started", "heartbeat", "pages"), r)) for r in rows]
+
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def init_store(store_path, urls, max_depth, focus="text", sitemaps=False, max_sitemap_urls=10000,
+               crawl_delay=0.0, obey_robots=True):
+    """Create (or extend) a store with seed URLs, robots.txt crawl-delays and optional sitemap seeds."""
+    store = SharedFrontier(store_path)
+    seeds = [u for u in (canonicalize_url(x) for x in urls if x.strip()) if u]
+    store.set_meta(max_depth=max_depth, focus=focus, allowed_hosts=sorted({host_of(u) for u in seeds}),
+                   obey_robots=obey_robots)
+    robots = RobotsCache() if obey_robots else None
+    entries = [(u, 0, None) for u in seeds if not robots or robots.allowed(u)]
+    for url in seeds:
+        host = host_of(url)
+        delay = max(crawl_delay, (robots.crawl_delay(url) or 0.0) if robots else 0.0)
+        store.set_crawl_delay(host, delay)
+        if sitemaps:
+            entries.extend((loc, 0, prio) for loc, prio in (
+                (canonicalize_url(l), p) for l, p in discover(url, robots, max_urls=max_sitemap_urls))
+                if loc and host_of(loc) == host and (not robots or robots.allowed(loc)))
+    added = store.add(entries)
+    log(f"Store {store_path}: {added} seed URLs added, {store.counts()}")
+    store.close()
+
+
+def run_worker(store_path, output_dir, worker_id=None, concurrency=16, per_host=2, max_chars=50000,
+               lease_seconds=LEASE_SECONDS, max_pages=None):
+    """Lease, fetch and complete URLs until the shared frontier is exhausted."""
+    # scrape.py owns the fetch/extract layer; imported here so `init`/`merge` stay lightweight.
+    from jsonl_sink import JsonlSink
+    from scrape import MAX_LINKS_PER_PAGE, SkippedResponse, fetch_and_extract, focus_content, sha256_hash
+
+    store = SharedFrontier(store_path, lease_seconds=lease_seconds)
+    meta = store.meta()
+    max_depth = meta.get("max_depth", 3)
+    focus = meta.get("focus", "text")
+    allowed_hosts = set(meta.get("allowed_hosts") or [])
+    robots = RobotsCache() if meta.get("obey_robots", True) else None
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    shard_dir = os.path.join(output_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    shard_path = os.path.join(shard_dir, f"part-{worker_id}.jsonl")
+    store.register_worker(worker_id, shard_path)
+    sink = JsonlSink(shard_path, resume=True)
+    log(f"Worker {worker_id} started → {shard_path}")
+
+    def children_of(url, depth, links):
+        if depth >= max_depth:
+            return []
+        out = []
+        for href in links[:MAX_LINKS_PER_PAGE]:
+            child = canonicalize_url(href, base=url)
+            if not child or (allowed_hosts and host_of(child) not in allowed_hosts):
+                continue
+            if robots and not robots.allowed(child):
+                continue
+            out.append((child, depth + 1, None))
+        return out
+
+    def handle(url, depth):
+        """Runs in the pool: fetch, extract and resolve links (robots lookups included)."""
+        _, _, text, links, _ = fetch_and_extract(url, max_chars)
+        return focus_content(focus, text, links), children_of(url, depth, links)
+
+    pages = 0
+    inflight = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            if not max_pages or pages + len(inflight) < max_pages:
+                want = concurrency - len(inflight)
+                if max_pages:
+                    want = min(want, max_pages - pages - len(inflight))
+                if want > 0:
+                    for url, depth, priority in store.lease(worker_id, want, per_host=per_host):
+                        inflight[pool.submit(handle, url, depth)] = (url, depth)
+            if not inflight:
+                if (max_pages and pages >= max_pages) or store.unfinished() == 0:
+                    break
+                time.sleep(min(store.next_wait(), 2.0))
+                continue
+
+            finished, _ = wait(inflight, timeout=1.0, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                url, depth = inflight.pop(fut)
+                try:
+                    text, children = fut.result()
+                except SkippedResponse as e:
+                    log(f"Skipped {url}: {e}")
+                    store.complete(worker_id, url)
+                    continue
+                except Exception as e:
+                    log(f"Error for {url}: {e}")
+                    if store.fail(worker_id, url):
+                        sink.append({"url": url, "depth": depth, "error": str(e)})
+                    continue
+                if not store.complete(worker_id, url, children):
+                    continue  # Lease expired and another worker took the URL over.
+                pages += 1
+                sink.append({
+                    "url": url,
+                    "depth": depth,
+                    "focus": focus,
+                    "content_hash": sha256_hash(text),
+                    "content_length": len(text),
+                    "text": text,
+                    "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "worker": worker_id,
+                })
+
+    sink.close()
+    store.close()
+    log(f"Worker {worker_id} finished: {pages} pages")
+    return shard_path
+
+
+def merge(store_path, output_dir, name="distributed"):
+    """Summarize every worker shard into a single manifest."""
+    store = SharedFrontier(store_path)
+    shards = []
+    total = 0
+    for worker in store.workers():
+        path = worker["shard"]
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as fh:
+            records = sum(1 for _ in fh)
+        total += records
+        shards.append({"path": os.path.relpath(path, output_dir), "worker": worker["worker"],
+                       "records": records, "pages_completed": worker["pages"]})
+    manifest = {
+        "store": os.path.abspath(store_path),
+        "params": store.meta(),
+        "shards": shards,
+        "total_records": total,
+        "url_status": store.counts(),
+        "merged_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    store.close()
+    manifest_path = os.path.join(output_dir, f"{name}_manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    log(f"Manifest: {total} records in {len(shards)} shards → {manifest_path}")
+    return manifest_path
+
+
+def run_local(store_path, urls, max_depth, output_dir, workers=4, focus="text", concurrency=16, per_host=2,
+              max_chars=50000, sitemaps=False, max_sitemap_urls=10000, crawl_delay=0.0, obey_robots=True,
+              name="distributed"):
+    """init + N local worker processes + merge."""
+    os.makedirs(output_dir, exist_ok=True)
+    init_store(store_path, urls, max_depth, focus, sitemaps, max_sitemap_urls, crawl_delay, obey_robots)
+    script = os.path.abspath(__file__)
+    procs = []
+    for i in range(workers):
+        cmd = [sys.executable, script, "worker", "--store", store_path, "--output-dir", output_dir,
+               "--worker-id", f"{name}-w{i}", "--concurrency", str(concurrency), "--per-host", str(per_host),
+               "--max-text-chars", str(max_chars)]
+        procs.append(subprocess.Popen(cmd))
+    failed = [p.args for p in procs if p.wait() != 0]
+    if failed:
+        log(f"WARNING: {len(failed)} worker(s) exited with errors; their leases were requeued for the others")
+    return merge(store_path, output_dir, name)
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Distributed Crawl")
+    parser.add_argument("command", choices=["init", "worker", "merge", "run"])
+    parser.add_argument("--store", required=True, help="Shared SQLite frontier file")
+    parser.add_argument("--urls", default="", help="Comma-separated seed URLs (init/run)")
+    parser.add_argument("--depth", type=int, default=3, help="Max crawl depth (init/run)")
+    parser.add_argument("--focus", default="text", choices=["text", "audio", "sensor", "multimodal"],
+                        help="What to collect: main text, or audio/sensor file links (as scrape.py)")
+    parser.add_argument("--sitemaps", action="store_true", help="Seed from sitemaps (init/run)")
+    parser.add_argument("--max-sitemap-urls", type=int, default=10000)
+    parser.add_argument("--crawl-delay", type=float, default=0.0, help="Minimum seconds between requests per host")
+    parser.add_argument("--ignore-robots", action="store_true")
+    parser.add_argument("--output-dir", default="./output", help="Directory for shards and manifest")
+    parser.add_argument("--name", default="distributed", help="Manifest name")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Local worker processes (run)")
+    parser.add_argument("--worker-id", default="", help="Stable worker id (worker); default host-pid")
+    parser.add_argument("--concurrency", type=int, default=16, help="Fetches in flight per worker")
+    parser.add_argument("--per-host", type=int, default=2, help="Max URLs per host per lease batch")
+    parser.add_argument("--max-text-chars", type=int, default=50000)
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+    parser.add_argument("--max-pages", type=int, default=0, help="Stop this worker after N pages (0 = no cap)")
+    args = parser.parse_args()
+
+    if args.command in ("init", "run"):
+        urls = [u for u in args.urls.split(",") if u.strip()]
+        if not urls and not os.path.exists(args.store):
+            log("ERROR: --urls is required to create a new store.")
+            sys.exit(1)
+    if args.command == "init":
+        init_store(args.store, urls, args.depth, args.focus, args.sitemaps, args.max_sitemap_urls,
+                   args.crawl_delay, not args.ignore_robots)
+    elif args.command == "worker":
+        run_worker(args.store, args.output_dir, args.worker_id or None, args.concurrency, args.per_host,
+                   args.max_text_chars, args.lease_seconds, args.max_pages or None)
+    elif args.command == "merge":
+        merge(args.store, args.output_dir, args.name)
+    else:
+        run_local(args.store, urls, args.depth, args.output_dir, args.workers, args.focus, args.concurrency,
+                  args.per_host, args.max_text_chars, args.sitemaps, args.max_sitemap_urls, args.crawl_delay,
+                  not args.ignore_robots, args.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Download Manager
+Bulk, resumable downloads of the dataset files and media links that the
+scrape (audio/sensor focus) and api_aggregate (kaggle/youtube) stages find.
+
+  - files are fetched concurrently, with a per-host cap
+  - bodies stream to `<file>.part`; an interrupted transfer resumes with a
+    Range request (guarded by If-Range, so a changed file restarts cleanly)
+  - sha256 is recorded for every file and checked against a known sha256,
+    md5 or size when the source provides one (or the server sends Content-MD5)
+  - zip/tar/gz archives are unpacked member by member, never read whole
+  - every file's outcome lands in a manifest; re-running skips what is done
+
+Usage:
+  python download_manager.py --input output/scraped_audio.jsonl --dest output/files --unpack
+  manager = DownloadManager("output/files"); manager.run([{"url": ..., "sha256": ...}])
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+from http_fetch import USER_AGENT
+
+CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 4
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[download] {msg}", flush=True)
+
+
+class DownloadError(Exception):
+    """A file could not be downloaded or failed verification."""
+
+
+class _StripAuthOnRedirect(urllib.request.HTTPRedirectHandler):
+    """Drop credentials when a redirect leaves the original host (e.g. Kaggle -> signed storage URL)."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new is not None and urlsplit(newurl).netloc != urlsplit(req.full_url).netloc:
+            new.remove_header("Authorization")
+        return new
+
+
+_opener = urllib.request.build_opener(_StripAuthOnRedirect)
+
+
+def _safe_name(name):
+    name = re.sub(r"[^\w.\-]+", "_", unquote(name)).strip("._")
+    return name[:180] or "download"
+
+
+def _safe_join(root, member):
+    """Archive member path under root, or None for absolute/escaping paths."""
+    if os.path.isabs(member):
+        return None
+    base = os.path.abspath(root)
+    target = os.path.normpath(os.path.join(base, member))
+    if target == base or os.path.commonpath([base, target]) != base:
+        return None
+    return os.path.normpath(os.path.join(root, member))
+
+
+def _hash_file(path, algo="sha256"):
+    h = hashlib.new(algo)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h
+
+# ---------------------------------------------------------------------------
+# Archives
+# ---------------------------------------------------------------------------
+
+def is_archive(path):
+    lower = path.lower()
+    return lower.endswith(TAR_SUFFIXES) or lower.endswith((".zip", ".gz"))
+
+
+def unpack_dir(path):
+    """data.tar.gz -> data/, audio.zip -> audio/"""
+    lower = path.lower()
+    for suffix in TAR_SUFFIXES + (".zip", ".gz"):
+        if lower.endswith(suffix):
+            return path[:-len(suffix)]
+    return path + "_unpacked"
+
+
+def unpack(path, dest):
+    """Extract an archive member by member into dest; returns the extracted paths."""
+    lower = path.lower()
+    os.makedirs(dest, exist_ok=True)
+    extracted = []
+    if lower.endswith(TAR_SUFFIXES):
+        # "r|*" reads the archive as a forward-only stream.
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                target = _safe_join(dest, member.name)
+                if not member.isfile() or target is None:
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with tar.extractfile(member) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+                extracted.append(target)
+    elif lower.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                target = _safe_join(dest, info.filename)
+                if info.is_dir() or target is None:
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+                extracted.append(target)
+    elif lower.endswith(".gz"):
+        target = os.path.join(dest, os.path.basename(path)[:-3])
+        with gzip.open(path, "rb") as src, open(target, "wb") as out:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        extracted.append(target)
+    return extracted
+
+# ---------------------------------------------------------------------------
+# Manager
+# ---------------------------------------------------------------------------
+
+class DownloadManager:
+    """
+    Downloads items ({"url", optional "filename", "sha256", "md5", "size",
+    "headers", "source"}) into dest_dir. The manifest maps each URL to its
+    outcome and is rewritten atomically after every file.
+    """
+
+    def __init__(self, dest_dir, concurrency=8, per_host=4, unpack_archives=False, timeout=60,
+                 retries=MAX_RETRIES, manifest_path=None):
+        self.dest_dir = dest_dir
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.unpack_archives = unpack_archives
+        self.timeout = timeout
+        self.retries = retries
+        self.manifest_path = manifest_path or os.path.join(dest_dir, "downloads_manifest.json")
+        os.makedirs(dest_dir, exist_ok=True)
+        self.entries = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as fh:
+                self.entries = {e["url"]: e for e in json.load(fh).get("files", [])}
+        self._lock = threading.Lock()
+        self._host_slots = {}
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _assign_names(self, items):
+        taken = {e["path"] for e in self.entries.values() if e.get("path")}
+        for item in items:
+            previous = self.entries.get(item["url"], {}).get("path")
+            if previous:
+                item["path"] = previous
+                continue
+            name = _safe_name(item.get("filename") or os.path.basename(urlsplit(item["url"]).path))
+            if name in taken:
+                name = f"{hashlib.sha1(item['url'].encode('utf-8')).hexdigest()[:8]}-{name}"
+            taken.add(name)
+            item["path"] = name
+
+    def _save_manifest(self):
+        files = sorted(self.entries.values(), key=lambda e: e["url"])
+        summary = {
+            "files": files,
+            "ok": sum(e["status"] == "ok" for e in files),
+            "failed": sum(e["status"] != "ok" for e in files),
+            "bytes": sum(e.get("bytes", 0) for e in files if e["status"] == "ok"),
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+        os.replace(tmp, self.manifest_path)
+        return summary
+
+    def _done(self, item):
+        entry = self.entries.get(item["url"])
+        if not entry or entry["status"] != "ok":
+            return False
+        path = os.path.join(self.dest_dir, entry["path"])
+        return os.path.exists(path) and os.path.getsize(path) == entry["bytes"]
+
+    def run(self, items):
+        """Download all items; returns the manifest summary."""
+        unique = {}
+        for item in items:
+            unique.setdefault(item["url"], dict(item))
+        items = list(unique.values())
+        self._assign_names(items)
+        todo = [item for item in items if not self._done(item)]
+        log(f"{len(items)} files, {len(items) - len(todo)} already complete, {len(todo)} to fetch")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for entry in pool.map(self._process, todo):
+                with self._lock:
+                    self.entries[entry["url"]] = entry
+                    self._save_manifest()
+        summary = self._save_manifest()
+        log(f"{summary['ok']} ok, {summary['failed']} failed, {summary['bytes']} bytes → {self.manifest_path}")
+        return summary
+
+    def _process(self, item):
+        entry = {"url": item["url"], "path": item["path"], "source": item.get("source")}
+        path = os.path.join(self.dest_dir, item["path"])
+        try:
+            with self._slot(item["url"]):
+                entry.update(self._download(item, path))
+            if self.unpack_archives and is_archive(path):
+                entry["unpacked"] = [os.path.relpath(p, self.dest_dir) for p in unpack(path, unpack_dir(path))]
+            entry["status"] = "ok"
+            log(f"OK {item['url']} ({entry['bytes']} bytes)")
+        except (DownloadError, OSError, tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            log(f"FAILED {item['url']}: {e}")
+        return entry
+
+    def _download(self, item, path):
+        part = f"{path}.part"
+        meta_path = f"{part}.json"
+        attempts = 0
+        resumed_from = None
+        while True:
+            attempts += 1
+            try:
+                offset = self._fetch_into(item, part, meta_path)
+                if offset and resumed_from is None:
+                    resumed_from = offset
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUS or attempts > self.retries:
+                    raise DownloadError(f"HTTP {e.code}") from e
+            except (OSError, DownloadError) as e:
+                if attempts > self.retries:
+                    raise DownloadError(f"gave up after {attempts} attempts: {e}") from e
+            time.sleep(min(30, 2 ** attempts))
+
+        result = {"bytes": os.path.getsize(part), "sha256": _hash_file(part).hexdigest(), "attempts": attempts}
+        if resumed_from:
+            result["resumed_from"] = resumed_from
+        try:
+            self._verify(item, part, result, self._read_meta(meta_path))
+        except DownloadError:
+            # The bad bytes would just be resumed on the next run, so start over.
+            os.remove(part)
+            os.remove(meta_path)
+            raise
+        os.replace(part, path)
+        os.remove(meta_path)
+        return result
+
+    @staticmethod
+    def _read_meta(meta_path):
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        return {}
+
+    def _fetch_into(self, item, part, meta_path):
+        """One transfer attempt; returns the byte offset it resumed from (0 for a fresh start)."""
+        meta = self._read_meta(meta_path)
+        offset = os.path.getsize(part) if os.path.exists(part) and meta else 0
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity", **item.get("headers", {})}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            validator = meta.get("etag") or meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+        req = urllib.request.Request(item["url"], headers=headers)
+        try:
+            resp = _opener.open(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and offset and offset == meta.get("total"):
+                return offset  # Everything was already on disk.
+            if e.code == 416:
+                # Stale partial file (e.g. the remote file shrank): start over.
+                for stale in (part, meta_path):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+                raise DownloadError("range not satisfiable; restarting") from e
+            raise
+
+        with resp:
+            if resp.status == 206:
+                match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", resp.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    raise DownloadError("server returned an unexpected Content-Range")
+                total = int(match.group(2)) if match.group(2) != "*" else None
+            else:
+                # Full body: range unsupported or the file changed since the partial download.
+                offset = 0
+                length = resp.headers.get("Content-Length", "")
+                total = int(length) if length.isdigit() else None
+            meta = {
+                "etag": resp.headers.get("ETag") if not (resp.headers.get("ETag") or "").startswith("W/") else None,
+                "last_modified": resp.headers.get("Last-Modified"),
+                # A 206's Content-MD5 covers only the requested range; the whole-file
+                # digest is the one seen on the original 200 (If-Range keeps it valid).
+                "content_md5": resp.headers.get("Content-MD5") if resp.status != 206 else meta.get("content_md5"),
+                "total": total,
+            }
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+            with open(part, "ab" if offset else "wb") as out:
+                shutil.copyfileobj(resp, out, CHUNK_SIZE)
+        if total is not None and os.path.getsize(part) != total:
+            raise DownloadError(f"incomplete transfer ({os.path.getsize(part)} of {total} bytes)")
+        return offset
+
+    def _verify(self, item, part, result, meta):
+        checks = []
+        if item.get("size") is not None and int(item["size"]) != result["bytes"]:
+            checks.append(f"size {result['bytes']} != expected {item['size']}")
+        if item.get("sha256") and item["sha256"].lower() != result["sha256"]:
+            checks.append("sha256 mismatch")
+        md5 = item.get("md5") or meta.get("content_md5")
+        if md5:
+            digest = _hash_file(part, "md5").digest()
+            if md5.lower() not in (digest.hex(), base64.b64encode(digest).decode("ascii").lower()):
+                checks.append("md5 mismatch")
+            result["md5"] = digest.hex()
+        result["verified"] = bool(item.get("sha256") or md5 or item.get("size") is not None)
+        if checks:
+            raise DownloadError("; ".join(checks))
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def items_from_records(records):
+    """
+    Turn pipeline records into download items: records carrying a
+    `download_url` (api_aggregate), scrape audio/sensor records whose text is
+    a JSON list of hrefs, or bare {"url": ...} records.
+    """
+    for record in records:
+        if record.get("error"):
+            continue
+        if record.get("download_url"):
+            item = {"url": record["download_url"], "source": record.get("url")}
+            for key in ("filename", "sha256", "md5", "size"):
+                if record.get(key) is not None:
+                    item[key] = record[key]
+            yield item
+        elif record.get("focus") in ("audio", "sensor"):
+            try:
+                hrefs = json.loads(record.get("text") or "[]")
+            except ValueError:
+                continue
+            for href in hrefs if isinstance(hrefs, list) else []:
+                url = urljoin(record["url"], href)
+                if url.startswith(("http://", "https://")):
+                    yield {"url": url, "source": record["url"]}
+        elif record.get("url") and "text" not in record:
+            yield {"url": record["url"]}
+
+
+def read_items(path):
+    """Items from a JSONL file of records or a plain list of URLs (one per line)."""
+    with open(path, "r", encoding="utf-8") as fh:
+        lines = [line.strip() for line in fh if line.strip()]
+    if lines and lines[0].startswith("{"):
+        return list(items_from_records(json.loads(line) for line in lines))
+    return [{"url": line} for line in lines if not line.startswith("#")]
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Download Manager")
+    parser.add_argument("--input", required=True, nargs="+", help="JSONL record files or plain URL lists")
+    parser.add_argument("--dest", default="./output/files", help="Directory for downloaded files")
+    parser.add_argument("--concurrency", type=int, default=8, help="Files downloaded in parallel")
+    parser.add_argument("--per-host", type=int, default=4, help="Max concurrent downloads per host")
+    parser.add_argument("--unpack", action="store_true", help="Extract zip/tar/gz archives after download")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Resume attempts per file")
+    args = parser.parse_args()
+
+    items = [item for path in args.input for item in read_items(path)]
+    if not items:
+        log("ERROR: No downloadable URLs found in the input.")
+        sys.exit(1)
+    manager = DownloadManager(args.dest, concurrency=args.concurrency, per_host=args.per_host,
+                              unpack_archives=args.unpack, retries=args.retries)
+    summary = manager.run(items)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
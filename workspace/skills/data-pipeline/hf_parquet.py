@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Hugging Face Parquet Streaming
+Reads the Parquet shards the Hub publishes for a dataset (refs/convert/parquet)
+directly over HTTP instead of downloading whole datasets or paging row APIs.
+
+  - shard list from the datasets-server /parquet endpoint (or given URLs)
+  - HttpRangeFile: a seekable file over HTTP Range requests, so pyarrow
+    fetches only the footer and the column chunks it actually needs
+  - column projection (--columns) and row-group skipping from min/max
+    statistics for simple predicates (--where "score >= 3.5")
+  - matching rows become pipeline records around the text column
+
+Requires: pip install pyarrow. Set HF_TOKEN for gated datasets.
+
+Usage:
+  python hf_parquet.py --dataset HuggingFaceFW/fineweb-edu --config sample-10BT \\
+    --columns text,url,score --where "score >= 3.5" --max-records 20000
+  python hf_parquet.py --shard-url http://127.0.0.1:8000/train-00000.parquet --text-column text
+"""
+
+import argparse
+import http.client
+import io
+import json
+import operator
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from urllib.parse import quote_plus, urljoin, urlsplit
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+DATASETS_SERVER_URL = "https://datasets-server.huggingface.co"
+USER_AGENT = "Text2LLM-DatasetCreator/1.0"
+BLOCK_SIZE = 256 * 1024
+CACHED_BLOCKS = 16
+TEXT_COLUMNS = ["text", "content", "sentence", "question", "input", "instruction"]
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[hf_parquet] {msg}", flush=True)
+
+
+def _auth_headers():
+    token = os.environ.get("HF_TOKEN", "")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+class RangeStats:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {"range_requests": self.requests, "bytes_fetched": self.bytes}
+
+# ---------------------------------------------------------------------------
+# HTTP range file
+# ---------------------------------------------------------------------------
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a remote file. Small reads go through a
+    block-aligned LRU cache (footers, page headers); large reads (column
+    chunks) are fetched as one exact range. Redirects (Hub -> CDN) are
+    resolved once; credentials are not forwarded to another host.
+    """
+
+    def __init__(self, url, headers=None, block_size=BLOCK_SIZE, stats=None, timeout=60):
+        super().__init__()
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.block_size = block_size
+        self.stats = stats or RangeStats()
+        self.timeout = timeout
+        self._conn = None
+        self._blocks = OrderedDict()
+        self._pos = 0
+        self.url = url
+        self.size = self._probe_size()
+
+    def _connect(self, parts):
+        if self._conn is None or self._conn_key != (parts.scheme, parts.netloc):
+            if self._conn is not None:
+                self._conn.close()
+            cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(parts.netloc, timeout=self.timeout)
+            self._conn_key = (parts.scheme, parts.netloc)
+        return self._conn
+
+    def _request(self, method, extra_headers):
+        """Send one request, following redirects; returns (response, body)."""
+        headers = dict(self.headers, **extra_headers)
+        for _ in range(6):
+            parts = urlsplit(self.url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            for attempt in (1, 2):
+                conn = self._connect(parts)
+                try:
+                    conn.request(method, path, headers=headers)
+                    resp = conn.getresponse()
+                    body = resp.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    conn.close()
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+            if resp.will_close:
+                conn.close()
+                self._conn = None
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                new_url = urljoin(self.url, resp.getheader("Location"))
+                if urlsplit(new_url).netloc != parts.netloc:
+                    headers.pop("Authorization", None)
+                    self.headers.pop("Authorization", None)
+                self.url = new_url
+                continue
+            return resp, body
+        raise OSError(f"too many redirects for {self.url}")
+
+    def _probe_size(self):
+        """
+        Total size from the first range response's Content-Range (a 416 for an
+        empty file carries `bytes */0`), else from a HEAD request's Content-Length.
+        """
+        resp, body = self._request("GET", {"Range": "bytes=0-0"})
+        if resp.status in (206, 416):
+            if resp.status == 206:
+                self.stats.requests += 1
+                self.stats.bytes += len(body)
+            match = re.match(r"bytes (?:\d+-\d+|\*)/(\d+)", resp.getheader("Content-Range", ""))
+            if match:
+                return int(match.group(1))
+        elif resp.status == 200 and not body:
+            return 0
+        else:
+            raise OSError(f"HTTP {resp.status} for range request on {self.url}"
+                          + (" (server ignores Range)" if resp.status == 200 else ""))
+        resp, _ = self._request("HEAD", {})
+        length = resp.getheader("Content-Length", "")
+        if resp.status == 200 and length.isdigit():
+            return int(length)
+        raise OSError(f"cannot determine the size of {self.url}: no Content-Range or Content-Length")
+
+    def _get_range(self, start, end):
+        """GET bytes start..end (inclusive)."""
+        resp, body = self._request("GET", {"Range": f"bytes={start}-{end}"})
+        if resp.status != 206:
+            raise OSError(f"HTTP {resp.status} for range request on {self.url}"
+                          + (" (server ignores Range)" if resp.status == 200 else ""))
+        self.stats.requests += 1
+        self.stats.bytes += len(body)
+        return body
+
+    def _block(self, index):
+        if index in self._blocks:
+            self._blocks.move_to_end(index)
+            return self._blocks[index]
+        start = index * self.block_size
+        data = self._get_range(start, min(self.size, start + self.block_size) - 1)
+        self._blocks[index] = data
+        if len(self._blocks) > CACHED_BLOCKS:
+            self._blocks.popitem(last=False)
+        return data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self._pos
+        size = max(0, min(size, self.size - self._pos))
+        if size == 0:
+            return b""
+        start = self._pos
+        if size >= self.block_size:
+            data = self._get_range(start, start + size - 1)
+        else:
+            chunks = []
+            for index in range(start // self.block_size, (start + size - 1) // self.block_size + 1):
+                block = self._block(index)
+                lo = max(start, index * self.block_size) - index * self.block_size
+                hi = min(start + size, (index + 1) * self.block_size) - index * self.block_size
+                chunks.append(block[lo:hi])
+            data = b"".join(chunks)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        super().close()
+
+# ---------------------------------------------------------------------------
+# Shard discovery
+# ---------------------------------------------------------------------------
+
+def list_parquet_shards(dataset, config=None, split="train", timeout=30):
+    """(config, [(url, size)]) for a dataset's auto-converted Parquet files, first config unless one is given."""
+    import urllib.request
+    url = f"{DATASETS_SERVER_URL}/parquet?dataset={quote_plus(dataset)}"
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, **_auth_headers()})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        files = json.loads(resp.read().decode("utf-8")).get("parquet_files", [])
+    if config is None and files:
+        configs = [f["config"] for f in files]
+        config = "default" if "default" in configs else configs[0]
+    return config, [(f["url"], f.get("size")) for f in files
+                    if f.get("config") == config and (not split or f.get("split") == split)]
+
+# ---------------------------------------------------------------------------
+# Predicates
+# ---------------------------------------------------------------------------
+
+_PREDICATE = re.compile(r"^\s*([\w.]+)\s*(==|!=|>=|<=|>|<|=)\s*(.+?)\s*$")
+OPS = {"==": operator.eq, "=": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge,
+       "<": operator.lt, "<=": operator.le}
+
+
+def parse_predicate(text):
+    """'score >= 3.5' -> ("score", ">=", 3.5); values are JSON literals or bare strings."""
+    match = _PREDICATE.match(text)
+    if not match:
+        raise ValueError(f"cannot parse predicate {text!r} (expected: column op value)")
+    column, op, raw = match.groups()
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw.strip("'")
+    return column, op, value
+
+
+def row_group_may_match(row_group, column_index, predicates):
+    """False only when min/max statistics prove no row of the group satisfies every predicate."""
+    for column, op, value in predicates:
+        index = column_index.get(column)
+        stats = row_group.column(index).statistics if index is not None else None
+        if stats is None or not stats.has_min_max:
+            continue
+        lo, hi = stats.min, stats.max
+        try:
+            possible = {
+                "==": lo <= value <= hi, "=": lo <= value <= hi,
+                "!=": not (lo == hi == value),
+                ">": hi > value, ">=": hi >= value,
+                "<": lo < value, "<=": lo <= value,
+            }[op]
+        except TypeError:
+            continue
+        if not possible:
+            return False
+    return True
+
+
+def predicate_expression(predicates):
+    expr = None
+    for column, op, value in predicates:
+        term = OPS[op](pc.field(column), value)
+        expr = term if expr is None else expr & term
+    return expr
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+def pick_text_column(schema, requested=None):
+    if requested:
+        return requested
+    strings = [f.name for f in schema if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)]
+    for name in TEXT_COLUMNS:
+        if name in strings:
+            return name
+    return strings[0] if strings else None
+
+
+def _is_media(data_type):
+    """Binary payloads (images, audio bytes) and containers holding them."""
+    if pa.types.is_binary(data_type) or pa.types.is_large_binary(data_type):
+        return True
+    if pa.types.is_struct(data_type):
+        return any(_is_media(data_type.field(i).type) for i in range(data_type.num_fields))
+    if pa.types.is_list(data_type) or pa.types.is_large_list(data_type):
+        return _is_media(data_type.value_type)
+    return False
+
+
+def iter_shard_rows(url, columns=None, predicates=(), text_column=None, stats=None, headers=None):
+    """
+    Yield (row dict, text column, row group index) from one Parquet shard,
+    reading only the projected + predicate columns of row groups that may match.
+    Without a projection every column except binary/media payloads is read.
+    """
+    source = HttpRangeFile(url, headers=headers, stats=stats) if url.startswith(("http://", "https://")) else url
+    try:
+        pf = pq.ParquetFile(source)
+        schema = pf.schema_arrow
+        text_column = pick_text_column(schema, text_column)
+        default = [f.name for f in schema if not _is_media(f.type)]
+        wanted = list(dict.fromkeys((columns or default) + ([text_column] if text_column else [])))
+        missing = [c for c in wanted + [p[0] for p in predicates] if c not in schema.names]
+        if missing:
+            raise ValueError(f"unknown column(s) {', '.join(missing)}; shard has {', '.join(schema.names)}")
+        needed = list(dict.fromkeys(wanted + [p[0] for p in predicates]))
+        column_index = {pf.metadata.schema.column(i).path: i for i in range(pf.metadata.num_columns)}
+        expr = predicate_expression(predicates) if predicates else None
+        for rg in range(pf.num_row_groups):
+            if predicates and not row_group_may_match(pf.metadata.row_group(rg), column_index, predicates):
+                if stats is not None:
+                    stats.skipped_row_groups += 1
+                continue
+            table = pf.read_row_group(rg, columns=needed)
+            if stats is not None:
+                stats.read_row_groups += 1
+            if expr is not None:
+                table = table.filter(expr)
+            for row in table.select(wanted).to_pylist():
+                yield row, text_column, rg
+    finally:
+        if isinstance(source, HttpRangeFile):
+            source.close()
+
+
+class ReadStats(RangeStats):
+    def __init__(self):
+        super().__init__()
+        self.read_row_groups = 0
+        self.skipped_row_groups = 0
+        self.rows = 0
+
+    def as_dict(self):
+        return {**super().as_dict(), "row_groups_read": self.read_row_groups,
+                "row_groups_skipped": self.skipped_row_groups, "rows": self.rows}
+
+
+def iter_records(dataset, config=None, split="train", columns=None, where=(), text_column=None,
+                 max_records=None, shard_urls=None, stats=None, min_chars=20):
+    """Pipeline records for the matching rows of a dataset's Parquet shards."""
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet streaming (pip install pyarrow)")
+    predicates = [parse_predicate(w) if isinstance(w, str) else w for w in where]
+    if shard_urls:
+        shards = [(u, None) for u in shard_urls]
+    else:
+        config, shards = list_parquet_shards(dataset, config, split)
+    if not shards:
+        raise ValueError(f"no Parquet shards for {dataset} (config={config}, split={split})")
+    stats = stats if stats is not None else ReadStats()
+    ds_url = f"https://huggingface.co/datasets/{dataset}" if dataset else None
+    count = 0
+    for url, _ in shards:
+        for row, text_col, rg in iter_shard_rows(url, columns, predicates, text_column, stats, _auth_headers()):
+            text = row.get(text_col) if text_col else None
+            if not isinstance(text, str) or len(text) < min_chars:
+                continue
+            yield {
+                "text": text,
+                "source": "huggingface",
+                "url": ds_url or url,
+                "title": dataset or os.path.basename(urlsplit(url).path),
+                "metadata": {"type": "dataset_row", "config": config, "split": split,
+                             "shard": os.path.basename(urlsplit(url).path), "row_group": rg,
+                             "row_data": {k: v for k, v in row.items() if k != text_col}},
+            }
+            count += 1
+            stats.rows = count
+            if max_records and count >= max_records:
+                return
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Hugging Face Parquet Streaming")
+    parser.add_argument("--dataset", default="", help="Hub dataset id, e.g. HuggingFaceFW/fineweb-edu")
+    parser.add_argument("--config", default=None, help="Dataset config (default: 'default' or the first one)")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--shard-url", action="append", default=[], help="Read these Parquet URLs/paths instead")
+    parser.add_argument("--columns", default="", help="Comma-separated columns to keep (default: all)")
+    parser.add_argument("--text-column", default=None, help="Column holding the text (default: auto-detect)")
+    parser.add_argument("--where", action="append", default=[], help='Row filter, e.g. "score >= 3.5" (repeatable)')
+    parser.add_argument("--max-records", type=int, default=10000, help="Stop after this many records (0 = all)")
+    parser.add_argument("--output-dir", default="./output", help="Directory to write results")
+    parser.add_argument("--name", default="", help="Output name (default: dataset id)")
+    args = parser.parse_args()
+
+    if not args.dataset and not args.shard_url:
+        log("ERROR: --dataset or --shard-url is required.")
+        sys.exit(1)
+    if pq is None:
+        log("ERROR: pyarrow not installed (pip install pyarrow).")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = args.name or re.sub(r"[^\w.-]+", "_", args.dataset or "shards")
+    output_path = os.path.join(args.output_dir, f"hf_{name}.jsonl")
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] or None
+    stats = ReadStats()
+    started = time.monotonic()
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as fh:
+        for record in iter_records(args.dataset, args.config, args.split, columns, args.where, args.text_column,
+                                   args.max_records or None, args.shard_url or None, stats):
+            fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            count += 1
+
+    manifest = {
+        "dataset": args.dataset, "config": args.config, "split": args.split,
+        "columns": columns, "where": args.where, "records": count,
+        "stats": stats.as_dict(), "elapsed_s": round(time.monotonic() - started, 2),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(os.path.join(args.output_dir, f"hf_{name}_manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    log(f"Wrote {count} records to {output_path} ({stats.bytes} bytes over {stats.requests} range requests, "
+        f"{stats.skipped_row_groups} row groups skipped)")
+
+
+if __name__ == "__main__":
+    main()
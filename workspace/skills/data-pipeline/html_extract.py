@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – HTML Text Extraction
+Boilerplate-aware main-text extraction for the HTTP scrape engines.
+
+The extractor works while it parses: <script>/<style>/<nav>/<footer> and
+similar subtrees (plus elements whose class/id look like menus, cookie
+banners, share bars ...) are skipped as soon as they open, every remaining
+block is scored by text length and link density, and parsing stops once the
+character budget of kept text is reached. Anchors seen along the way are
+returned for crawling.
+
+selectolax is used when installed (pip install selectolax); otherwise the
+stdlib HTMLParser streaming implementation runs.
+
+Usage:
+  from html_extract import extract
+  text, links = extract(html, max_chars=50000)
+"""
+
+import re
+from html.parser import HTMLParser
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as FastHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as FastHTMLParser
+    except ImportError:
+        FastHTMLParser = None
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "head", "nav", "footer", "aside", "button", "select", "menu", "dialog",
+}
+# Elements allowed inside <head>; any other start tag ends an unclosed head,
+# as an HTML5 parser would move it into the body.
+HEAD_TAGS = {"title", "meta", "link", "style", "script", "base", "noscript", "template"}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dd", "dt",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "table", "tr", "td", "th",
+    "figcaption", "header", "br", "hr", "body",
+}
+NEVER_SKIP = {"html", "body"}   # boilerplate-looking classes here must not drop the page
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+BOILERPLATE_WORDS = (
+    r"(?:nav|navbar|menu|footer|sidebar|breadcrumbs?|cookie|consent|banner|share|social|"
+    r"related|advert|ads?|promo|newsletter|subscribe|popup|modal|skip)"
+)
+BOILERPLATE_QUALIFIERS = r"(?:site|main|global|primary|secondary|top|bottom|bar|box|links|widget|wrap|wrapper|container)"
+# A class/id token counts only when it is made entirely of boilerplate words and
+# qualifiers ("site-nav", "cookie-banner"), so "main-menu-content" stays in.
+BOILERPLATE_TOKEN = re.compile(
+    rf"^(?:{BOILERPLATE_QUALIFIERS}[_-])*{BOILERPLATE_WORDS}"
+    rf"(?:[_-](?:{BOILERPLATE_WORDS}|{BOILERPLATE_QUALIFIERS}))*$",
+    re.I,
+)
+HREF_RE = re.compile(r"""<a\s[^>]*?href\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+MAX_LINK_DENSITY = 0.4
+MIN_BLOCK_WORDS = 6
+
+
+def keep_block(text, link_chars, tag):
+    """Score one block: drop link-heavy fragments and short menu-like snippets."""
+    text = text.strip()
+    if not text:
+        return False
+    density = link_chars / max(len(text), 1)
+    if tag in HEADING_TAGS:
+        return density < 0.5 and len(text.split()) >= 2
+    if density > MAX_LINK_DENSITY:
+        return False
+    words = len(text.split())
+    return words >= MIN_BLOCK_WORDS or (words >= 3 and text[-1:] in ".!?:")
+
+
+def _is_boilerplate(attrs):
+    for name, value in attrs:
+        if name in ("class", "id", "role") and value and any(BOILERPLATE_TOKEN.match(t) for t in value.split()):
+            return True
+        if name == "role" and value in ("navigation", "banner", "contentinfo", "complementary"):
+            return True
+        if name == "aria-hidden" and value == "true":
+            return True
+        if name == "hidden":
+            return True
+    return False
+
+def _skips(tag, attrs):
+    """True when an element opens a subtree that is dropped from the text."""
+    if tag in VOID_TAGS or tag in NEVER_SKIP:
+        return False
+    return tag in SKIP_TAGS or _is_boilerplate(attrs)
+
+# ---------------------------------------------------------------------------
+# Block collection (shared by both backends)
+# ---------------------------------------------------------------------------
+
+class BlockCollector:
+    """
+    Accumulates text between block boundaries and keeps the blocks that pass
+    keep_block(). Both backends drive it with the same events in document
+    order, so they split and score a page identically.
+    """
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.blocks = []
+        self.kept_chars = 0
+        self.done = False
+        self._block_tag = "body"
+        self._parts = []
+        self._link_chars = 0
+        self._in_link = 0
+
+    def flush(self, next_tag=None):
+        text = " ".join("".join(self._parts).split())
+        if text and keep_block(text, self._link_chars, self._block_tag):
+            room = self.max_chars - self.kept_chars
+            text = text[:room]
+            self.blocks.append(text)
+            self.kept_chars += len(text) + 1
+            if self.kept_chars >= self.max_chars:
+                self.done = True
+        self._parts = []
+        self._link_chars = 0
+        self._block_tag = next_tag or self._block_tag
+
+    def start(self, tag):
+        if tag == "a":
+            self._in_link += 1
+        elif tag in BLOCK_TAGS:
+            self.flush(tag)
+
+    def end(self, tag):
+        if tag == "a":
+            if self._in_link:
+                self._in_link -= 1
+        elif tag in BLOCK_TAGS:
+            self.flush("div")
+
+    def text(self, data):
+        self._parts.append(data)
+        if self._in_link:
+            self._link_chars += len(data.strip())
+
+    def result(self):
+        return "\n".join(self.blocks)
+
+# ---------------------------------------------------------------------------
+# Streaming stdlib implementation
+# ---------------------------------------------------------------------------
+
+class StreamingExtractor(HTMLParser):
+    """Incremental extractor; call feed() with chunks and stop once `done` is set."""
+
+    def __init__(self, max_chars=50000):
+        super().__init__(convert_charrefs=True)
+        self.collector = BlockCollector(max_chars)
+        self.links = []
+        self._open = []             # elements open outside any skipped subtree
+        self._skip_tag = None       # tag that opened the current skipped subtree
+        self._skip_depth = 0        # nesting of _skip_tag inside that subtree
+
+    @property
+    def done(self):
+        return self.collector.done
+
+    # ── HTMLParser hooks ──
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "a":
+            # Menus and footers are dropped from the text but still lead to pages worth crawling.
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        if self._skip_tag == "head" and tag not in HEAD_TAGS:
+            # Unclosed <head>: the first body element ends it.
+            self._skip_tag, self._skip_depth = None, 0
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if _skips(tag, attrs):
+            self.collector.flush()
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+        self.collector.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.done or self._skip_tag:
+            return
+        if tag in BLOCK_TAGS:
+            self.collector.flush()
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+                return
+            if tag not in self._open:
+                return
+            # An enclosing element closed, so the skipped one was closed implicitly.
+            self._skip_tag, self._skip_depth = None, 0
+        if tag in self._open:
+            del self._open[len(self._open) - 1 - self._open[::-1].index(tag):]
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        if self.done or self._skip_tag:
+            return
+        self.collector.text(data)
+
+    def finish(self):
+        if not self.done:
+            self.close()
+            self.collector.flush("div")
+        return self.collector.result()
+
+
+def _extract_streaming(html, max_chars, chunk_size=65536):
+    parser = StreamingExtractor(max_chars=max_chars)
+    pos = 0
+    while pos < len(html) and not parser.done:
+        parser.feed(html[pos:pos + chunk_size])
+        pos += chunk_size
+    text = parser.finish()
+    links = parser.links
+    if pos < len(html):
+        # Text budget reached: pick up the remaining anchors with a cheap scan.
+        links = links + HREF_RE.findall(html, pos)
+    return text, links
+
+# ---------------------------------------------------------------------------
+# selectolax implementation
+# ---------------------------------------------------------------------------
+
+def _extract_fast(html, max_chars):
+    """Walk the parsed tree in document order, feeding the same events as the streaming parser."""
+    tree = FastHTMLParser(html)
+    links = [n.attributes.get("href") for n in tree.css("a[href]")]
+    collector = BlockCollector(max_chars)
+    stack = [(tree.root, False)]
+    while stack and not collector.done:
+        node, leaving = stack.pop()
+        tag = node.tag
+        if leaving:
+            collector.end(tag)
+            continue
+        if tag == "-text":
+            collector.text(node.text_content or "")
+            continue
+        if tag.startswith("-"):     # comments, doctype
+            continue
+        if _skips(tag, list(node.attributes.items())):
+            collector.flush()
+            continue
+        collector.start(tag)
+        if tag in VOID_TAGS:
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(list(node.iter(include_text=True))))
+    if not collector.done:
+        collector.flush("div")
+    return collector.result(), [h for h in links if h]
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def extract(html, max_chars=50000):
+    """Return (main_text, hrefs) for an HTML document."""
+    if FastHTMLParser is not None:
+        try:
+            return _extract_fast(html, max_chars)
+        except Exception:
+            pass
+    return _extract_streaming(html, max_chars)
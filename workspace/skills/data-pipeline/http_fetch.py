@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – HTTP Fetch Layer
+Bandwidth- and memory-conscious page fetching for the stdlib scrape paths.
+
+  - asks for gzip/deflate (and br when brotli >= 1.2, which can bound its
+    output, is installed)
+  - rejects non-text Content-Types and oversized Content-Lengths before
+    reading a single body byte
+  - streams the body through the decompressor with a hard cap on
+    decompressed bytes (also guards against compression bombs)
+  - decodes with BOM -> HTTP charset -> <meta>/XML declaration -> UTF-8 ->
+    windows-1252, instead of blindly assuming UTF-8
+
+Usage:
+  status, final_url, html, headers = fetch_url(url, max_bytes=5_000_000)
+  result = fetch(url)          # FetchResult, also carrying the decoded body bytes
+"""
+
+import codecs
+import re
+import urllib.error
+import urllib.request
+import zlib
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _brotli_bounded():
+    """brotli >= 1.2 caps the output of each process() call; older releases cannot."""
+    if brotli is None:
+        return False
+    try:
+        brotli.Decompressor().process(b"", output_buffer_limit=1)
+    except TypeError:
+        return False
+    except Exception:
+        pass
+    return True
+
+
+BROTLI_BOUNDED = _brotli_bounded()
+USER_AGENT = "Text2LLM-DatasetCreator/1.0"
+ACCEPT = "text/html,application/xhtml+xml;q=0.9,text/plain;q=0.8,application/xml;q=0.5"
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_BOUNDED else "gzip, deflate"
+TEXT_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml"}
+MAX_BODY_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.I)
+_XML_ENCODING = re.compile(rb"""^<\?xml[^>]+encoding\s*=\s*["']([A-Za-z0-9_.:-]+)""")
+
+
+class SkippedResponse(Exception):
+    """The response was deliberately not downloaded (wrong type or too large)."""
+
+# ---------------------------------------------------------------------------
+# Body decoding
+# ---------------------------------------------------------------------------
+
+def _decompressor(content_encoding):
+    encoding = (content_encoding or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return lambda data, limit: d.decompress(data, limit)
+    if encoding == "deflate":
+        # "deflate" is zlib-wrapped per the RFC but raw deflate in practice often enough.
+        state = {"d": None}
+        def inflate(data, limit):
+            if state["d"] is None:
+                try:
+                    state["d"] = zlib.decompressobj()
+                    return state["d"].decompress(data, limit)
+                except zlib.error:
+                    state["d"] = zlib.decompressobj(-zlib.MAX_WBITS)
+            return state["d"].decompress(data, limit)
+        return inflate
+    if encoding == "br" and BROTLI_BOUNDED:
+        # The limit is honoured per output buffer, so one call may overshoot it by a few KB.
+        d = brotli.Decompressor()
+        return lambda data, limit: d.process(data, output_buffer_limit=limit)
+    raise SkippedResponse(f"unsupported Content-Encoding {encoding}")
+
+
+def read_limited(resp, max_bytes=MAX_BODY_BYTES):
+    """
+    Stream and decompress a response body up to max_bytes decoded bytes.
+    Returns (body, truncated); truncated is True when the body continued past the cap.
+    """
+    decode = _decompressor(resp.headers.get("Content-Encoding"))
+    body = bytearray()
+    # One byte past the cap tells a cut body from one that is exactly max_bytes long.
+    while len(body) <= max_bytes:
+        chunk = resp.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if decode:
+            chunk = decode(chunk, max_bytes + 1 - len(body))
+        body += chunk
+    return bytes(body[:max_bytes]), len(body) > max_bytes
+
+
+def read_capped(resp, max_bytes=MAX_BODY_BYTES):
+    """Stream and decompress a response body, stopping after max_bytes decoded bytes."""
+    return read_limited(resp, max_bytes)[0]
+
+
+def sniff_charset(body, content_type_charset=None):
+    """Pick the body's text encoding, WHATWG-style (simplified)."""
+    for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"),
+                      (codecs.BOM_UTF16_BE, "utf-16")):
+        if body.startswith(bom):
+            return name
+    candidates = [content_type_charset]
+    head = body[:4096]
+    match = _META_CHARSET.search(head) or _XML_ENCODING.search(head)
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for name in candidates:
+        if not name:
+            continue
+        try:
+            codec = codecs.lookup(name.strip().strip("\"'"))
+        except LookupError:
+            continue
+        # Pages labelled latin-1/ascii are almost always really windows-1252.
+        return "cp1252" if codec.name in ("latin-1", "iso8859-1", "ascii") else codec.name
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte sequence cut off by the byte cap is still UTF-8.
+        if e.start >= len(body) - 3:
+            return "utf-8"
+        return "cp1252"
+
+
+def decode_body(body, headers):
+    charset = sniff_charset(body, headers.get_content_charset())
+    return body.decode(charset, errors="replace")
+
+# ---------------------------------------------------------------------------
+# Fetch
+# ---------------------------------------------------------------------------
+
+FetchResult = namedtuple("FetchResult", "status url body text headers truncated", defaults=(False,))
+
+
+def fetch(url, timeout=15, headers=None, max_bytes=MAX_BODY_BYTES, content_types=TEXT_CONTENT_TYPES):
+    """
+    Blocking GET returning a FetchResult; body/text are None for 304 Not
+    Modified and `truncated` is set when the body was cut at max_bytes.
+    Raises SkippedResponse for non-text or oversized responses without
+    downloading their body.
+    """
+    req = urllib.request.Request(url, headers={
+        "User-Agent": USER_AGENT,
+        "Accept": ACCEPT,
+        "Accept-Encoding": ACCEPT_ENCODING,
+        **(headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            content_type = resp.headers.get_content_type()
+            if resp.headers.get("Content-Type") and content_type not in content_types:
+                raise SkippedResponse(f"content-type {content_type}")
+            length = resp.headers.get("Content-Length", "")
+            if length.isdigit() and int(length) > max_bytes:
+                raise SkippedResponse(f"content-length {int(length)} exceeds {max_bytes} bytes")
+            body, truncated = read_limited(resp, max_bytes)
+            return FetchResult(resp.status, resp.geturl(), body, decode_body(body, resp.headers), resp.headers,
+                               truncated)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return FetchResult(304, url, None, None, e.headers)
+        raise
+
+
+def fetch_url(url, timeout=15, headers=None, max_bytes=MAX_BODY_BYTES, content_types=TEXT_CONTENT_TYPES):
+    """Blocking GET returning (status, final_url, text, response_headers); see fetch()."""
+    result = fetch(url, timeout, headers, max_bytes, content_types)
+    return result.status, result.url, result.text, result.headers
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – JSONL Sink
+Append-as-you-go record output shared by the scrape, distributed crawl and
+API aggregation entry points.
+
+Usage:
+  sink = JsonlSink("output/scraped.jsonl", resume=True, shard_records=100000)
+  sink.append(record)
+  sink.sync()      # at checkpoints
+  sink.close()
+"""
+
+import glob
+import json
+import os
+
+
+class JsonlSink:
+    """
+    List-like record sink that appends each record to a JSONL file as soon as
+    it is produced, so memory stays flat and a killed crawl keeps its output.
+    With shard_records > 0 it rolls over to <stem>.part-NNNNN.jsonl files.
+    """
+
+    def __init__(self, path, resume=False, shard_records=0):
+        self.path = path
+        self.shard_records = shard_records
+        self.count = 0
+        self.shards = {}            # shard path -> records written
+        self._previous_urls = set()
+        if resume:
+            for shard in self._existing_shards():
+                self._recover(shard)
+        self._open(list(self.shards)[-1] if self.shards else self._shard_path(0))
+
+    def _shard_path(self, index):
+        if not self.shard_records:
+            return self.path
+        return f"{self.path[:-len('.jsonl')]}.part-{index:05d}.jsonl"
+
+    def _existing_shards(self):
+        if self.shard_records:
+            return sorted(glob.glob(f"{self.path[:-len('.jsonl')]}.part-*.jsonl"))
+        return [self.path] if os.path.exists(self.path) else []
+
+    def _open(self, shard):
+        self.shards.setdefault(shard, 0)
+        self._current = shard
+        self._fh = open(shard, "a", encoding="utf-8")
+
+    def _recover(self, shard):
+        # Drop a half-written trailing line, then remember what is already on disk:
+        # pages that were in flight at the last checkpoint get fetched again.
+        with open(shard, "r+b") as fh:
+            data = fh.read()
+            end = data.rfind(b"\n") + 1
+            fh.truncate(end)
+        self.shards[shard] = 0
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            self.count += 1
+            self.shards[shard] += 1
+            if "error" not in record:
+                self._previous_urls.add(record.get("url"))
+
+    def append(self, record):
+        if "error" not in record and record.get("url") in self._previous_urls:
+            return
+        if self.shard_records and self.shards[self._current] >= self.shard_records:
+            self._fh.close()
+            self._open(self._shard_path(len(self.shards)))
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self.count += 1
+        self.shards[self._current] += 1
+
+    def sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self):
+        self._fh.close()
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – LLM Client
+Provider-agnostic chat-completion client shared by the data-pipeline scripts.
+
+Keeps pooled keep-alive connections per host, retries 429/5xx responses with
+exponential backoff (honouring Retry-After), bounds in-flight requests and
+records prompt/completion tokens and latency for every call.
+
+Usage:
+  from llm_client import LLMClient, LLMMetrics
+  metrics = LLMMetrics()
+  client = LLMClient(api_key, "openai", metrics=metrics)
+  text = client.complete("Hello", system_prompt="You are terse.")
+
+Point --llm-base-url (or TEXT2LLM_LLM_BASE_URL) at a local mock server to run
+the pipeline without a real provider.
+"""
+
+import http.client
+import json
+import os
+import random
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit, quote
+
+import profiling
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[llm_client] {msg}", flush=True)
+
+
+class LLMError(Exception):
+    """Raised when a provider call fails after all retries."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# ---------------------------------------------------------------------------
+# Provider definitions
+# ---------------------------------------------------------------------------
+
+def _openai_request(model, system_prompt, prompt, max_tokens, temperature, api_key):
+    body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    headers = {"Authorization": f"Bearer {api_key}"}
+    return "/chat/completions", body, headers
+
+def _openai_parse(data):
+    usage = data.get("usage") or {}
+    text = data["choices"][0]["message"]["content"]
+    return text, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+def _anthropic_request(model, system_prompt, prompt, max_tokens, temperature, api_key):
+    body = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+    return "/messages", body, headers
+
+def _anthropic_parse(data):
+    usage = data.get("usage") or {}
+    text = data["content"][0]["text"]
+    return text, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+def _google_request(model, system_prompt, prompt, max_tokens, temperature, api_key):
+    body = {
+        "contents": [{"parts": [{"text": f"{system_prompt}\n\n{prompt}"}]}],
+        "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature},
+    }
+    path = f"/models/{quote(model)}:generateContent?key={quote(api_key)}"
+    return path, body, {}
+
+def _google_parse(data):
+    usage = data.get("usageMetadata") or {}
+    text = data["candidates"][0]["content"]["parts"][0]["text"]
+    return text, usage.get("promptTokenCount", 0), usage.get("candidatesTokenCount", 0)
+
+
+PROVIDERS = {
+    "openai": {
+        "base_url": "https://api.openai.com/v1",
+        "model": "gpt-4o-mini",
+        "request": _openai_request,
+        "parse": _openai_parse,
+    },
+    "openrouter": {
+        "base_url": "https://openrouter.ai/api/v1",
+        "model": "openai/gpt-4o-mini",
+        "request": _openai_request,
+        "parse": _openai_parse,
+    },
+    "anthropic": {
+        "base_url": "https://api.anthropic.com/v1",
+        "model": "claude-3-haiku-20240307",
+        "request": _anthropic_request,
+        "parse": _anthropic_parse,
+    },
+    "google": {
+        "base_url": "https://generativelanguage.googleapis.com/v1beta",
+        "model": "gemini-2.0-flash",
+        "request": _google_request,
+        "parse": _google_parse,
+    },
+}
+PROVIDERS["gemini"] = PROVIDERS["google"]
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class LLMMetrics:
+    """Thread-safe accumulator of per-call token and latency figures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def record(self, **entry):
+        with self._lock:
+            self.calls.append(entry)
+
+    def summary(self):
+        with self._lock:
+            calls = list(self.calls)
+        ok = [c for c in calls if c.get("ok")]
+        latencies = sorted(c["latency_ms"] for c in ok)
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0
+        by_purpose = {}
+        for c in calls:
+            slot = by_purpose.setdefault(c.get("purpose") or "default",
+                                         {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            slot["calls"] += 1
+            slot["prompt_tokens"] += c.get("prompt_tokens", 0)
+            slot["completion_tokens"] += c.get("completion_tokens", 0)
+        return {
+            "calls": len(calls),
+            "failed_calls": len(calls) - len(ok),
+            "retries": sum(c.get("attempts", 1) - 1 for c in calls),
+            "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in calls),
+            "completion_tokens": sum(c.get("completion_tokens", 0) for c in calls),
+            "latency_ms": {
+                "total": round(sum(latencies), 1),
+                "p50": round(p50, 1),
+                "p95": round(p95, 1),
+            },
+            "wait_ms": round(sum(c.get("wait_ms", 0) for c in calls), 1),
+            "by_purpose": by_purpose,
+        }
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+class ConnectionPool:
+    """Keeps idle keep-alive HTTP(S) connections per host for reuse."""
+
+    def __init__(self, timeout=60, max_idle_per_host=8):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl_ctx = ssl.create_default_context()
+
+    def acquire(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_ctx)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def release(self, scheme, host, port, conn):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class LLMClient:
+    """Chat-completion client with pooling, retries and usage accounting."""
+
+    def __init__(self, api_key, provider="openai", model=None, base_url=None, timeout=60,
+                 max_retries=4, backoff_base=1.0, backoff_max=30.0, max_concurrency=4,
+                 metrics=None):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unsupported API provider: {provider}")
+        spec = PROVIDERS[provider]
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model or spec["model"]
+        self.base_url = (base_url or os.environ.get("TEXT2LLM_LLM_BASE_URL") or spec["base_url"]).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = metrics if metrics is not None else LLMMetrics()
+        self._spec = spec
+        self._pool = ConnectionPool(timeout=timeout)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+        parts = urlsplit(self.base_url)
+        self._scheme = parts.scheme or "https"
+        self._host = parts.hostname
+        self._port = parts.port or (443 if self._scheme == "https" else 80)
+        self._prefix = parts.path.rstrip("/")
+
+    def close(self):
+        self._pool.close()
+
+    def complete(self, prompt, system_prompt="", max_tokens=2000, temperature=0.3, purpose=None):
+        """Send one chat request and return the response text."""
+        path, body, headers = self._spec["request"](
+            self.model, system_prompt, prompt, max_tokens, temperature, self.api_key)
+        headers = dict(headers)
+        headers["Content-Type"] = "application/json"
+        headers["User-Agent"] = "Text2LLM-DatasetCreator/2.0"
+        payload = json.dumps(body).encode("utf-8")
+
+        # latency_ms covers the final attempt only; wait_ms is the time spent before it
+        # (waiting for a slot, failed attempts and backoff sleeps).
+        requested = time.perf_counter()
+        started = requested
+        attempt = 0
+        last_error = None
+        with self._slots, profiling.span(f"llm:{purpose or 'call'}", cat="llm", provider=self.provider):
+            while attempt <= self.max_retries:
+                attempt += 1
+                retry_after = None
+                started = time.perf_counter()
+                try:
+                    status, resp_headers, raw = self._send(self._prefix + path, payload, headers)
+                    if status == 200:
+                        data = json.loads(raw.decode("utf-8"))
+                        text, prompt_tokens, completion_tokens = self._spec["parse"](data)
+                        self.metrics.record(
+                            ok=True, provider=self.provider, model=self.model, purpose=purpose,
+                            attempts=attempt, prompt_tokens=prompt_tokens or 0,
+                            completion_tokens=completion_tokens or 0,
+                            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+                            wait_ms=round((started - requested) * 1000, 1),
+                        )
+                        return text
+                    detail = raw.decode("utf-8", errors="replace")[:300]
+                    last_error = LLMError(f"{self.provider} HTTP {status}: {detail}", status=status)
+                    if status not in RETRYABLE_STATUS:
+                        break
+                    retry_after = _parse_retry_after(resp_headers.get("Retry-After"))
+                except (http.client.HTTPException, OSError, socket.timeout) as e:
+                    last_error = LLMError(f"{self.provider} connection error: {e}")
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    last_error = LLMError(f"{self.provider} returned an unexpected response: {e}")
+                    break
+
+                if attempt > self.max_retries:
+                    break
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                log(f"{last_error} — retrying in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+                time.sleep(delay)
+
+        self.metrics.record(
+            ok=False, provider=self.provider, model=self.model, purpose=purpose, attempts=attempt,
+            prompt_tokens=0, completion_tokens=0, error=str(last_error),
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            wait_ms=round((started - requested) * 1000, 1),
+        )
+        raise last_error
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    def _send(self, path, payload, headers):
+        conn = self._pool.acquire(self._scheme, self._host, self._port)
+        try:
+            conn.request("POST", path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._pool.release(self._scheme, self._host, self._port, conn)
+        return resp.status, resp.headers, raw
+
+
+def _parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return min(60.0, max(0.0, float(value)))
+    except ValueError:
+        return None
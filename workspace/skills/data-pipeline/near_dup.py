@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Near-Duplicate Detection
+SimHash fingerprints and URL-template tracking used during a crawl.
+
+  simhash()          64-bit fingerprint of 3-word shingles
+  SimHashIndex       banded index answering "is there a fingerprint within k bits?"
+  url_template()     collapses /tags/python?page=3 to /tags/*?page
+  TemplateTracker    per-template near-duplicate rate; decides whether links
+                     matching a template are crawled normally, deprioritized
+                     or pruned, and records every URL it skipped
+
+Usage:
+  tracker = TemplateTracker()
+  dup_of = tracker.observe(url, text)          # None or the earlier URL
+  action = tracker.action(child_url)           # "crawl" | "deprioritize" | "prune"
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, urlsplit
+
+# ---------------------------------------------------------------------------
+# SimHash
+# ---------------------------------------------------------------------------
+
+FINGERPRINT_BITS = 64
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def simhash(text, shingle=3):
+    """64-bit SimHash over word shingles (texts differing by a few words land a few bits apart)."""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle:
+        words = words + [""] * (shingle - len(words))
+    weights = [0] * FINGERPRINT_BITS
+    counts = Counter(" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1))
+    for gram, weight in counts.items():
+        h = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += weight if h >> bit & 1 else -weight
+    fp = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            fp |= 1 << bit
+    return fp
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    Finds stored fingerprints within `max_distance` bits. The fingerprint is
+    split into max_distance + 1 bands; by pigeonhole any near match shares
+    at least one band exactly, so only those buckets are compared.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._buckets = defaultdict(list)
+        self.size = 0
+
+    def _keys(self, fp):
+        mask = (1 << self.band_bits) - 1
+        return [(i, fp >> (i * self.band_bits) & mask) for i in range(self.bands)]
+
+    def find(self, fp):
+        for key in self._keys(fp):
+            for other, label in self._buckets.get(key, ()):
+                if hamming(fp, other) <= self.max_distance:
+                    return label
+        return None
+
+    def add(self, fp, label):
+        for key in self._keys(fp):
+            self._buckets[key].append((fp, label))
+        self.size += 1
+
+# ---------------------------------------------------------------------------
+# URL templates
+# ---------------------------------------------------------------------------
+
+_NUMERIC = re.compile(r"^\d+$")
+_ID_LIKE = re.compile(r"^(?=.*\d)[0-9a-f-]{8,}$", re.I)
+
+
+def url_template(url):
+    """
+    Template key: numeric/ID-like path segments and the last segment are
+    wildcarded, query values are dropped (only sorted parameter names kept).
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    shape = []
+    for i, seg in enumerate(segments):
+        if _NUMERIC.match(seg):
+            shape.append("{n}")
+        elif _ID_LIKE.match(seg) or i == len(segments) - 1:
+            shape.append("*")
+        else:
+            shape.append(seg)
+    keys = sorted({k for k, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    query = "?" + "&".join(keys) if keys else ""
+    return f"{parts.netloc}/{'/'.join(shape)}{query}"
+
+# ---------------------------------------------------------------------------
+# Tracker
+# ---------------------------------------------------------------------------
+
+class TemplateTracker:
+    """
+    Watches how often each URL template produces near-duplicate content.
+    Once a template has `min_samples` pages, a near-duplicate rate above
+    `deprioritize_at` pushes its links to the back of the frontier and a rate
+    above `prune_at` stops crawling it. Pages with fewer than `min_words`
+    words (e.g. the "[]" of an audio/sensor page without file links) are too
+    short to compare and are neither fingerprinted nor counted.
+    """
+
+    def __init__(self, max_distance=3, min_samples=5, deprioritize_at=0.5, prune_at=0.8, penalty=5,
+                 min_words=8):
+        self.index = SimHashIndex(max_distance)
+        self.min_samples = min_samples
+        self.min_words = min_words
+        self.deprioritize_at = deprioritize_at
+        self.prune_at = prune_at
+        self.penalty = penalty
+        self.pages = Counter()
+        self.near_dups = Counter()
+        self.skipped = []            # (url, template, reason)
+        self._skipped_urls = set()
+
+    def observe(self, url, text):
+        """Fingerprint a fetched page; returns the URL it nearly duplicates, or None."""
+        if len(_WORD.findall(text or "")) < self.min_words:
+            return None
+        template = url_template(url)
+        self.pages[template] += 1
+        fp = simhash(text)
+        dup_of = self.index.find(fp)
+        if dup_of is not None:
+            self.near_dups[template] += 1
+        else:
+            self.index.add(fp, url)
+        return dup_of
+
+    def action(self, url):
+        template = url_template(url)
+        pages = self.pages[template]
+        if pages < self.min_samples:
+            return "crawl"
+        rate = self.near_dups[template] / pages
+        if rate >= self.prune_at:
+            return "prune"
+        if rate >= self.deprioritize_at:
+            return "deprioritize"
+        return "crawl"
+
+    def skip(self, url, reason):
+        if url not in self._skipped_urls:
+            self._skipped_urls.add(url)
+            self.skipped.append((url, url_template(url), reason))
+
+    def report(self):
+        templates = {
+            t: {"pages": n, "near_duplicates": self.near_dups[t],
+                "near_duplicate_rate": round(self.near_dups[t] / n, 3)}
+            for t, n in self.pages.most_common() if self.near_dups[t]
+        }
+        return {
+            "fingerprints": self.index.size,
+            "near_duplicate_pages": sum(self.near_dups.values()),
+            "skipped_urls": len(self.skipped),
+            "templates": templates,
+            "skipped": [{"url": u, "template": t, "reason": r} for u, t, r in self.skipped],
+        }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Profiling
+Span timings for pipeline runs, written as a Chrome trace-event timeline.
+
+Open the resulting trace_*.json in chrome://tracing or https://ui.perfetto.dev
+to see each phase, adapter call, HTTP request and refine stage per thread,
+which makes it obvious whether thread-pool work actually overlaps.
+CPU-bound stages can additionally be captured with cProfile (pstats dump).
+
+Usage:
+  import profiling
+  profiling.enable(cpu=True)
+  with profiling.span("refine", cat="phase"):
+      with profiling.cpu_section():
+          ...
+  profiling.write_outputs(output_dir)
+
+When profiling is not enabled every helper is a cheap no-op.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# ---------------------------------------------------------------------------
+# Profiler
+# ---------------------------------------------------------------------------
+
+class Profiler:
+    """Collects complete ("X") trace events from any thread."""
+
+    def __init__(self, cpu=False):
+        self.cpu = cpu
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._cprofile = None
+        self._cpu_depth = 0
+        if cpu:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def _tid(self):
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._threads:
+                self._threads[ident] = (len(self._threads) + 1, threading.current_thread().name)
+            return self._threads[ident][0]
+
+    @contextlib.contextmanager
+    def span(self, name, cat="pipeline", **args):
+        tid = self._tid()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round((start - self._origin) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": self._pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v)[:200]
+                                 for k, v in args.items()}
+            with self._lock:
+                self._events.append(event)
+
+    @contextlib.contextmanager
+    def cpu_section(self):
+        # cProfile only observes the thread that enabled it, so nested or
+        # concurrent sections share a single enable/disable pair.
+        if not self._cprofile:
+            yield
+            return
+        with self._lock:
+            self._cpu_depth += 1
+            first = self._cpu_depth == 1
+        if first:
+            self._cprofile.enable()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._cpu_depth -= 1
+                last = self._cpu_depth == 0
+            if last:
+                self._cprofile.disable()
+
+    def summary(self):
+        """Total wall time per span name, slowest first."""
+        totals = {}
+        with self._lock:
+            events = list(self._events)
+        for e in events:
+            slot = totals.setdefault(e["name"], {"count": 0, "total_ms": 0.0})
+            slot["count"] += 1
+            slot["total_ms"] += e["dur"] / 1000
+        return dict(sorted(((k, {"count": v["count"], "total_ms": round(v["total_ms"], 1)})
+                            for k, v in totals.items()), key=lambda kv: -kv[1]["total_ms"]))
+
+    def write_trace(self, path):
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        meta = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                 "args": {"name": name}} for tid, name in threads.values()]
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, fh)
+        return path
+
+    def write_pstats(self, path):
+        if not self._cprofile:
+            return None
+        self._cprofile.dump_stats(path)
+        return path
+
+# ---------------------------------------------------------------------------
+# Module-level helpers (no-ops unless enable() was called)
+# ---------------------------------------------------------------------------
+
+_active = None
+
+def enable(cpu=False):
+    global _active
+    _active = Profiler(cpu=cpu)
+    return _active
+
+def active():
+    return _active
+
+def span(name, cat="pipeline", **args):
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.span(name, cat, **args)
+
+def cpu_section():
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.cpu_section()
+
+def traced(name=None, cat="pipeline"):
+    """Decorator form of span()."""
+    def decorator(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if _active is None:
+                return fn(*a, **kw)
+            with _active.span(label, cat):
+                return fn(*a, **kw)
+        return wrapper
+    return decorator
+
+def write_outputs(output_dir, prefix="profile"):
+    """Write the trace (and pstats dump when CPU profiling) into output_dir."""
+    if _active is None:
+        return {}
+    os.makedirs(output_dir, exist_ok=True)
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    outputs = {"trace": _active.write_trace(os.path.join(output_dir, f"{prefix}_trace_{ts}.json"))}
+    pstats_path = _active.write_pstats(os.path.join(output_dir, f"{prefix}_cpu_{ts}.pstats"))
+    if pstats_path:
+        outputs["pstats"] = pstats_path
+    return outputs
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Bulk PubMed Harvester
+Collects tens of thousands of PubMed abstracts for biomedical-domain datasets.
+
+  - esearch with usehistory=y parks the result set on the Entrez history
+    server; abstracts are then pulled with efetch in batches of --batch-size
+    ids per request (WebEnv + query_key + retstart), never id by id
+  - PubMed's esearch only exposes the first 10,000 hits of a query, so larger
+    result sets are split into publication-date slices of at most 9,999
+  - efetch XML is stream-parsed with iterparse; each <PubmedArticle> is turned
+    into a record and freed as it closes
+  - the E-utilities limit of 3 requests/s (10/s with NCBI_API_KEY) is enforced
+  - a state file records the slice and offset so an interrupted harvest resumes
+
+Usage:
+  python pubmed_harvest.py --query "sleep apnea[MeSH] AND 2015:2024[dp]" --max-records 50000
+  python pubmed_harvest.py ... --resume        # continue from the state file
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from arxiv_harvest import Throttle
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[pubmed] {msg}", flush=True)
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+USER_AGENT = "Text2LLM-DatasetCreator/2.0 (bulk harvest)"
+TOOL = "text2llm-dataset-creator"
+
+# E-utilities allow 3 requests/s per IP, or 10/s with an API key.
+API_KEY = os.environ.get("NCBI_API_KEY", "")
+REQUEST_DELAY = 0.1 if API_KEY else 0.34
+FETCH_BATCH = 500
+ESEARCH_WINDOW = 9999
+MAX_RETRIES = 5
+FIRST_DATE = date(1781, 1, 1)
+
+
+class EutilsError(RuntimeError):
+    """E-utilities answered 200 but reported an error in the body."""
+
+
+def eutils_params(**params):
+    params = {k: v for k, v in params.items() if v not in (None, "")}
+    params["tool"] = TOOL
+    if os.environ.get("NCBI_EMAIL"):
+        params["email"] = os.environ["NCBI_EMAIL"]
+    if API_KEY:
+        params["api_key"] = API_KEY
+    return urlencode(params)
+
+
+def open_stream(endpoint, params, throttle, timeout=120):
+    """Open a throttled E-utilities response, retrying 429/5xx and connection errors with backoff."""
+    url = f"{EUTILS_URL}/{endpoint}?{params}"
+    for attempt in range(1, MAX_RETRIES + 1):
+        throttle.wait()
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            return urllib.request.urlopen(req, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code not in (429, 500, 502, 503, 504) or attempt == MAX_RETRIES:
+                raise
+            retry_after = e.headers.get("Retry-After", "")
+            wait = float(retry_after) if retry_after.isdigit() else 2.0 * attempt
+            log(f"HTTP {e.code}; retrying in {wait:.0f}s")
+            time.sleep(wait)
+        except OSError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            log(f"Connection error ({e}); retrying")
+            time.sleep(2.0 * attempt)
+
+
+def _text(elem):
+    return " ".join("".join(elem.itertext()).split()) if elem is not None else ""
+
+# ---------------------------------------------------------------------------
+# esearch / date slicing
+# ---------------------------------------------------------------------------
+
+def esearch(term, throttle, mindate=None, maxdate=None, sort="pub_date"):
+    """Post a search to the history server; returns {"count", "webenv", "query_key"}."""
+    # The harvester's fixed pub_date sort keeps retstart offsets stable when the
+    # history entry is re-created on resume; single-page callers pass "relevance".
+    params = eutils_params(db="pubmed", term=term, usehistory="y", retmax=0, retmode="json", sort=sort,
+                           datetype="pdat" if mindate else None, mindate=mindate, maxdate=maxdate)
+    with open_stream("esearch.fcgi", params, throttle) as resp:
+        result = json.loads(resp.read().decode("utf-8")).get("esearchresult", {})
+    if "ERROR" in result:
+        raise EutilsError(result["ERROR"])
+    return {"count": int(result.get("count", 0)), "webenv": result.get("webenv", ""),
+            "query_key": result.get("querykey", "")}
+
+
+def _fmt(day):
+    return day.strftime("%Y/%m/%d")
+
+
+def plan_slices(term, throttle, max_records=None):
+    """
+    Split a query into publication-date ranges of at most ESEARCH_WINDOW hits
+    (newest first), stopping once the slices cover max_records.
+    """
+    total = esearch(term, throttle)["count"]
+    if total <= ESEARCH_WINDOW:
+        return [{"mindate": None, "maxdate": None, "count": total}], total
+    log(f"{total} hits; splitting into date slices of <= {ESEARCH_WINDOW}")
+    slices, covered = [], 0
+    pending = [(FIRST_DATE, date.today() + timedelta(days=366))]
+    while pending and not (max_records and covered >= max_records):
+        start, end = pending.pop()
+        count = esearch(term, throttle, _fmt(start), _fmt(end))["count"]
+        if count == 0:
+            continue
+        if count <= ESEARCH_WINDOW or start == end:
+            if count > ESEARCH_WINDOW:
+                log(f"WARNING: {count} hits on {_fmt(start)}; only the first {ESEARCH_WINDOW} are reachable")
+            slices.append({"mindate": _fmt(start), "maxdate": _fmt(end), "count": min(count, ESEARCH_WINDOW)})
+            covered += slices[-1]["count"]
+            continue
+        mid = start + (end - start) // 2
+        # Popped last-in-first-out: newer half first.
+        pending.append((start, mid))
+        pending.append((mid + timedelta(days=1), end))
+    return slices, total
+
+# ---------------------------------------------------------------------------
+# efetch stream parser
+# ---------------------------------------------------------------------------
+
+def parse_article(elem, require_abstract=True):
+    """<PubmedArticle> -> record, or None when there is no abstract (unless require_abstract is False)."""
+    citation = elem.find("MedlineCitation")
+    if citation is None:
+        return None
+    pmid = (citation.findtext("PMID") or "").strip()
+    article = citation.find("Article")
+    if article is None:
+        return None
+    title = _text(article.find("ArticleTitle"))
+    parts = []
+    for node in article.findall("Abstract/AbstractText"):
+        text = _text(node)
+        if text:
+            label = node.get("Label")
+            parts.append(f"{label}: {text}" if label else text)
+    abstract = "\n".join(parts)
+    if require_abstract and len(abstract) < 50:
+        return None
+    year = (article.findtext("Journal/JournalIssue/PubDate/Year")
+            or (article.findtext("Journal/JournalIssue/PubDate/MedlineDate") or "")[:4])
+    authors = []
+    for author in article.findall("AuthorList/Author"):
+        name = " ".join(filter(None, [author.findtext("ForeName"), author.findtext("LastName")]))
+        authors.append(name or author.findtext("CollectiveName") or "")
+    doi = ""
+    for article_id in elem.findall("PubmedData/ArticleIdList/ArticleId"):
+        if article_id.get("IdType") == "doi":
+            doi = (article_id.text or "").strip()
+    return {
+        "text": f"{title}\n\n{abstract}" if abstract else title,
+        "source": "pubmed",
+        "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+        "title": title,
+        "metadata": {
+            "type": "paper_abstract",
+            "pmid": pmid,
+            "journal": _text(article.find("Journal/Title")),
+            "year": year,
+            "authors": [a for a in authors if a],
+            "mesh": [_text(d) for d in citation.findall("MeshHeadingList/MeshHeading/DescriptorName")],
+            "language": article.findtext("Language") or "",
+            "doi": doi,
+        },
+    }
+
+
+def iter_efetch_articles(stream, require_abstract=True):
+    """Yield (record or None) per <PubmedArticle>; raises EutilsError on an <ERROR> body."""
+    for event, elem in ET.iterparse(stream, events=("end",)):
+        if elem.tag == "PubmedArticle":
+            yield parse_article(elem, require_abstract)
+            elem.clear()
+        elif elem.tag == "PubmedBookArticle":
+            elem.clear()
+        elif elem.tag == "ERROR":
+            raise EutilsError(elem.text or "efetch error")
+
+
+def efetch_batch(history, retstart, retmax, throttle, require_abstract=True):
+    """One efetch page off the history server; returns (records, articles seen)."""
+    params = eutils_params(db="pubmed", WebEnv=history["webenv"], query_key=history["query_key"],
+                           retstart=retstart, retmax=retmax, retmode="xml", rettype="abstract")
+    records, seen = [], 0
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            with open_stream("efetch.fcgi", params, throttle) as resp:
+                records, seen = [], 0
+                for record in iter_efetch_articles(resp, require_abstract):
+                    seen += 1
+                    if record:
+                        records.append(record)
+            return records, seen
+        except (EutilsError, ET.ParseError) as e:
+            # Truncated/errored pages happen under load; the page is simply fetched again.
+            if attempt == MAX_RETRIES:
+                raise
+            log(f"efetch page at {retstart} failed ({e}); retrying")
+            time.sleep(2.0 * attempt)
+
+# ---------------------------------------------------------------------------
+# Harvester
+# ---------------------------------------------------------------------------
+
+def harvest(term, max_records=None, state=None, throttle=None, batch_size=FETCH_BATCH, on_page=None):
+    """
+    Yield abstract records for term. `state` tracks the date slices, the
+    current slice and its retstart; `on_page` is called after each batch.
+    """
+    state = state if state is not None else {}
+    throttle = throttle or Throttle(REQUEST_DELAY)
+    if "slices" not in state:
+        state["slices"], state["total"] = plan_slices(term, throttle, max_records)
+        state["slice"], state["retstart"], state["fetched"] = 0, 0, 0
+        log(f"{state['total']} hits in {len(state['slices'])} slice(s)")
+    while state["slice"] < len(state["slices"]):
+        current = state["slices"][state["slice"]]
+        # WebEnv sessions expire, so the history entry is re-created per slice (and on resume).
+        history = esearch(term, throttle, current["mindate"], current["maxdate"])
+        limit = min(history["count"], ESEARCH_WINDOW)
+        while state["retstart"] < limit:
+            if max_records and state["fetched"] >= max_records:
+                state["done"] = True
+                return
+            size = min(batch_size, limit - state["retstart"])
+            if max_records:
+                size = min(size, max_records - state["fetched"])
+            records, seen = efetch_batch(history, state["retstart"], size, throttle)
+            for record in records:
+                yield record
+            state["retstart"] += size
+            state["fetched"] += seen
+            if on_page:
+                on_page()
+            if seen == 0:
+                break
+        state["slice"] += 1
+        state["retstart"] = 0
+    state["done"] = True
+
+# ---------------------------------------------------------------------------
+# Resumable runner
+# ---------------------------------------------------------------------------
+
+def _load_state(path):
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+def _save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def run_harvest(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = args.name or "search"
+    output_path = os.path.join(args.output_dir, f"pubmed_{name}.jsonl")
+    state_path = os.path.join(args.output_dir, f"pubmed_{name}.state.json")
+
+    params = {"query": args.query, "max_records": args.max_records, "batch_size": args.batch_size}
+    state = _load_state(state_path) if args.resume else {}
+    if state and state.get("params") != params:
+        log("ERROR: State file was written for different parameters; refusing to resume.")
+        sys.exit(1)
+    if state.get("done"):
+        log(f"Harvest already complete: {state.get('harvested', 0)} records in {output_path}")
+        return output_path
+    if state:
+        log(f"Resuming after {state['harvested']} records")
+    else:
+        state = {"params": params, "harvested": 0, "output_offset": 0, "cursor": {}}
+
+    with open(output_path, "a+b") as fh:
+        # Drop records written after the last checkpoint; that batch is fetched again.
+        fh.truncate(state["output_offset"])
+        fh.seek(state["output_offset"])
+
+        pending = [0]
+        def on_page():
+            fh.flush()
+            state["harvested"] += pending[0]
+            pending[0] = 0
+            state["output_offset"] = fh.tell()
+            _save_state(state_path, state)
+            log(f"  {state['harvested']} records harvested")
+
+        for record in harvest(args.query, args.max_records, state=state["cursor"], batch_size=args.batch_size,
+                              on_page=on_page):
+            fh.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            pending[0] += 1
+        state["done"] = True
+        on_page()
+
+    log(f"Harvested {state['harvested']} abstracts → {output_path}")
+    return output_path
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Bulk PubMed Harvester")
+    parser.add_argument("--query", required=True, help="PubMed query (full Entrez syntax)")
+    parser.add_argument("--max-records", type=int, default=10000,
+                        help="Stop after this many articles (0 = whole result set)")
+    parser.add_argument("--batch-size", type=int, default=FETCH_BATCH, help="PMIDs per efetch request")
+    parser.add_argument("--output-dir", default="./output", help="Directory for JSONL output and state")
+    parser.add_argument("--name", default="", help="Harvest name (output/state file stem)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the saved state file")
+    args = parser.parse_args()
+
+    if not args.query.strip():
+        log("ERROR: Empty query provided.")
+        sys.exit(1)
+    log(f"Rate limit: {1 / REQUEST_DELAY:.0f} requests/s ({'API key' if API_KEY else 'no API key'})")
+    run_harvest(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Recrawl State
+Per-URL validators kept between scheduled scrapes of the same sites.
+
+For every canonical URL the store remembers the ETag, Last-Modified, content
+hash of the extracted text, outgoing links and last fetch time. The next run
+sends If-None-Match / If-Modified-Since, treats a 304 or an identical hash as
+"unchanged", and still expands the stored links so the crawl reaches pages
+below an unchanged one.
+
+Usage:
+  state = RecrawlState.load("output/recrawl_state.json")
+  headers = state.conditional_headers(url)
+  ...
+  status = state.record(url, content_hash, links, etag, last_modified)   # "new" | "changed" | "unchanged"
+  state.save()
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+# ---------------------------------------------------------------------------
+# State store
+# ---------------------------------------------------------------------------
+
+class RecrawlState:
+    """Thread-safe JSON-backed map of url -> validators from the previous crawl."""
+
+    def __init__(self, path=None, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        entries = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                entries = json.load(fh).get("urls", {})
+        return cls(path, entries)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"saved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "urls": self.entries}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(tmp, self.path)
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        """Request headers that let the server answer 304 Not Modified."""
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url):
+        """Handle a 304: refresh the fetch time and return the stored links."""
+        with self._lock:
+            entry = self.entries.get(url) or {}
+            entry["fetched_at"] = time.time()
+            self.entries[url] = entry
+            self.stats["not_modified"] += 1
+            return list(entry.get("links", []))
+
+    def record(self, url, content_hash, links=(), etag=None, last_modified=None):
+        """Store a fresh fetch and classify it as new, changed or unchanged."""
+        with self._lock:
+            previous = self.entries.get(url)
+            if previous is None:
+                status = "new"
+            elif previous.get("content_hash") == content_hash:
+                status = "unchanged"
+            else:
+                status = "changed"
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+                "links": list(links),
+                "fetched_at": time.time(),
+            }
+            self.stats[status] += 1
+            return status
+
+    def summary(self):
+        with self._lock:
+            return {"tracked_urls": len(self.entries), **self.stats}
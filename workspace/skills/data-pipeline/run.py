@@ -17,6 +17,8 @@ import hashlib
 import re
 from pathlib import Path
 
+import profiling
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -109,15 +111,8 @@ def quality_filter(records, min_length=50):
 # Main Pipeline
 # ---------------------------------------------------------------------------
 
-def process_file(input_path, output_format, output_dir):
-    """Process a raw file through the full cleaning pipeline."""
-    log(f"Processing file: {input_path}")
-
-    # Read input
-    if not os.path.exists(input_path):
-        log(f"ERROR: Input file not found: {input_path}")
-        sys.exit(1)
-
+def load_records(input_path):
+    """Read JSONL/JSON/CSV/plain-text input into a list of record dicts."""
     ext = Path(input_path).suffix.lower()
     records = []
 
@@ -154,29 +149,47 @@ def process_file(input_path, output_format, output_dir):
         paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
         records = [{"text": p} for p in paragraphs]
 
+    return records
+
+
+def process_file(input_path, output_format, output_dir):
+    """Process a raw file through the full cleaning pipeline."""
+    log(f"Processing file: {input_path}")
+
+    # Read input
+    if not os.path.exists(input_path):
+        log(f"ERROR: Input file not found: {input_path}")
+        sys.exit(1)
+
+    with profiling.span("load_input", cat="io", path=input_path):
+        records = load_records(input_path)
     log(f"Loaded {len(records)} raw records.")
 
     # Pipeline stages
     log("Stage 1: Cleaning text...")
-    for record in records:
-        if "text" in record:
-            record["text"] = clean_text(record["text"])
+    with profiling.span("clean_text", cat="refine", records=len(records)), profiling.cpu_section():
+        for record in records:
+            if "text" in record:
+                record["text"] = clean_text(record["text"])
 
     log("Stage 2: PII removal...")
     pii_count = 0
-    for record in records:
-        if "text" in record:
-            original = record["text"]
-            record["text"] = remove_pii(record["text"])
-            if record["text"] != original:
-                pii_count += 1
+    with profiling.span("pii_removal", cat="refine", records=len(records)), profiling.cpu_section():
+        for record in records:
+            if "text" in record:
+                original = record["text"]
+                record["text"] = remove_pii(record["text"])
+                if record["text"] != original:
+                    pii_count += 1
     log(f"  PII redacted in {pii_count} records.")
 
     log("Stage 3: Deduplication...")
-    records = deduplicate_records(records)
+    with profiling.span("dedup", cat="refine", records=len(records)), profiling.cpu_section():
+        records = deduplicate_records(records)
 
     log("Stage 4: Quality filtering...")
-    records = quality_filter(records)
+    with profiling.span("quality_filter", cat="refine", records=len(records)), profiling.cpu_section():
+        records = quality_filter(records)
 
     # Add metadata
     for i, record in enumerate(records):
@@ -214,6 +227,9 @@ def process_file(input_path, output_format, output_dir):
             output_path = os.path.join(output_dir, f"{base_name}_cleaned_{timestamp}.jsonl")
             write_jsonl(records, output_path)
 
+    # Profiling output (only with --profile)
+    profile_outputs = profiling.write_outputs(output_dir, prefix=f"{base_name}_profile")
+
     # Write manifest
     manifest = {
         "input": input_path,
@@ -223,6 +239,9 @@ def process_file(input_path, output_format, output_dir):
         "pipeline_version": "1.0.0",
         "processed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
+    if profile_outputs:
+        manifest["profile"] = profile_outputs
+        manifest["stage_timings_ms"] = profiling.active().summary()
     manifest_path = os.path.join(output_dir, f"{base_name}_manifest_{timestamp}.json")
     with open(manifest_path, "w") as fh:
         json.dump(manifest, fh, indent=2)
@@ -236,8 +255,15 @@ def main():
     parser.add_argument("--input", required=True, help="Path to raw input file")
     parser.add_argument("--output-format", default="jsonl", choices=["jsonl", "parquet", "csv"])
     parser.add_argument("--output-dir", default="./output", help="Directory to write cleaned output")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record stage timings and write a Chrome trace next to the manifest")
+    parser.add_argument("--profile-cpu", action="store_true",
+                        help="With --profile, also dump cProfile stats for the cleaning stages")
     args = parser.parse_args()
 
+    if args.profile:
+        profiling.enable(cpu=args.profile_cpu)
+
     process_file(args.input, args.output_format, args.output_dir)
 
 
@@ -15,9 +15,23 @@ import os
 import sys
 import time
 import hashlib
+import asyncio
+import glob
+import signal
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 
+from crawl_frontier import BloomFilter, Frontier, canonicalize_url, host_of, run_crawl
+from html_extract import extract as extract_main_text
+from http_fetch import MAX_BODY_BYTES, SkippedResponse, fetch
+from jsonl_sink import JsonlSink
+from near_dup import TemplateTracker
+from recrawl_state import RecrawlState
+from url_discovery import RobotsCache, discover
+from warc_writer import WarcWriter
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -28,167 +42,355 @@ def log(msg):
 def sha256_hash(text):
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-def write_jsonl(records, output_path):
-    with open(output_path, "w", encoding="utf-8") as fh:
-        for record in records:
-            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
-    log(f"Wrote {len(records)} records to {output_path}")
+MAX_LINKS_PER_PAGE = 50  # Limit link discovery per page
+FILE_SUFFIXES = {"audio": (".wav", ".mp3", ".flac", ".ogg", ".m4a"), "sensor": (".json", ".csv")}
+
+
+class CrawlCheckpoint:
+    """
+    Periodic snapshot of a crawl: frontier queues (JSON), visited filter
+    (`<path>.bloom`) and the number of records already in the output file.
+    """
+
+    def __init__(self, path, sink, params, every=200, recrawl=None):
+        self.path = path
+        self.sink = sink
+        self.params = params
+        self.every = every
+        self.recrawl = recrawl
+        self.job_dir = path.replace(".checkpoint.json", ".scrapy_job")
+        self.resumed = None
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("params") != self.params:
+            raise ValueError("checkpoint was written for a different engine/URL/depth/focus")
+        self.resumed = data
+        return data
+
+    def restore_visited(self, capacity):
+        bloom_path = f"{self.path}.bloom"
+        if os.path.exists(bloom_path):
+            return BloomFilter.load(bloom_path)
+        return BloomFilter(capacity=capacity)
+
+    def save(self, frontier=None, done=False):
+        self.sink.sync()
+        data = {
+            "params": self.params,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "records": len(self.sink),
+            "done": done,
+        }
+        if frontier is not None:
+            frontier.visited.save(f"{self.path}.bloom")
+            data["frontier"] = frontier.snapshot()
+        elif self.resumed and "frontier" in self.resumed:
+            data["frontier"] = self.resumed["frontier"]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, self.path)
+        if self.recrawl:
+            self.recrawl.save()
+
+    def hooks(self, frontier):
+        """Keyword arguments for run_crawl()."""
+        return {"on_checkpoint": lambda: self.save(frontier), "checkpoint_every": self.every}
+
+
+def checkpoint_hooks(frontier, opts):
+    checkpoint = opts.get("checkpoint")
+    return checkpoint.hooks(frontier) if checkpoint else {}
 
 # ---------------------------------------------------------------------------
 # Playwright-based scraper (JS-heavy pages, SPA rendering)
 # ---------------------------------------------------------------------------
 
-def scrape_with_playwright(urls, max_depth, focus):
+# Resource types never needed for text/link extraction. Stylesheets are kept
+# because inner_text() depends on computed visibility.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "imageset", "texttrack"}
+
+# Resolves once the DOM has had no mutations for `quiet` ms (or after `cap` ms).
+DOM_STABLE_JS = """([quiet, cap]) => new Promise((resolve) => {
+  let quietTimer;
+  const finish = () => { observer.disconnect(); clearTimeout(capTimer); clearTimeout(quietTimer); resolve(); };
+  const observer = new MutationObserver(() => { clearTimeout(quietTimer); quietTimer = setTimeout(finish, quiet); });
+  observer.observe(document, { subtree: true, childList: true, characterData: true });
+  quietTimer = setTimeout(finish, quiet);
+  const capTimer = setTimeout(finish, cap);
+})"""
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def wait_for_render(page, mode, cap_ms):
+    """Adaptive replacement for a fixed post-load sleep."""
+    try:
+        if mode == "networkidle":
+            await page.wait_for_load_state("networkidle", timeout=cap_ms)
+        elif mode == "dom-stable":
+            await page.evaluate(DOM_STABLE_JS, [300, cap_ms])
+    except Exception:
+        pass  # Cap reached or page navigated away; extract whatever rendered.
+
+
+def scrape_with_playwright(urls, max_depth, focus, opts=None):
     """
     Uses Playwright to render pages and extract content.
+    A pool of browser contexts works the shared frontier concurrently; images,
+    media and fonts are blocked, and each page waits only until its DOM settles.
     Requires: pip install playwright && python -m playwright install chromium
     """
-    records = []
+    opts = opts or {}
+    records = opts.get("sink", [])
     try:
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright
     except ImportError:
         log("WARNING: playwright not installed. Using fallback HTTP scraper.")
-        return scrape_with_fallback(urls, max_depth, focus)
-
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        visited = set()
-        queue = [(url.strip(), 0) for url in urls if url.strip()]
-
-        while queue:
-            current_url, depth = queue.pop(0)
-            if current_url in visited or depth > max_depth:
-                continue
-            visited.add(current_url)
-
-            try:
-                log(f"Scraping (depth={depth}): {current_url}")
-                page.goto(current_url, timeout=30000, wait_until="domcontentloaded")
-                time.sleep(1)  # Let JS render
-
-                if focus == "text":
-                    content = page.inner_text("body")
-                elif focus == "audio":
-                    # Extract audio src attributes
-                    audio_els = page.query_selector_all("audio source, audio[src]")
-                    content = json.dumps([
-                        el.get_attribute("src") for el in audio_els if el.get_attribute("src")
-                    ])
-                elif focus == "sensor":
-                    # Look for JSON/CSV download links
-                    links = page.query_selector_all("a[href$='.json'], a[href$='.csv']")
-                    content = json.dumps([
-                        el.get_attribute("href") for el in links if el.get_attribute("href")
-                    ])
-                else:  # multimodal
-                    content = page.content()
-
-                records.append({
-                    "url": current_url,
-                    "depth": depth,
-                    "focus": focus,
-                    "content_hash": sha256_hash(content),
-                    "content_length": len(content),
-                    "text": content[:50000],  # Cap at 50k chars per page
-                    "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                })
-
-                # Discover child links for deeper crawling
-                if depth < max_depth:
-                    anchors = page.query_selector_all("a[href]")
-                    for anchor in anchors[:50]:  # Limit link discovery per page
-                        href = anchor.get_attribute("href")
-                        if href and href.startswith("http"):
-                            parsed = urlparse(href)
-                            if parsed.netloc == urlparse(current_url).netloc:
-                                queue.append((href, depth + 1))
-
-            except Exception as e:
-                log(f"Error scraping {current_url}: {e}")
-                records.append({
-                    "url": current_url,
-                    "depth": depth,
-                    "error": str(e),
-                    "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                })
+        return scrape_with_fallback(urls, max_depth, focus, opts)
+
+    frontier = make_frontier(urls, max_depth, opts)
+    pool_size = max(1, opts.get("pages", 4))
+    render_wait = opts.get("render_wait", "dom-stable")
+    render_cap = opts.get("render_wait_cap", 5000)
+    state = opts.get("recrawl")
+    tracker = opts.get("templates")
+    warc = opts.get("warc")
+
+    async def crawl():
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=True)
+            pages = asyncio.Queue()
+            for _ in range(pool_size):
+                context = await browser.new_context(user_agent="Text2LLM-DatasetCreator/1.0")
+                await context.route("**/*", _block_heavy_resources)
+                pages.put_nowait(await context.new_page())
+
+            async def process(item):
+                current_url, depth = item.url, item.depth
+                if tracker and tracker.action(current_url) == "prune":
+                    tracker.skip(current_url, "template")
+                    return []
+                page = await pages.get()
+                try:
+                    log(f"Scraping (depth={depth}): {current_url}")
+                    response = await page.goto(current_url, timeout=30000, wait_until="domcontentloaded")
+                    if warc and response is not None:
+                        # The document as served, before any script ran.
+                        warc.write_response(response.url, response.status, await response.all_headers(),
+                                            await response.body())
+                    await wait_for_render(page, render_wait, render_cap)
+
+                    if focus == "text":
+                        content = await page.inner_text("body")
+                    elif focus == "audio":
+                        # Extract audio src attributes
+                        content = json.dumps(await page.eval_on_selector_all(
+                            "audio source, audio[src]",
+                            "els => els.map(e => e.getAttribute('src')).filter(Boolean)"))
+                    elif focus == "sensor":
+                        # Look for JSON/CSV download links
+                        content = json.dumps(await page.eval_on_selector_all(
+                            "a[href$='.json'], a[href$='.csv']",
+                            "els => els.map(e => e.getAttribute('href')).filter(Boolean)"))
+                    else:  # multimodal
+                        content = await page.content()
+
+                    content_hash = sha256_hash(content)
+                    hrefs = []
+                    if depth < max_depth:
+                        hrefs = await page.eval_on_selector_all(
+                            "a[href]", "els => els.map(e => e.getAttribute('href'))")
+                        hrefs = [href for href in hrefs[:MAX_LINKS_PER_PAGE] if href]
+
+                    # A browser cannot send conditional requests for the page itself,
+                    # so recrawl mode compares the rendered content hash instead.
+                    change = state.record(current_url, content_hash, hrefs) if state else None
+                    dup_of = tracker.observe(current_url, content) if tracker else None
+                    if dup_of:
+                        tracker.skip(current_url, f"near-duplicate of {dup_of}")
+                    elif change != "unchanged":
+                        record = {
+                            "url": current_url,
+                            "depth": depth,
+                            "focus": focus,
+                            "content_hash": content_hash,
+                            "content_length": len(content),
+                            "text": content[:50000],  # Cap at 50k chars per page
+                            "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                        }
+                        if change:
+                            record["change"] = change
+                        records.append(record)
+
+                    # Discover child links for deeper crawling
+                    return plan_children(current_url, depth, hrefs, frontier, tracker, bool(dup_of))
+
+                except Exception as e:
+                    log(f"Error scraping {current_url}: {e}")
+                    records.append({
+                        "url": current_url,
+                        "depth": depth,
+                        "error": str(e),
+                        "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    })
+                finally:
+                    pages.put_nowait(page)
+                return []
 
-        browser.close()
+            await run_crawl(frontier, process, concurrency=pool_size, **checkpoint_hooks(frontier, opts))
+            await browser.close()
 
+    started = time.monotonic()
+    asyncio.run(crawl())
+    opts.setdefault("crawl_stats", {}).update(frontier_crawl_stats(frontier, started))
+    log(f"Frontier: {frontier.dispatched} rendered, {len(frontier.visited)} URLs seen")
     return records
 
 # ---------------------------------------------------------------------------
 # Scrapy cluster-based scraper (high-volume crawling)
 # ---------------------------------------------------------------------------
 
-def scrape_with_scrapy(urls, max_depth, focus):
+def scrapy_crawl_stats(stats):
+    """Condense Scrapy's stats collector into the manifest's crawl_stats block."""
+    elapsed = stats.get("elapsed_time_seconds") or 0
+    pages = stats.get("response_received_count", 0)
+    prefix = "downloader/response_status_count/"
+    return {
+        "pages": pages,
+        "items": stats.get("item_scraped_count", 0),
+        "elapsed_s": round(elapsed, 1),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+        "request_bytes": stats.get("downloader/request_bytes", 0),
+        "response_bytes": stats.get("downloader/response_bytes", 0),
+        "response_codes": {k[len(prefix):]: v for k, v in stats.items() if k.startswith(prefix)},
+        "offsite_filtered": stats.get("offsite/filtered", 0),
+        "robots_forbidden": stats.get("robotstxt/forbidden", 0),
+    }
+
+
+def scrape_with_scrapy(urls, max_depth, focus, opts=None):
     """
     Uses Scrapy via CrawlerProcess for high-volume crawling.
+    AutoThrottle adapts delays towards a target concurrency per site, links
+    are followed only within the seed domains, and an item pipeline streams
+    every item into the output sink instead of collecting them in memory.
     Requires: pip install scrapy
     """
-    records = []
+    opts = opts or {}
+    records = opts.get("sink", [])
     try:
         import scrapy
         from scrapy.crawler import CrawlerProcess
-        from scrapy.utils.project import get_project_settings
-
-        class DatasetSpider(scrapy.Spider):
-            name = "dataset_spider"
-            start_urls = [u.strip() for u in urls if u.strip()]
-            custom_settings = {
-                "DEPTH_LIMIT": max_depth,
-                "CONCURRENT_REQUESTS": 8,
-                "DOWNLOAD_DELAY": 0.5,
-                "ROBOTSTXT_OBEY": True,
-                "LOG_LEVEL": "WARNING",
+    except ImportError:
+        log("WARNING: scrapy not installed. Using fallback HTTP scraper.")
+        return scrape_with_fallback(urls, max_depth, focus, opts)
+
+    seeds = [u.strip() for u in urls if u.strip()]
+    if opts.get("sitemaps"):
+        for url in list(seeds):
+            seeds.extend(loc for loc, _ in discover(url, opts.get("robots"),
+                                                    max_urls=opts.get("max_sitemap_urls", 10000)))
+    domains = sorted({urlparse(u).hostname for u in seeds if urlparse(u).hostname})
+    max_chars = opts.get("max_chars", 50000)
+    warc = opts.get("warc")
+
+    class SinkPipeline:
+        """Writes each item to the (sharded) JSONL sink as soon as it is scraped."""
+
+        def process_item(self, item, spider):
+            records.append(dict(item))
+            return item
+
+        def close_spider(self, spider):
+            if hasattr(records, "sync"):
+                records.sync()
+
+    settings = {
+        "DEPTH_LIMIT": max_depth,
+        "CONCURRENT_REQUESTS": opts.get("concurrency", 16),
+        "CONCURRENT_REQUESTS_PER_DOMAIN": opts.get("per_host", 4),
+        # With AutoThrottle enabled DOWNLOAD_DELAY is the floor, not a fixed pause.
+        "DOWNLOAD_DELAY": opts.get("crawl_delay", 0.0),
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": max(0.5, opts.get("crawl_delay", 0.0)),
+        "AUTOTHROTTLE_MAX_DELAY": 30.0,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": opts.get("autothrottle_target", 4.0),
+        "DOWNLOAD_MAXSIZE": opts.get("max_bytes", MAX_BODY_BYTES),
+        "ROBOTSTXT_OBEY": opts.get("robots") is not None,
+        "ITEM_PIPELINES": {SinkPipeline: 300},
+        "USER_AGENT": "Text2LLM-DatasetCreator/1.0",
+        "LOG_LEVEL": "WARNING",
+    }
+    if opts.get("checkpoint"):
+        # Scrapy persists its own scheduler queue and dupe filter here.
+        settings["JOBDIR"] = opts["checkpoint"].job_dir
+
+    class DatasetSpider(scrapy.Spider):
+        name = "dataset_spider"
+        allowed_domains = domains
+        start_urls = seeds
+
+        def parse(self, response):
+            if not isinstance(response, scrapy.http.TextResponse):
+                return  # Binary body (PDF, image ...): nothing to extract or follow.
+            if warc:
+                warc.write_response(response.url, response.status,
+                                    [(k.decode("latin-1"), v.decode("latin-1"))
+                                     for k, values in response.headers.items() for v in values],
+                                    response.body)
+            if focus == "text":
+                text, _ = extract_main_text(response.text, max_chars=max_chars)
+            elif focus == "audio":
+                text = json.dumps(response.css("audio source::attr(src), audio::attr(src)").getall())
+            elif focus == "sensor":
+                text = json.dumps(response.css("a[href$='.json']::attr(href), a[href$='.csv']::attr(href)").getall())
+            else:
+                text = response.text
+
+            yield {
+                "url": response.url,
+                "depth": response.meta.get("depth", 0),
+                "focus": focus,
+                "content_hash": sha256_hash(text),
+                "content_length": len(text),
+                "text": text[:50000],
+                "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             }
 
-            def parse(self, response):
-                if focus == "text":
-                    text = " ".join(response.css("body *::text").getall()).strip()
-                elif focus == "audio":
-                    text = json.dumps(response.css("audio source::attr(src), audio::attr(src)").getall())
-                elif focus == "sensor":
-                    text = json.dumps(response.css("a[href$='.json']::attr(href), a[href$='.csv']::attr(href)").getall())
-                else:
-                    text = response.text
-
-                records.append({
-                    "url": response.url,
-                    "depth": response.meta.get("depth", 0),
-                    "focus": focus,
-                    "content_hash": sha256_hash(text),
-                    "content_length": len(text),
-                    "text": text[:50000],
-                    "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                })
-
-                # Follow links
-                for next_page in response.css("a::attr(href)").getall()[:50]:
-                    if next_page.startswith("http"):
-                        yield response.follow(next_page, callback=self.parse)
-
-        process = CrawlerProcess()
-        process.crawl(DatasetSpider)
-        process.start()
+            # Relative links included; OffsiteMiddleware drops anything outside allowed_domains.
+            yield from response.follow_all(response.css("a::attr(href)").getall()[:MAX_LINKS_PER_PAGE],
+                                           callback=self.parse)
 
-    except ImportError:
-        log("WARNING: scrapy not installed. Using fallback HTTP scraper.")
-        return scrape_with_fallback(urls, max_depth, focus)
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(DatasetSpider)
+    process.crawl(crawler)
+    process.start()
 
+    stats = scrapy_crawl_stats(crawler.stats.get_stats())
+    opts.setdefault("crawl_stats", {}).update(stats)
+    log(f"Scrapy: {stats['pages']} pages at {stats['pages_per_sec']} pages/s, "
+        f"{stats['response_bytes']} bytes, codes {stats['response_codes']}")
     return records
 
 # ---------------------------------------------------------------------------
 # Firecrawl AI-powered extraction
 # ---------------------------------------------------------------------------
 
-def scrape_with_firecrawl(urls, max_depth, focus):
+def scrape_with_firecrawl(urls, max_depth, focus, opts=None):
     """
     Uses the Firecrawl API for AI-powered web extraction.
     Requires: FIRECRAWL_API_KEY env var and pip install firecrawl-py
     """
-    records = []
+    opts = opts or {}
+    records = opts.get("sink", [])
     api_key = os.environ.get("FIRECRAWL_API_KEY", "")
 
     try:
@@ -221,61 +423,200 @@ def scrape_with_firecrawl(urls, max_depth, focus):
 
     except ImportError:
         log("WARNING: firecrawl-py not installed. Using fallback HTTP scraper.")
-        return scrape_with_fallback(urls, max_depth, focus)
+        return scrape_with_fallback(urls, max_depth, focus, opts)
 
     return records
 
 # ---------------------------------------------------------------------------
-# Fallback: simple urllib-based scraper (no deps needed)
+# Fallback: stdlib scraper driven by the concurrent crawl frontier
 # ---------------------------------------------------------------------------
 
-def scrape_with_fallback(urls, max_depth, focus):
-    """Minimal scraper using only stdlib – always available."""
-    import urllib.request
-    from html.parser import HTMLParser
-
-    class TextExtractor(HTMLParser):
-        def __init__(self):
-            super().__init__()
-            self.texts = []
-        def handle_data(self, data):
-            self.texts.append(data)
-        def get_text(self):
-            return " ".join(self.texts)
-
-    records = []
-    visited = set()
-    queue = [(u.strip(), 0) for u in urls if u.strip()]
-
-    while queue:
-        url, depth = queue.pop(0)
-        if url in visited or depth > max_depth:
+def fetch_and_extract(url, max_chars, headers=None, max_bytes=MAX_BODY_BYTES, warc=None):
+    """
+    Fetch url and return (status, final_url, main_text, hrefs, response_headers).
+    With a WarcWriter the raw (decoded) response is archived as well.
+    """
+    result = fetch(url, headers=headers, max_bytes=max_bytes)
+    if result.body is None:
+        return result.status, result.url, "", [], result.headers
+    if warc:
+        warc.write_response(result.url, result.status, result.headers, result.body, truncated=result.truncated)
+    # Parsing also runs here, off the event loop.
+    text, links = extract_main_text(result.text, max_chars=max_chars)
+    return result.status, result.url, text, links, result.headers
+
+
+def focus_content(focus, text, links):
+    """
+    Record text for a fetched page: its main text, or for audio/sensor focus the
+    page's matching file links as a JSON list (same shape as the browser engines).
+    """
+    if focus in FILE_SUFFIXES:
+        return json.dumps([href for href in links if urlparse(href).path.lower().endswith(FILE_SUFFIXES[focus])])
+    return text
+
+
+def plan_children(url, depth, links, frontier, tracker=None, near_duplicate=False):
+    """
+    Turn a page's hrefs into (url, depth[, priority]) children. With a template
+    tracker, links matching a near-duplicate-heavy template are pushed back or
+    pruned (and reported), as are all links found on a near-duplicate page.
+    """
+    children = []
+    for href in links[:MAX_LINKS_PER_PAGE]:
+        if tracker is None:
+            children.append((href, depth + 1))
             continue
-        visited.add(url)
+        child = canonicalize_url(href, base=url)
+        if not child or child in frontier.visited:
+            continue
+        action = tracker.action(child)
+        if action == "prune":
+            tracker.skip(child, "template")
+            continue
+        priority = depth + 1
+        if action == "deprioritize" or near_duplicate:
+            priority += tracker.penalty
+        children.append((child, depth + 1, priority))
+    return children
 
-        try:
-            log(f"Fallback scraping (depth={depth}): {url}")
-            req = urllib.request.Request(url, headers={"User-Agent": "Text2LLM-DatasetCreator/1.0"})
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                html = resp.read().decode("utf-8", errors="replace")
 
-            extractor = TextExtractor()
-            extractor.feed(html)
-            text = extractor.get_text().strip()
+def frontier_crawl_stats(frontier, started, **extra):
+    elapsed = time.monotonic() - started
+    return {
+        "pages": frontier.dispatched,
+        "urls_seen": len(frontier.visited),
+        "elapsed_s": round(elapsed, 1),
+        "pages_per_sec": round(frontier.dispatched / elapsed, 2) if elapsed else None,
+        **extra,
+    }
 
-            records.append({
-                "url": url,
-                "depth": depth,
-                "focus": focus,
-                "content_hash": sha256_hash(text),
-                "content_length": len(text),
-                "text": text[:50000],
-                "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            })
+
+def make_frontier(urls, max_depth, opts):
+    """
+    Build a frontier seeded with urls and restricted to the seed hosts.
+    robots.txt is fetched up front for every seed host (rules + crawl-delay);
+    with opts["sitemaps"] the hosts' sitemaps add further depth-0 seeds.
+    """
+    seeds = [canonicalize_url(u) for u in urls if u.strip()]
+    seeds = [u for u in seeds if u]
+    robots = opts.get("robots")
+    crawl_delay = opts.get("crawl_delay", 0.0)
+    capacity = opts.get("visited_capacity", 1_000_000)
+    checkpoint = opts.get("checkpoint")
+    resumed = checkpoint.resumed if checkpoint else None
+    frontier = Frontier(
+        per_host_concurrency=opts.get("per_host", 4),
+        crawl_delay=crawl_delay,
+        visited=checkpoint.restore_visited(capacity) if resumed else BloomFilter(capacity=capacity),
+        max_depth=max_depth,
+        allowed_hosts={host_of(u) for u in seeds},
+        accept=robots.allowed if robots else None,
+    )
+
+    first_seed = {}
+    for url in seeds:
+        first_seed.setdefault(host_of(url), url)
+    if robots:
+        for host, url in first_seed.items():
+            delay = robots.crawl_delay(url)
+            if delay and delay > crawl_delay:
+                log(f"robots.txt: crawl-delay {delay:g}s for {host}")
+                frontier.set_crawl_delay(host, delay)
+
+    if resumed:
+        frontier.restore(resumed.get("frontier", {}))
+        log(f"Resumed frontier: {frontier.pending} queued, {len(frontier.visited)} URLs seen")
+        return frontier
+
+    for url in seeds:
+        frontier.push(url, depth=0)
+    if opts.get("sitemaps"):
+        budget = opts.get("max_sitemap_urls", 10000)
+        for url in first_seed.values():
+            for loc, priority in discover(url, robots, max_urls=budget):
+                frontier.push(loc, depth=0, priority=priority)
+    if frontier.rejected:
+        log(f"robots.txt: {frontier.rejected} seed URLs disallowed")
+    return frontier
+
+
+def scrape_with_fallback(urls, max_depth, focus, opts=None):
+    """Minimal scraper using only stdlib – always available."""
+    opts = opts or {}
+    records = opts.get("sink", [])
+    frontier = make_frontier(urls, max_depth, opts)
+    concurrency = opts.get("concurrency", 16)
+    max_chars = opts.get("max_chars", 50000)
+    max_bytes = opts.get("max_bytes", MAX_BODY_BYTES)
+    state = opts.get("recrawl")
+    tracker = opts.get("templates")
+    warc = opts.get("warc")
+    skipped = Counter()
+
+    async def process(item):
+        url, depth = item.url, item.depth
+        near_duplicate = False
+        if tracker and tracker.action(url) == "prune":
+            # Queued before its template turned out to produce near-duplicates.
+            tracker.skip(url, "template")
+            return []
+        try:
+            log(f"Fallback scraping (depth={depth}): {url}")
+            headers = state.conditional_headers(url) if state else None
+            status, final_url, text, links, resp_headers = await asyncio.get_running_loop().run_in_executor(
+                None, fetch_and_extract, url, max_chars, headers, max_bytes, warc)
+
+            if status == 304:
+                # Unchanged since the last run; keep crawling through its stored links.
+                links = state.not_modified(url)
+            else:
+                text = focus_content(focus, text, links)
+                content_hash = sha256_hash(text)
+                links = links[:MAX_LINKS_PER_PAGE]
+                change = None
+                if state:
+                    change = state.record(url, content_hash, links,
+                                          resp_headers.get("ETag"), resp_headers.get("Last-Modified"))
+                dup_of = tracker.observe(url, text) if tracker else None
+                if dup_of:
+                    near_duplicate = True
+                    tracker.skip(url, f"near-duplicate of {dup_of}")
+                elif change != "unchanged":
+                    record = {
+                        "url": url,
+                        "depth": depth,
+                        "focus": focus,
+                        "content_hash": content_hash,
+                        "content_length": len(text),
+                        "text": text,
+                        "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    }
+                    if change:
+                        record["change"] = change
+                    records.append(record)
+            if depth < max_depth:
+                return plan_children(url, depth, links, frontier, tracker, near_duplicate)
+        except SkippedResponse as e:
+            log(f"Skipped {url}: {e}")
+            skipped[str(e).split(" ", 1)[0]] += 1
         except Exception as e:
             log(f"Fallback error for {url}: {e}")
             records.append({"url": url, "depth": depth, "error": str(e)})
-
+        return []
+
+    async def crawl():
+        # Blocking urllib fetches run in a pool sized to the crawl concurrency.
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            asyncio.get_running_loop().set_default_executor(pool)
+            await run_crawl(frontier, process, concurrency=concurrency, **checkpoint_hooks(frontier, opts))
+
+    started = time.monotonic()
+    asyncio.run(crawl())
+    opts.setdefault("crawl_stats", {}).update(frontier_crawl_stats(frontier, started, skipped=dict(skipped)))
+    log(f"Frontier: {frontier.dispatched} fetched, {len(frontier.visited)} URLs seen")
+    if skipped:
+        log(f"Skipped without downloading: {dict(skipped)}")
     return records
 
 # ---------------------------------------------------------------------------
@@ -289,6 +630,10 @@ ENGINE_MAP = {
     "fallback": scrape_with_fallback,
 }
 
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
 def main():
     parser = argparse.ArgumentParser(description="Dataset Creator – Web Scraping Engine")
     parser.add_argument("--engine", default="playwright", choices=ENGINE_MAP.keys())
@@ -297,6 +642,49 @@ def main():
     parser.add_argument("--focus", default="text", choices=["text", "audio", "sensor", "multimodal"])
     parser.add_argument("--output-format", default="jsonl", choices=["jsonl", "parquet", "csv"])
     parser.add_argument("--output-dir", default="./output", help="Directory to write results")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max fetches in flight (fallback engine)")
+    parser.add_argument("--per-host", type=int, default=4, help="Max concurrent fetches per host")
+    parser.add_argument("--crawl-delay", type=float, default=0.0, help="Seconds between requests to one host")
+    parser.add_argument("--pages", type=int, default=4, help="Concurrent browser pages (playwright engine)")
+    parser.add_argument("--render-wait", default="dom-stable", choices=["dom-stable", "networkidle", "none"],
+                        help="How playwright decides a page has rendered")
+    parser.add_argument("--render-wait-cap", type=int, default=5000, help="Max render wait per page (ms)")
+    parser.add_argument("--max-text-chars", type=int, default=50000,
+                        help="Stop extracting a page's main text after this many characters (fallback engine)")
+    parser.add_argument("--max-page-bytes", type=int, default=MAX_BODY_BYTES,
+                        help="Hard cap on decoded bytes read per page (fallback engine)")
+    parser.add_argument("--prune-templates", action="store_true",
+                        help="SimHash pages during the crawl; deprioritize/prune URL templates that keep "
+                             "yielding near-duplicates (fallback and playwright engines)")
+    parser.add_argument("--simhash-distance", type=int, default=3,
+                        help="Max differing fingerprint bits for two pages to count as near-duplicates")
+    parser.add_argument("--recrawl-state", default="",
+                        help="Per-URL state file; enables conditional recrawl and emits only new/changed pages "
+                             "(fallback and playwright engines)")
+    parser.add_argument("--ignore-robots", action="store_true", help="Do not fetch or obey robots.txt")
+    parser.add_argument("--sitemaps", action="store_true",
+                        help="Seed the crawl from each host's sitemap.xml / robots.txt Sitemap entries")
+    parser.add_argument("--max-sitemap-urls", type=int, default=10000, help="Cap on sitemap URLs per host")
+    parser.add_argument("--name", default="", help="Crawl name used for output/checkpoint files (default: timestamp)")
+    parser.add_argument("--checkpoint-every", type=int, default=200,
+                        help="Snapshot frontier and visited state every N pages (0 = only at the end)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the crawl named by --name (or the latest checkpoint in --output-dir)")
+    parser.add_argument("--shard-records", type=int, default=0,
+                        help="Roll output over to a new part file every N records (0 = single file)")
+    parser.add_argument("--autothrottle-target", type=float, default=4.0,
+                        help="AutoThrottle target concurrency per remote site (scrapy engine)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Crawl with N worker processes over a shared SQLite frontier (fallback fetch layer)")
+    parser.add_argument("--warc", action="store_true",
+                        help="Also archive raw responses to <output>.warc.gz with a <output>.cdx offset index")
+    parser.add_argument("--download", action="store_true",
+                        help="audio/sensor focus: download the discovered files into <output>_files/ (resumable)")
+    parser.add_argument("--unpack-archives", action="store_true", help="Extract downloaded zip/tar/gz archives")
+    parser.add_argument("--ingest-sensors", action="store_true",
+                        help="sensor focus with --download: convert the CSV/JSON files into typed Parquet shards")
+    parser.add_argument("--visited-capacity", type=int, default=1_000_000,
+                        help="Expected URL count used to size the visited filter")
     args = parser.parse_args()
 
     urls = [u for u in args.urls.split(",") if u.strip()]
@@ -306,40 +694,157 @@ def main():
 
     log(f"Starting scrape: engine={args.engine}, urls={len(urls)}, depth={args.depth}, focus={args.focus}")
 
-    scrape_fn = ENGINE_MAP[args.engine]
-    records = scrape_fn(urls, args.depth, args.focus)
-
-    log(f"Scraped {len(records)} records total.")
-
-    # Write output
     os.makedirs(args.output_dir, exist_ok=True)
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-
-    if args.output_format == "jsonl":
-        output_path = os.path.join(args.output_dir, f"scraped_{timestamp}.jsonl")
-        write_jsonl(records, output_path)
-    elif args.output_format == "parquet":
+    name = args.name
+    if args.resume and not name:
+        checkpoints = glob.glob(os.path.join(args.output_dir, "scraped_*.checkpoint.json"))
+        if not checkpoints:
+            log("ERROR: --resume found no checkpoint in the output directory.")
+            sys.exit(1)
+        name = os.path.basename(max(checkpoints, key=os.path.getmtime))[len("scraped_"):-len(".checkpoint.json")]
+    name = name or time.strftime("%Y%m%d_%H%M%S")
+    stem = os.path.join(args.output_dir, f"scraped_{name}")
+    jsonl_path = f"{stem}.jsonl"
+
+    if args.workers > 1:
+        from distributed_crawl import run_local
+        if args.engine != "fallback":
+            log(f"WARNING: --workers uses the fallback fetch layer; --engine {args.engine} is ignored.")
+        if args.warc:
+            log("WARNING: --warc is not supported with --workers; raw responses are not archived.")
+        # Re-running with the same --name continues from the store; expired leases are requeued.
+        run_local(f"{stem}.frontier.db", urls, args.depth, f"{stem}_distributed", workers=args.workers,
+                  focus=args.focus, concurrency=args.concurrency, per_host=args.per_host,
+                  max_chars=args.max_text_chars, sitemaps=args.sitemaps, max_sitemap_urls=args.max_sitemap_urls,
+                  crawl_delay=args.crawl_delay, obey_robots=not args.ignore_robots, name=f"scraped_{name}")
+        log("Scrape complete.")
+        return
+
+    opts = {
+        "concurrency": args.concurrency,
+        "per_host": args.per_host,
+        "crawl_delay": args.crawl_delay,
+        "visited_capacity": args.visited_capacity,
+        "pages": args.pages,
+        "render_wait": args.render_wait,
+        "render_wait_cap": args.render_wait_cap,
+        "max_chars": args.max_text_chars,
+        "max_bytes": args.max_page_bytes,
+        "robots": None if args.ignore_robots else RobotsCache(),
+        "sitemaps": args.sitemaps,
+        "max_sitemap_urls": args.max_sitemap_urls,
+        "autothrottle_target": args.autothrottle_target,
+    }
+    if args.prune_templates:
+        opts["templates"] = TemplateTracker(max_distance=args.simhash_distance)
+    if args.recrawl_state:
+        opts["recrawl"] = RecrawlState.load(args.recrawl_state)
+        log(f"Recrawl mode: {len(opts['recrawl'].entries)} URLs known from previous runs")
+    if args.warc:
+        # A resumed crawl appends new .warc.gz files; the CDX index keeps growing.
+        opts["warc"] = WarcWriter(stem)
+
+    params = {"engine": args.engine, "urls": urls, "depth": args.depth, "focus": args.focus}
+    sink = JsonlSink(jsonl_path, resume=args.resume, shard_records=args.shard_records)
+    checkpoint = CrawlCheckpoint(f"{stem}.checkpoint.json", sink, params,
+                                 every=args.checkpoint_every, recrawl=opts.get("recrawl"))
+    if args.resume:
+        if not os.path.exists(checkpoint.path):
+            log(f"ERROR: No checkpoint at {checkpoint.path}")
+            sys.exit(1)
         try:
-            import pandas as pd
-            df = pd.DataFrame(records)
-            output_path = os.path.join(args.output_dir, f"scraped_{timestamp}.parquet")
-            df.to_parquet(output_path, index=False)
-            log(f"Wrote {len(records)} records to {output_path}")
-        except ImportError:
-            log("WARNING: pandas/pyarrow not installed. Falling back to JSONL.")
-            output_path = os.path.join(args.output_dir, f"scraped_{timestamp}.jsonl")
-            write_jsonl(records, output_path)
-    elif args.output_format == "csv":
+            state = checkpoint.load()
+        except ValueError as e:
+            log(f"ERROR: Cannot resume: {e}")
+            sys.exit(1)
+        if state.get("done"):
+            log(f"Crawl already complete: {len(sink)} records in {len(sink.shards)} file(s)")
+            return
+        log(f"Resuming crawl '{name}' with {len(sink)} records already written")
+    opts["sink"] = sink
+    opts["checkpoint"] = checkpoint
+    opts["crawl_stats"] = {}
+
+    # Preemptible workers get SIGTERM; unwind through the crawl loop so it checkpoints.
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    scrape_fn = ENGINE_MAP[args.engine]
+    try:
+        scrape_fn(urls, args.depth, args.focus, opts)
+    except KeyboardInterrupt:
+        log(f"Interrupted; {len(sink)} records kept. Re-run with --resume --name {name} to continue.")
+        sink.close()
+        if args.warc:
+            opts["warc"].close()
+        sys.exit(130)
+    checkpoint.save(done=True)
+    sink.close()
+    if args.warc:
+        opts["warc"].close()
+        log(f"Archived {opts['warc'].records} raw responses → {stem}.cdx")
+    if args.recrawl_state:
+        log(f"Recrawl summary: {opts['recrawl'].summary()}")
+    if args.prune_templates:
+        report = opts["templates"].report()
+        with open(f"{stem}.templates.json", "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        log(f"Near-duplicates: {report['near_duplicate_pages']} pages, {report['skipped_urls']} URLs skipped "
+            f"→ {stem}.templates.json")
+
+    log(f"Scraped {len(sink)} records total in {len(sink.shards)} file(s)")
+
+    # Parquet/CSV are converted shard by shard from the streamed JSONL once the crawl is complete.
+    outputs = list(sink.shards)
+    if args.output_format in ("parquet", "csv"):
         try:
             import pandas as pd
-            df = pd.DataFrame(records)
-            output_path = os.path.join(args.output_dir, f"scraped_{timestamp}.csv")
-            df.to_csv(output_path, index=False)
-            log(f"Wrote {len(records)} records to {output_path}")
+            outputs = []
+            for shard in sink.shards:
+                df = pd.read_json(shard, lines=True)
+                output_path = f"{shard[:-len('.jsonl')]}.{args.output_format}"
+                if args.output_format == "parquet":
+                    df.to_parquet(output_path, index=False)
+                else:
+                    df.to_csv(output_path, index=False)
+                outputs.append(output_path)
+                log(f"Wrote {len(df)} records to {output_path}")
         except ImportError:
-            log("WARNING: pandas not installed. Falling back to JSONL.")
-            output_path = os.path.join(args.output_dir, f"scraped_{timestamp}.jsonl")
-            write_jsonl(records, output_path)
+            log("WARNING: pandas/pyarrow not installed. Output left as JSONL.")
+
+    manifest = {
+        "engine": args.engine,
+        "params": params,
+        "format": args.output_format if outputs and not outputs[0].endswith(".jsonl") else "jsonl",
+        "shards": [{"path": os.path.basename(out), "records": n} for out, n in zip(outputs, sink.shards.values())],
+        "total_records": len(sink),
+        "crawl_stats": opts["crawl_stats"],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    if args.download and args.focus in ("audio", "sensor"):
+        from download_manager import DownloadManager, items_from_records
+        items = []
+        for shard in sink.shards:
+            with open(shard, "r", encoding="utf-8") as fh:
+                items.extend(items_from_records(json.loads(line) for line in fh if line.strip()))
+        manager = DownloadManager(f"{stem}_files", concurrency=args.concurrency, per_host=args.per_host,
+                                  unpack_archives=args.unpack_archives)
+        summary = manager.run(items)
+        manifest["downloads"] = {"dir": os.path.basename(manager.dest_dir),
+                                 "manifest": os.path.relpath(manager.manifest_path, args.output_dir),
+                                 **{k: summary[k] for k in ("ok", "failed", "bytes")}}
+        if args.ingest_sensors and args.focus == "sensor":
+            from sensor_ingest import run_ingest
+            ingested = run_ingest([manager.manifest_path], args.output_dir, name)
+            if ingested:
+                manifest["sensor_ingest"] = os.path.basename(ingested)
+    elif args.download:
+        log("WARNING: --download only applies to --focus audio/sensor; nothing downloaded.")
+    if args.warc:
+        manifest["warc"] = {"files": [os.path.basename(f) for f in opts["warc"].files],
+                            "index": os.path.basename(f"{stem}.cdx"), "records": opts["warc"].records}
+    with open(f"{stem}_manifest.json", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    log(f"Manifest written to {stem}_manifest.json")
 
     log("Scrape complete.")
 
@@ -0,0 +1,716 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – Sensor File Ingestion
+Turns the CSV/JSON files found by `scrape.py --focus sensor` (or downloaded by
+download_manager.py) into typed, columnar sensor tables.
+
+Per source file:
+  1. stream rows (CSV, NDJSON, top-level JSON arrays, or {"data": [...]} wrappers;
+     .gz transparently), never holding the whole file
+  2. infer a column schema from the first --sample-rows rows
+     (bool / int / float / timestamp / string)
+  3. normalise units named in column headers (temp_f, "Pressure (kPa)", speed_mph ...)
+     to SI-style units and timestamps (ISO strings, epoch s/ms/us) to UTC milliseconds
+  4. write --chunk-rows rows at a time to Parquet (or Arrow IPC) shards, each row
+     carrying _source/_row provenance; the inferred schema and conversions go to
+     the shard metadata and the manifest
+
+Without pyarrow the shards are written as typed JSONL instead.
+
+Usage:
+  python sensor_ingest.py --input output/scraped_lab_files/downloads_manifest.json --name lab
+  python sensor_ingest.py --input https://example.org/station.csv --format arrow
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from http_fetch import USER_AGENT
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+SENSOR_SUFFIXES = (".csv", ".tsv", ".json", ".jsonl", ".ndjson")
+NULL_TOKENS = {"", "na", "n/a", "nan", "null", "none", "-", "--"}
+SAMPLE_ROWS = 1000
+CHUNK_ROWS = 50000
+SHARD_ROWS = 1_000_000
+TEXT_CHUNK = 1 << 16
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[sensor] {msg}", flush=True)
+
+
+def snake(name):
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", str(name))
+    return re.sub(r"[^0-9a-zA-Z]+", "_", name).strip("_").lower() or "col"
+
+# ---------------------------------------------------------------------------
+# Units and timestamps
+# ---------------------------------------------------------------------------
+
+# unit token -> (canonical unit suffix, converter or None when already canonical)
+UNITS = {
+    "c": ("c", None), "degc": ("c", None), "celsius": ("c", None), "°c": ("c", None),
+    "f": ("c", lambda v: (v - 32) * 5 / 9), "degf": ("c", lambda v: (v - 32) * 5 / 9),
+    "fahrenheit": ("c", lambda v: (v - 32) * 5 / 9), "°f": ("c", lambda v: (v - 32) * 5 / 9),
+    "k": ("c", lambda v: v - 273.15), "kelvin": ("c", lambda v: v - 273.15),
+    "pa": ("pa", None), "hpa": ("pa", lambda v: v * 100), "mbar": ("pa", lambda v: v * 100),
+    "kpa": ("pa", lambda v: v * 1000), "bar": ("pa", lambda v: v * 1e5),
+    "psi": ("pa", lambda v: v * 6894.757), "inhg": ("pa", lambda v: v * 3386.389),
+    "m": ("m", None), "mm": ("m", lambda v: v / 1000), "cm": ("m", lambda v: v / 100),
+    "km": ("m", lambda v: v * 1000), "in": ("m", lambda v: v * 0.0254), "ft": ("m", lambda v: v * 0.3048),
+    "mps": ("mps", None), "m/s": ("mps", None), "kmh": ("mps", lambda v: v / 3.6),
+    "km/h": ("mps", lambda v: v / 3.6), "kph": ("mps", lambda v: v / 3.6),
+    "mph": ("mps", lambda v: v * 0.44704), "knots": ("mps", lambda v: v * 0.514444),
+    "m/s2": ("mps2", None), "m/s^2": ("mps2", None), "mps2": ("mps2", None),
+    "s": ("s", None), "sec": ("s", None), "ms": ("s", lambda v: v / 1000), "us": ("s", lambda v: v / 1e6),
+    "min": ("s", lambda v: v * 60), "hr": ("s", lambda v: v * 3600),
+    "hz": ("hz", None), "khz": ("hz", lambda v: v * 1000),
+    "v": ("v", None), "mv": ("v", lambda v: v / 1000),
+    "pct": ("pct", None), "%": ("pct", None), "percent": ("pct", None),
+    "bpm": ("bpm", None),
+}
+
+# Suffix tokens that are also ordinary words or abbreviations ("temp_min",
+# "sign_in", "rate_s") only count as units when the rest of the name says
+# which quantity is measured; bracketed units ("Depth (m)") are always taken.
+AMBIGUOUS_SUFFIXES = {"c", "f", "k", "m", "s", "in", "min", "hr", "sec", "us", "v", "pa", "bar", "ft"}
+_QUANTITY = {
+    "c": re.compile(r"temp|thermo|celsius|fahrenheit"),
+    "m": re.compile(r"dist|height|depth|alt|elev|length|width|radius|range|level|size"),
+    "s": re.compile(r"dur|elapsed|interval|period|delay|latency|uptime|dwell|offset|time"),
+    "v": re.compile(r"volt|batt|vbat|vcc|supply"),
+    "pa": re.compile(r"press|baro"),
+}
+
+_BRACKET_UNIT = re.compile(r"^(.*?)[\s_]*[\(\[]\s*([^\)\]]+?)\s*[\)\]]\s*$")
+_TIME_NAME = re.compile(r"(^|_)(time|timestamp|datetime|date|ts|epoch|recorded_at|created_at)($|_)")
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S",
+                 "%d/%m/%Y %H:%M", "%m/%d/%Y %H:%M", "%d.%m.%Y %H:%M:%S", "%Y%m%dT%H%M%S")
+_EPOCH_FLOOR = 1e8  # ~1973 in seconds; smaller numbers in a "time" column are durations
+
+
+def split_unit(column):
+    """
+    'Pressure (kPa)' -> ('pressure', 'kpa'); 'temp_f' -> ('temp', 'f');
+    'temp_min' -> ('temp_min', None); 'humidity' -> ('humidity', None)
+    """
+    match = _BRACKET_UNIT.match(str(column))
+    if match and match.group(2).strip().lower() in UNITS:
+        return snake(match.group(1)), match.group(2).strip().lower()
+    name = snake(column)
+    if "_" in name:
+        base, token = name.rsplit("_", 1)
+        if token in UNITS and token not in AMBIGUOUS_SUFFIXES:
+            return base, token
+        quantity = _QUANTITY.get(UNITS.get(token, (None,))[0])
+        if token in AMBIGUOUS_SUFFIXES and quantity and quantity.search(base):
+            return base, token
+    return name, None
+
+
+def parse_timestamp(value):
+    """ISO/common date string or epoch s/ms/us number -> UTC epoch milliseconds, or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if abs(value) < _EPOCH_FLOOR:
+            return None
+        scale = 1e-3 if abs(value) > 1e14 else 1 if abs(value) > 1e11 else 1000
+        return int(value * scale)
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return parse_timestamp(float(text))
+    except ValueError:
+        pass
+    dt = None
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        for fmt in _TIME_FORMATS:
+            try:
+                dt = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # Naive timestamps are taken as UTC.
+    return int(dt.timestamp() * 1000)
+
+# ---------------------------------------------------------------------------
+# Schema inference
+# ---------------------------------------------------------------------------
+
+def _is_null(value):
+    return value is None or (isinstance(value, str) and value.strip().lower() in NULL_TOKENS)
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "yes", "on"):
+        return True
+    if text in ("false", "no", "off"):
+        return False
+    raise ValueError(value)
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(value)
+        return int(value)
+    return int(str(value).strip())
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return float(value)
+
+
+def _to_timestamp(value):
+    ms = parse_timestamp(value)
+    if ms is None:
+        raise ValueError(value)
+    return ms
+
+
+def _to_string(value):
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+CASTS = {"bool": _to_bool, "int": _to_int, "float": _to_float, "timestamp": _to_timestamp, "string": _to_string}
+
+
+def _fits(cast, values, threshold=1.0):
+    ok = 0
+    for value in values:
+        try:
+            cast(value)
+            ok += 1
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return bool(values) and ok >= threshold * len(values)
+
+
+class Column:
+    def __init__(self, source, name, kind, unit=None, canonical_unit=None, convert=None):
+        self.source = source
+        self.name = name
+        self.kind = kind
+        self.unit = unit
+        self.canonical_unit = canonical_unit
+        self.convert = convert
+
+    def describe(self):
+        info = {"name": self.name, "source_column": self.source, "type": self.kind}
+        if self.unit:
+            info["unit"] = self.canonical_unit
+            if self.convert:
+                info["converted_from"] = self.unit
+        return info
+
+
+def infer_column(source, values):
+    """Pick the narrowest type that fits every sampled (non-null) value."""
+    values = [v for v in values if not _is_null(v)]
+    base, unit = split_unit(source)
+    time_named = bool(_TIME_NAME.search(snake(source)))
+    if time_named and _fits(_to_timestamp, values, 0.95):
+        return Column(source, base if unit in (None, "s", "ms", "us") else snake(source), "timestamp")
+    if _fits(_to_bool, values):
+        return Column(source, snake(source), "bool")
+    for kind in ("int", "float"):
+        if _fits(CASTS[kind], values):
+            if unit:
+                canonical, convert = UNITS[unit]
+                return Column(source, f"{base}_{canonical}", "float" if convert else kind,
+                              unit, canonical, convert)
+            return Column(source, snake(source), kind)
+    if values and _fits(_to_timestamp, values, 0.95) and all(isinstance(v, str) for v in values):
+        return Column(source, snake(source), "timestamp")
+    return Column(source, snake(source), "string")
+
+
+class SensorSchema:
+    """Fixed per-file schema; rows that do not fit become nulls and are counted, not dropped."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        seen = set()
+        for col in columns:
+            while col.name in seen or col.name in ("_source", "_row"):
+                col.name += "_"
+            seen.add(col.name)
+        self.cast_errors = {}
+        self.unknown_columns = set()
+        self.time_range = [None, None]
+
+    @classmethod
+    def infer(cls, sample):
+        names = list(dict.fromkeys(key for row in sample for key in row))
+        return cls([infer_column(name, [row.get(name) for row in sample]) for name in names])
+
+    def convert(self, row):
+        out = {}
+        for col in self.columns:
+            value = row.get(col.source)
+            if _is_null(value):
+                out[col.name] = None
+                continue
+            try:
+                value = CASTS[col.kind](value) if not col.convert else col.convert(_to_float(value))
+            except (ValueError, TypeError, OverflowError):
+                self.cast_errors[col.name] = self.cast_errors.get(col.name, 0) + 1
+                value = None
+            if col.kind == "timestamp" and value is not None:
+                lo, hi = self.time_range
+                self.time_range = [value if lo is None else min(lo, value), value if hi is None else max(hi, value)]
+            out[col.name] = value
+        if len(row) > len(self.columns):
+            self.unknown_columns.update(k for k in row if k not in {c.source for c in self.columns})
+        return out
+
+    def arrow_schema(self, provenance):
+        types = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(),
+                 "timestamp": pa.timestamp("ms", tz="UTC"), "string": pa.string()}
+        fields = [pa.field(c.name, types[c.kind]) for c in self.columns]
+        fields += [pa.field("_source", pa.string()), pa.field("_row", pa.int64())]
+        return pa.schema(fields, metadata={"text2llm.provenance": json.dumps(provenance)})
+
+    def describe(self):
+        return [c.describe() for c in self.columns]
+
+# ---------------------------------------------------------------------------
+# Streaming readers
+# ---------------------------------------------------------------------------
+
+def open_source(source, timeout=60):
+    """Binary stream for a local path or http(s) URL, gunzipping .gz / gzip-encoded bodies."""
+    if source.startswith(("http://", "https://")):
+        req = urllib.request.Request(source, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+        stream = urllib.request.urlopen(req, timeout=timeout)
+        gzipped = stream.headers.get("Content-Encoding") == "gzip"
+    else:
+        stream = open(source, "rb")
+        gzipped = False
+    stream = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+    if gzipped or stream.peek(2)[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def _source_kind(source):
+    path = urlsplit(source).path.lower()
+    if path.endswith(".gz"):
+        path = path[:-3]
+    return "json" if path.endswith((".json", ".jsonl", ".ndjson")) else "csv"
+
+
+def iter_csv_rows(text):
+    head = text.read(TEXT_CHUNK) + text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(head[:TEXT_CHUNK], delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(itertools.chain(io.StringIO(head), text), dialect)
+    header = next(reader, None)
+    if not header:
+        return
+    header = [h.strip() or f"col_{i}" for i, h in enumerate(header)]
+    for values in reader:
+        if values:
+            yield dict(zip(header, values))
+
+
+_JSON_GAP = re.compile(r"[\s,]*")
+
+
+class _JsonStream:
+    """Chunked text reader for incremental raw_decode; only the undecoded tail is buffered."""
+
+    def __init__(self, text):
+        self.text = text
+        self.buf, self.pos, self.eof = "", 0, False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.text.read(TEXT_CHUNK)
+        self.eof = not data
+        self.buf, self.pos = self.buf[self.pos:] + data, 0
+
+    def peek(self):
+        """Next character after whitespace and commas ('' at end of input), not consumed."""
+        while True:
+            self.pos = _JSON_GAP.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def take(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"expected {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number at the very end of the buffer may continue in the next chunk.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill()
+
+    def is_ndjson(self, limit=16 * TEXT_CHUNK):
+        """
+        True when the first line (within `limit` characters) holds one complete
+        value and another value follows on a later line. The cursor is not moved.
+        """
+        self.peek()
+        while self.buf.find("\n", self.pos) < 0 and not self.eof and len(self.buf) - self.pos < limit:
+            self._fill()
+        end = self.buf.find("\n", self.pos)
+        if end < 0:
+            return False
+        try:
+            _, stop = self.decoder.raw_decode(self.buf[:end], self.pos)
+        except json.JSONDecodeError:
+            return False
+        if self.buf[stop:end].strip(" \t\r,"):
+            return False
+        rest = end - self.pos
+        while True:
+            after = _JSON_GAP.match(self.buf, self.pos + rest).end()
+            if after < len(self.buf):
+                return True
+            if self.eof:
+                return False
+            rest = len(self.buf) - self.pos
+            self._fill()
+
+    def array(self):
+        """Elements of the array starting at the cursor, one at a time."""
+        self.take("[")
+        while self.peek() not in ("]", ""):
+            yield self.value()
+        self.take("]")
+
+    def object(self):
+        """
+        Members of the object at the cursor. The first member holding a list of
+        objects ({"meta": ..., "data": [{...}, ...]}) is streamed element by
+        element as the rows; otherwise the object itself is the single row.
+        """
+        self.take("{")
+        members, wrapped = {}, False
+        while self.peek() not in ("}", ""):
+            key = self.value()
+            self.take(":")
+            if not wrapped and self.peek() == "[":
+                items = self.array()
+                first = next(items, None)
+                if isinstance(first, dict):
+                    wrapped = True
+                    yield first
+                    yield from items
+                    continue
+                members[key] = ([] if first is None else [first]) + list(items)
+            else:
+                members[key] = self.value()
+        self.take("}")
+        if not wrapped:
+            yield members
+
+
+def iter_json_values(text, ndjson=None):
+    """
+    Yield the elements of a top-level JSON array, the rows of a single wrapped
+    {"data": [...]} document, or consecutive top-level values (NDJSON; detected
+    from the first line unless `ndjson` is given), decoding one value at a time
+    so the file is never held whole. Only a lone top-level document is
+    unwrapped: NDJSON rows and array elements are yielded as they are.
+    """
+    stream = _JsonStream(text)
+    first = stream.peek()
+    if ndjson is None:
+        ndjson = stream.is_ndjson()
+    if not ndjson:
+        if first == "[":
+            yield from stream.array()
+            return
+        if first == "{":
+            yield from stream.object()
+            first = stream.peek()
+    while first:
+        yield stream.value()
+        first = stream.peek()
+
+
+def _flatten(value, prefix=""):
+    out = {}
+    for key, item in value.items():
+        name = f"{prefix}{key}"
+        if isinstance(item, dict):
+            out.update(_flatten(item, f"{name}_"))
+        else:
+            out[name] = item
+    return out
+
+
+def iter_json_rows(text, ndjson=None):
+    for value in iter_json_values(text, ndjson):
+        if isinstance(value, dict):
+            yield _flatten(value)
+        elif isinstance(value, list):
+            yield {f"col_{i}": v for i, v in enumerate(value)}
+
+
+def iter_rows(source):
+    stream = open_source(source)
+    with io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="") as text:
+        if _source_kind(source) == "csv":
+            yield from iter_csv_rows(text)
+        else:
+            path = urlsplit(source).path.lower()
+            yield from iter_json_rows(text, True if path.endswith((".jsonl", ".ndjson", ".jsonl.gz", ".ndjson.gz")) else None)
+
+# ---------------------------------------------------------------------------
+# Shard writers
+# ---------------------------------------------------------------------------
+
+class ShardWriter:
+    """Appends converted chunks to `<stem>.part-NNNNN.<ext>`, rotating every shard_rows rows."""
+
+    def __init__(self, stem, schema, provenance, fmt="parquet", shard_rows=SHARD_ROWS):
+        if fmt != "jsonl" and pa is None:
+            log("WARNING: pyarrow not installed. Writing typed JSONL shards instead.")
+            fmt = "jsonl"
+        self.stem = stem
+        self.schema = schema
+        self.provenance = provenance
+        self.fmt = fmt
+        self.shard_rows = shard_rows
+        self.shards = {}
+        self._writer = None
+        self._path = None
+        self._arrow_schema = schema.arrow_schema(provenance) if fmt != "jsonl" else None
+
+    def _open(self):
+        self.close()
+        ext = {"parquet": "parquet", "arrow": "arrow", "jsonl": "jsonl"}[self.fmt]
+        self._path = f"{self.stem}.part-{len(self.shards):05d}.{ext}"
+        self.shards[self._path] = 0
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(self._path, self._arrow_schema, compression="zstd")
+        elif self.fmt == "arrow":
+            self._sink = pa.OSFile(self._path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self._arrow_schema)
+        else:
+            self._writer = open(self._path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        while rows:
+            if self._writer is None or self.shards[self._path] >= self.shard_rows:
+                self._open()
+            room = self.shard_rows - self.shards[self._path]
+            batch, rows = rows[:room], rows[room:]
+            if self.fmt == "jsonl":
+                for row in batch:
+                    for col in self.schema.columns:
+                        if col.kind == "timestamp" and row[col.name] is not None:
+                            row[col.name] = datetime.fromtimestamp(row[col.name] / 1000, timezone.utc).isoformat()
+                    self._writer.write(json.dumps(row, ensure_ascii=False) + "\n")
+            else:
+                columns = {f.name: [row[f.name] for row in batch] for f in self._arrow_schema}
+                self._writer.write_table(pa.Table.from_pydict(columns, schema=self._arrow_schema))
+            self.shards[self._path] += len(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            if self.fmt == "arrow":
+                self._sink.close()
+            self._writer = None
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def ingest_source(source, stem, fmt="parquet", sample_rows=SAMPLE_ROWS, chunk_rows=CHUNK_ROWS,
+                  shard_rows=SHARD_ROWS, provenance=None):
+    """Stream one CSV/JSON source into typed shards; returns its manifest entry."""
+    provenance = {"source": source, **(provenance or {})}
+    rows = iter_rows(source)
+    sample = list(itertools.islice(rows, sample_rows))
+    if not sample:
+        return {**provenance, "status": "empty", "rows": 0}
+    schema = SensorSchema.infer(sample)
+    provenance["schema"] = schema.describe()
+    writer = ShardWriter(stem, schema, provenance, fmt, shard_rows)
+    count = 0
+    try:
+        stream = itertools.chain(sample, rows)
+        while True:
+            chunk = list(itertools.islice(stream, chunk_rows))
+            if not chunk:
+                break
+            converted = []
+            for row in chunk:
+                out = schema.convert(row)
+                out["_source"] = source
+                out["_row"] = count
+                converted.append(out)
+                count += 1
+            writer.write(converted)
+    finally:
+        writer.close()
+    entry = {**provenance, "status": "ok", "rows": count, "format": writer.fmt,
+             "shards": [{"path": os.path.basename(p), "rows": n} for p, n in writer.shards.items()]}
+    if schema.cast_errors:
+        entry["cast_errors"] = schema.cast_errors
+    if schema.unknown_columns:
+        entry["columns_not_in_sample"] = sorted(schema.unknown_columns)
+    if schema.time_range[0] is not None:
+        entry["time_range"] = [datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat()
+                               for ms in schema.time_range]
+    return entry
+
+
+def collect_sources(inputs):
+    """(source, provenance) pairs from download manifests, scrape JSONL output, paths or URLs."""
+    sources = []
+    for value in inputs:
+        if value.endswith(".json") and os.path.exists(value):
+            with open(value, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            if isinstance(data, dict) and "files" in data:
+                base = os.path.dirname(os.path.abspath(value))
+                for entry in data["files"]:
+                    if entry.get("status") != "ok":
+                        continue
+                    for rel in [entry["path"]] + entry.get("unpacked", []):
+                        if rel.lower().removesuffix(".gz").endswith(SENSOR_SUFFIXES):
+                            sources.append((os.path.join(base, rel),
+                                            {"url": entry["url"], "sha256": entry.get("sha256"),
+                                             "found_on": entry.get("source")}))
+                continue
+        if value.endswith(".jsonl") and os.path.exists(value):
+            from download_manager import read_items
+            items = read_items(value)
+            if items:
+                for item in items:
+                    if urlsplit(item["url"]).path.lower().removesuffix(".gz").endswith(SENSOR_SUFFIXES):
+                        sources.append((item["url"], {"url": item["url"], "found_on": item.get("source")}))
+                continue
+        sources.append((value, {}))
+    return sources
+
+
+def run_ingest(inputs, output_dir, name, fmt="parquet", sample_rows=SAMPLE_ROWS, chunk_rows=CHUNK_ROWS,
+               shard_rows=SHARD_ROWS):
+    out_dir = os.path.join(output_dir, f"sensor_{name}")
+    manifest_path = os.path.join(output_dir, f"sensor_{name}_manifest.json")
+    os.makedirs(out_dir, exist_ok=True)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            previous = {e["source"]: e for e in json.load(fh).get("sources", []) if e.get("status") == "ok"}
+
+    sources = collect_sources(inputs)
+    if not sources:
+        log("ERROR: No CSV/JSON sensor files found in the input.")
+        return None
+    entries = []
+    used = set()
+    for source, provenance in sources:
+        if source in previous:
+            entries.append(previous[source])
+            continue
+        stem_name = snake(os.path.basename(urlsplit(source).path).split(".")[0]) or "source"
+        while stem_name in used:
+            stem_name += "_"
+        used.add(stem_name)
+        log(f"Ingesting {source}")
+        started = time.monotonic()
+        try:
+            entry = ingest_source(source, os.path.join(out_dir, stem_name), fmt, sample_rows, chunk_rows,
+                                  shard_rows, provenance)
+        except (OSError, ValueError, csv.Error) as e:
+            log(f"Failed {source}: {e}")
+            entry = {"source": source, **provenance, "status": "failed", "error": str(e)}
+        entry["elapsed_s"] = round(time.monotonic() - started, 2)
+        if entry["status"] == "ok":
+            log(f"  {entry['rows']} rows, {len(entry['schema'])} columns → {len(entry['shards'])} shard(s)")
+        entries.append(entry)
+
+    manifest = {
+        "name": name,
+        "output_dir": os.path.basename(out_dir),
+        "sources": entries,
+        "total_rows": sum(e.get("rows", 0) for e in entries),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    log(f"{manifest['total_rows']} rows from {len(entries)} source(s) → {manifest_path}")
+    return manifest_path
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – Sensor File Ingestion")
+    parser.add_argument("--input", required=True, nargs="+",
+                        help="downloads_manifest.json, scrape JSONL output, CSV/JSON paths or URLs")
+    parser.add_argument("--output-dir", default="./output", help="Directory to write results")
+    parser.add_argument("--name", default="", help="Output name (default: timestamp)")
+    parser.add_argument("--format", default="parquet", choices=["parquet", "arrow", "jsonl"])
+    parser.add_argument("--sample-rows", type=int, default=SAMPLE_ROWS, help="Rows used for schema inference")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows converted and written per batch")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS, help="Rows per output shard")
+    args = parser.parse_args()
+
+    name = args.name or time.strftime("%Y%m%d_%H%M%S")
+    if not run_ingest(args.input, args.output_dir, name, args.format, args.sample_rows, args.chunk_rows,
+                      args.shard_rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
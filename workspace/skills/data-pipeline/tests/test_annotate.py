@@ -0,0 +1,82 @@
+import json
+import re
+import time
+
+from annotate import RateBudget, annotate_records, make_batches
+from test_llm_client import make_client, provider  # noqa: F401  (fixture)
+
+LABELS = ["positive", "negative"]
+FAST = {"mode": "labels", "labels": LABELS, "requests_per_minute": 0}
+
+
+def labeller(server, max_items=None):
+    """Label every item; reply with junk to batches above max_items."""
+    server.calls, server.started = [], []
+
+    def respond(prompt):
+        ids = [int(i) for i in re.findall(r"^### Item (\d+)$", prompt, re.M)]
+        server.calls.append(len(ids))
+        server.started.append(time.monotonic())
+        if max_items and len(ids) > max_items:
+            return "Sorry, that is too many items."
+        return json.dumps([{"id": i, "label": "positive"} for i in ids])
+
+    server.respond = respond
+
+
+def records(n):
+    return [{"text": f"record number {i}"} for i in range(n)]
+
+
+def test_make_batches_bounds_count_and_chars():
+    items = [(str(i), "x" * 10) for i in range(7)]
+    assert [len(b) for b in make_batches(items, 3, 1000)] == [3, 3, 1]
+    assert [len(b) for b in make_batches(items, 10, 25)] == [2, 2, 2, 1]
+    # An item larger than the character budget still gets a batch of its own.
+    assert [len(b) for b in make_batches([("a", "x" * 50)], 10, 25)] == [1]
+
+
+def test_records_are_packed_into_batches(provider):
+    labeller(provider)
+    rows = records(10)
+    stats = annotate_records(rows, make_client(provider), batch_size=4, **FAST)
+    assert sorted(provider.calls) == [2, 4, 4]
+    assert stats["requests"] == 3 and stats["annotated_records"] == 10
+    assert all(r["label"] == "positive" for r in rows)
+
+
+def test_unusable_reply_splits_the_batch(provider):
+    labeller(provider, max_items=2)
+    rows = records(8)
+    stats = annotate_records(rows, make_client(provider), batch_size=8, concurrency=1, **FAST)
+    assert sorted(provider.calls) == [2, 2, 2, 2, 4, 4, 8]
+    assert stats["annotated_records"] == 8 and stats["unannotated_records"] == 0
+
+
+def test_rerun_is_served_from_cache(provider, tmp_path):
+    labeller(provider)
+    cache = str(tmp_path / "cache.jsonl")
+    annotate_records(records(6), make_client(provider), cache_path=cache, **FAST)
+    sent = len(provider.calls)
+    rows = records(6)
+    stats = annotate_records(rows, make_client(provider), cache_path=cache, **FAST)
+    assert len(provider.calls) == sent
+    assert stats["cache_hits"] == 6 and stats["requests"] == 0
+    assert all(r["label"] == "positive" for r in rows)
+
+
+def test_requests_per_minute_budget_spaces_requests(provider):
+    labeller(provider)
+    annotate_records(records(4), make_client(provider), mode="labels", labels=LABELS,
+                     batch_size=1, concurrency=4, requests_per_minute=600)
+    started = sorted(provider.started)
+    assert len(started) == 4
+    assert all(b - a >= 0.08 for a, b in zip(started, started[1:]))
+
+
+def test_rate_budget_disabled_without_limit():
+    budget = RateBudget(0)
+    begin = time.monotonic()
+    for _ in range(100):
+        budget.wait()
+    assert time.monotonic() - begin < 0.05
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import arxiv_harvest
+import autonomous_dataset
+from autonomous_dataset import SeenUrls, as_queries, collect_arxiv, collect_wikipedia, url_key
+
+
+def test_url_key_canonicalises_equivalent_urls():
+    assert url_key("https://WWW.Example.com/a/b/?utm_source=x&b=2&a=1#top") == "example.com/a/b?a=1&b=2"
+    assert url_key("http://example.com/a/b?a=1&fbclid=z&b=2") == "example.com/a/b?a=1&b=2"
+    assert url_key("https://example.com") == url_key("https://example.com/") == "example.com/"
+    assert url_key("https://example.com/a?b=1") != url_key("https://example.com/a?b=2")
+
+
+def test_seen_urls_claims_each_url_once_per_run():
+    seen = SeenUrls()
+    assert seen.claim("https://example.com/x", "reddit")
+    assert not seen.claim("https://www.example.com/x/?utm_medium=feed", "news")
+    assert seen.claim("", "news") and seen.claim("", "news")
+    assert seen.stats() == {
+        "unique_urls": 1,
+        "claimed_per_source": {"reddit": 1},
+        "skipped_duplicates_per_source": {"news": 1},
+    }
+
+
+def test_seen_urls_is_thread_safe():
+    seen = SeenUrls()
+    urls = [f"https://example.com/{i % 50}" for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        won = sum(pool.map(seen.claim, urls))
+    assert won == 50 and seen.stats()["unique_urls"] == 50
+
+
+def test_as_queries_accepts_strings_and_lists():
+    assert as_queries("  solar power ") == ["solar power"]
+    assert as_queries(["a", "b", "a", " "]) == ["a", "b"]
+    assert as_queries(None) == []
+
+
+def test_wikipedia_fetches_each_page_once_across_queries(monkeypatch):
+    fetched = []
+
+    def http_get_json(url, headers=None, timeout=30):
+        params = parse_qs(urlparse(url).query)
+        if "srsearch" in params:
+            hits = {"q1": [1, 2], "q2": [2, 3]}[params["srsearch"][0]]
+            return {"query": {"search": [{"pageid": i, "title": f"Page {i}"} for i in hits]}}
+        page_id = params["pageids"][0]
+        fetched.append(page_id)
+        return {"query": {"pages": {page_id: {"extract": "word " * 100}}}}
+
+    monkeypatch.setattr(autonomous_dataset, "http_get_json", http_get_json)
+    seen = SeenUrls()
+    seen.claim("https://en.wikipedia.org/wiki/Page_3", "news")
+    records = collect_wikipedia(["q1", "q2"], seen=seen)
+    assert sorted(fetched) == ["1", "2"]
+    assert {r["url"] for r in records} == {"https://en.wikipedia.org/wiki/Page_1",
+                                           "https://en.wikipedia.org/wiki/Page_2"}
+    assert seen.stats()["skipped_duplicates_per_source"] == {"wikipedia": 1}
+
+
+def test_collect_arxiv_stops_at_target(monkeypatch):
+    calls = []
+
+    def harvest_search(q, limit, throttle=None):
+        calls.append(q)
+        for i in range(limit):
+            yield {"url": f"http://arxiv.org/abs/{q}-{i}", "text": "abstract"}
+
+    monkeypatch.setattr(arxiv_harvest, "harvest_search", harvest_search)
+    records = collect_arxiv(["q1", "q2", "q3"], max_records=30, bulk_records=30)
+    assert len(records) == 30
+    assert calls == ["q1", "q2", "q3"]
+    calls.clear()
+    records = collect_arxiv(["q1", "q2", "q3"], max_records=40)
+    assert len(records) == 40 and calls == ["q1"]
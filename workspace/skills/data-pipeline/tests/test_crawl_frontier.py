@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from crawl_frontier import BloomFilter, Frontier, canonicalize_url, run_crawl
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("HTTP://Example.COM:80/a/./b/../c?utm_source=x&b=2&a=1#frag", "http://example.com/a/c?a=1&b=2"),
+    ("https://example.com:443", "https://example.com/"),
+    ("https://example.com:8443/x/", "https://example.com:8443/x/"),
+    ("https://example.com/a//b/", "https://example.com/a/b/"),
+    ("https://example.com/caf%C3%A9 menu", "https://example.com/caf%C3%A9%20menu"),
+    ("https://example.com/p?gclid=1&q=", "https://example.com/p?q="),
+    ("https://bücher.example/", "https://xn--bcher-kva.example/"),
+    ("mailto:someone@example.com", ""),
+    ("javascript:void(0)", ""),
+    ("https://example.com:notaport/", ""),
+])
+def test_canonicalize_url(raw, expected):
+    assert canonicalize_url(raw) == expected
+
+
+def test_canonicalize_relative_url():
+    assert canonicalize_url("../b?x=1", base="https://example.com/a/c/") == "https://example.com/a/b?x=1"
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    urls = [f"https://example.com/page/{i}" for i in range(5000)]
+    assert all(bloom.add(u) for u in urls[:10])
+    for u in urls[10:]:
+        bloom.add(u)
+    assert all(u in bloom for u in urls)
+    assert not bloom.add(urls[0])
+    false_positives = sum(f"https://other.org/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_save_and_load(tmp_path):
+    bloom = BloomFilter(capacity=1000)
+    for i in range(100):
+        bloom.add(f"u{i}")
+    path = str(tmp_path / "visited.bloom")
+    bloom.save(path)
+    loaded = BloomFilter.load(path)
+    assert len(loaded) == 100 and all(f"u{i}" in loaded for i in range(100))
+
+    with open(path, "ab") as fh:
+        fh.write(b"\0")
+    with pytest.raises(ValueError):
+        BloomFilter.load(path)
+
+
+def test_push_dedups_and_filters():
+    frontier = Frontier(max_depth=1, allowed_hosts={"a.com", "b.com"},
+                        accept=lambda url: "/private" not in url)
+    assert frontier.push("https://a.com/x?utm_medium=1") == "https://a.com/x"
+    assert frontier.push("https://A.com/x#top") is None
+    assert frontier.push("https://a.com/deep", depth=2) is None
+    assert frontier.push("https://c.com/") is None
+    assert frontier.push("https://b.com/private") is None
+    assert frontier.rejected == 1
+    assert len(frontier) == 1
+
+
+def test_per_host_concurrency_and_priority():
+    frontier = Frontier(per_host_concurrency=2)
+    for i, prio in enumerate([3, 1, 2]):
+        frontier.push(f"https://a.com/{i}", priority=prio)
+    frontier.push("https://b.com/0", priority=5)
+
+    first = [frontier.pop(now=0) for _ in range(4)]
+    assert [item.url if item else None for item in first] == [
+        "https://a.com/1", "https://a.com/2", "https://b.com/0", None]
+    assert frontier.in_flight == 3
+    assert frontier.next_ready_in(now=0) is None
+
+    frontier.done(first[0])
+    assert frontier.pop(now=0).url == "https://a.com/0"
+
+
+def test_crawl_delay_spaces_dispatches_per_host():
+    frontier = Frontier(per_host_concurrency=4, crawl_delay=1.0)
+    frontier.set_crawl_delay("slow.com", 5.0)
+    for i in range(2):
+        frontier.push(f"https://a.com/{i}")
+        frontier.push(f"https://slow.com/{i}")
+
+    assert {frontier.pop(now=0).url, frontier.pop(now=0).url} == {"https://a.com/0", "https://slow.com/0"}
+    assert frontier.pop(now=0.5) is None
+    assert frontier.next_ready_in(now=0.5) == pytest.approx(0.5)
+    assert frontier.pop(now=1.0).url == "https://a.com/1"
+    assert frontier.pop(now=4.9) is None
+    assert frontier.pop(now=5.0).url == "https://slow.com/1"
+
+
+def test_snapshot_requeues_in_flight_items():
+    frontier = Frontier()
+    for i in range(3):
+        frontier.push(f"https://a.com/{i}", depth=i)
+    item = frontier.pop(now=0)
+    snap = frontier.snapshot()
+    assert sorted(url for url, _, _ in snap["pending"]) == [f"https://a.com/{i}" for i in range(3)]
+
+    resumed = Frontier(visited=frontier.visited)
+    resumed.restore(snap)
+    assert len(resumed) == 3 and resumed.dispatched == 1
+    assert resumed.push(item.url) is None
+
+
+def test_run_crawl_respects_per_host_limit():
+    frontier = Frontier(per_host_concurrency=2)
+    for host in ("a.com", "b.com"):
+        frontier.push(f"https://{host}/")
+    peak = {}
+    current = {}
+    checkpoints = []
+
+    async def process(item):
+        host = item.url.split("/")[2]
+        current[host] = current.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), current[host])
+        await asyncio.sleep(0.01)
+        current[host] -= 1
+        if item.depth < 2:
+            return [(f"{item.url}{item.depth}{i}/", item.depth + 1) for i in range(3)]
+        return []
+
+    asyncio.run(run_crawl(frontier, process, concurrency=16, on_checkpoint=lambda: checkpoints.append(1),
+                          checkpoint_every=5))
+    assert frontier.dispatched == 2 * (1 + 3 + 9)
+    assert peak == {"a.com": 2, "b.com": 2}
+    assert len(frontier) == 0 and frontier.in_flight == 0
+    assert len(checkpoints) == 26 // 5 + 1
+
+
+def test_run_crawl_stops_at_max_pages():
+    frontier = Frontier(per_host_concurrency=8)
+    frontier.push("https://a.com/")
+
+    async def process(item):
+        return [(f"{item.url}{i}/", item.depth + 1) for i in range(5)]
+
+    asyncio.run(run_crawl(frontier, process, concurrency=4, max_pages=10))
+    assert frontier.dispatched == 10
@@ -0,0 +1,54 @@
+import json
+
+import scrape
+from distributed_crawl import SharedFrontier, init_store, run_worker
+
+
+def make_frontier(tmp_path, urls, **kwargs):
+    frontier = SharedFrontier(str(tmp_path / "crawl.db"), **kwargs)
+    frontier.add([(url, 0, None) for url in urls])
+    return frontier
+
+
+def test_per_host_cap_spans_workers(tmp_path):
+    a_urls = [f"https://a.example/{i}" for i in range(10)]
+    frontier = make_frontier(tmp_path, a_urls + ["https://b.example/1"])
+    first = frontier.lease("w1", 10, per_host=2)
+    assert sum(url.startswith("https://a.") for url, _, _ in first) == 2
+    second = frontier.lease("w2", 10, per_host=2)
+    assert [url for url, _, _ in second] == []  # a.example is at its cap, b.example already leased
+    assert frontier.complete("w1", first[0][0])
+    third = frontier.lease("w2", 10, per_host=2)
+    assert len(third) == 1 and third[0][0].startswith("https://a.")
+    frontier.close()
+
+
+def test_crawl_delay_host_leases_one_at_a_time(tmp_path):
+    frontier = make_frontier(tmp_path, [f"https://slow.example/{i}" for i in range(5)])
+    frontier.set_crawl_delay("slow.example", 5)
+    assert len(frontier.lease("w1", 5, per_host=4)) == 1
+    frontier.db.execute("UPDATE hosts SET next_time = 0")  # delay elapsed, first lease still out
+    assert frontier.lease("w2", 5, per_host=4) == []
+    frontier.close()
+
+
+def test_expired_leases_free_the_host(tmp_path):
+    frontier = make_frontier(tmp_path, [f"https://a.example/{i}" for i in range(4)], lease_seconds=-1)
+    assert len(frontier.lease("w1", 4, per_host=2)) == 2
+    # w1's leases are already expired, so w2 can take the host over.
+    assert len(frontier.lease("w2", 4, per_host=2)) == 2
+    frontier.close()
+
+
+def test_worker_applies_focus_like_scrape(tmp_path, monkeypatch):
+    links = ["/clips/a.wav", "/notes.html", "https://cdn.example/b.mp3"]
+    monkeypatch.setattr(scrape, "fetch_and_extract",
+                        lambda url, max_chars: (200, url, "Main text of the page.", links, {}))
+    store = str(tmp_path / "crawl.db")
+    init_store(store, ["https://a.example/"], 0, focus="audio", obey_robots=False)
+    shard = run_worker(store, str(tmp_path / "out"), worker_id="w1")
+    with open(shard, encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert len(records) == 1 and records[0]["focus"] == "audio"
+    assert json.loads(records[0]["text"]) == ["/clips/a.wav", "https://cdn.example/b.mp3"]
+    assert records[0]["text"] == scrape.focus_content("audio", "Main text of the page.", links)
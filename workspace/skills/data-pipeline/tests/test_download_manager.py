@@ -0,0 +1,122 @@
+import base64
+import hashlib
+import http.server
+import io
+import os
+import re
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+import download_manager
+from download_manager import DownloadManager, _safe_join, unpack
+
+
+def test_safe_join_relative_root():
+    assert _safe_join("./output/files/data", "a/b.csv") == os.path.normpath("output/files/data/a/b.csv")
+
+
+def test_safe_join_rejects_escapes():
+    assert _safe_join("./output/files/data", "../../etc/passwd") is None
+    assert _safe_join("./output/files/data", "/etc/passwd") is None
+    assert _safe_join("./output/files/data", "../data-evil/x") is None
+    assert _safe_join("./output/files/data", ".") is None
+
+
+def test_unpack_into_relative_dest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with tarfile.open("data.tar.gz", "w:gz") as tar:
+        for name, body in (("a/b.csv", b"x,y\n1,2\n"), ("../evil.txt", b"no")):
+            info = tarfile.TarInfo(name)
+            info.size = len(body)
+            tar.addfile(info, io.BytesIO(body))
+    with zipfile.ZipFile("media.zip", "w") as zf:
+        zf.writestr("clips/one.wav", b"RIFF")
+
+    assert unpack("data.tar.gz", "out/data") == [os.path.normpath("out/data/a/b.csv")]
+    assert unpack("media.zip", "out/media") == [os.path.normpath("out/media/clips/one.wav")]
+    assert open("out/data/a/b.csv", "rb").read() == b"x,y\n1,2\n"
+    assert not os.path.exists("out/evil.txt")
+
+
+class RangeServer(http.server.ThreadingHTTPServer):
+    """Serves `body` with ETag, whole-body Content-MD5 on 200 and range Content-MD5 on 206."""
+
+    def __init__(self, body):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.body = body
+        self.etag = '"v1"'
+        self.cut_first = True
+        self.requests = []
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append(self.headers.get("Range"))
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range") or "")
+        if match and self.headers.get("If-Range") in (None, srv.etag):
+            start = int(match.group(1))
+            chunk = srv.body[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(srv.body) - 1}/{len(srv.body)}")
+        else:
+            chunk = srv.body
+            self.send_response(200)
+        self.send_header("ETag", srv.etag)
+        self.send_header("Content-MD5", base64.b64encode(hashlib.md5(chunk).digest()).decode())
+        self.send_header("Content-Length", str(len(chunk)))
+        self.end_headers()
+        if srv.cut_first:
+            # Drop the connection halfway through the first transfer.
+            srv.cut_first = False
+            chunk = chunk[:len(chunk) // 2]
+        self.wfile.write(chunk)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def range_server(monkeypatch):
+    monkeypatch.setattr(download_manager.time, "sleep", lambda s: None)
+    server = RangeServer(os.urandom(300_000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_resumed_download_verifies_whole_file_md5(tmp_path, range_server):
+    url = f"http://127.0.0.1:{range_server.server_port}/data.bin"
+    summary = DownloadManager(str(tmp_path)).run([{"url": url}])
+    entry = summary["files"][0]
+    assert entry["status"] == "ok", entry
+    assert entry["resumed_from"] == 150_000 and entry["verified"]
+    assert range_server.requests == [None, "bytes=150000-"]
+    assert (tmp_path / "data.bin").read_bytes() == range_server.body
+    assert entry["md5"] == hashlib.md5(range_server.body).hexdigest()
+    assert not os.path.exists(tmp_path / "data.bin.part")
+
+
+def test_changed_file_restarts_instead_of_resuming(tmp_path, range_server):
+    url = f"http://127.0.0.1:{range_server.server_port}/data.bin"
+    manager = DownloadManager(str(tmp_path), retries=0)
+    assert manager.run([{"url": url}])["failed"] == 1
+    range_server.body, range_server.etag = os.urandom(1000), '"v2"'
+    summary = DownloadManager(str(tmp_path)).run([{"url": url}])
+    assert summary["ok"] == 1 and "resumed_from" not in summary["files"][0]
+    assert (tmp_path / "data.bin").read_bytes() == range_server.body
+
+
+def test_checksum_mismatch_discards_partial(tmp_path, range_server):
+    range_server.cut_first = False
+    url = f"http://127.0.0.1:{range_server.server_port}/data.bin"
+    summary = DownloadManager(str(tmp_path)).run([{"url": url, "sha256": "0" * 64}])
+    assert summary["failed"] == 1 and "sha256 mismatch" in summary["files"][0]["error"]
+    assert not os.path.exists(tmp_path / "data.bin.part") and not os.path.exists(tmp_path / "data.bin")
+    summary = DownloadManager(str(tmp_path)).run(
+        [{"url": url, "sha256": hashlib.sha256(range_server.body).hexdigest(), "size": len(range_server.body)}])
+    assert summary["ok"] == 1 and summary["files"][0]["verified"]
@@ -0,0 +1,152 @@
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+import hf_parquet  # noqa: E402
+from hf_parquet import (  # noqa: E402
+    HttpRangeFile, ReadStats, iter_records, iter_shard_rows, parse_predicate, row_group_may_match,
+)
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves files from server.root with single-range 206 responses; /hub/* redirects to /cdn/*.
+    /bare/* omits Content-Range, /nolen/* also omits Content-Length from HEAD.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _data(self):
+        return open(os.path.join(self.server.root, os.path.basename(self.path)), "rb").read()
+
+    def do_HEAD(self):
+        data = self._data()
+        self.send_response(200)
+        if not self.path.startswith("/nolen/"):
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.startswith("/hub/"):
+            self.send_response(302)
+            self.send_header("Location", "/cdn/" + self.path[len("/hub/"):])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.server.auth.append(self.headers.get("Authorization"))
+        data = self._data()
+        start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", self.headers["Range"]).groups())
+        if start >= len(data):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(data)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        end = min(end, len(data) - 1)
+        self.send_response(206)
+        if not self.path.startswith(("/bare/", "/nolen/")):
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shard_server(tmp_path):
+    rows = 40000
+    table = pa.table({
+        "id": list(range(rows)),
+        "text": [f"document {i} " + os.urandom(40).hex() for i in range(rows)],
+        "score": [i // 10000 + (i % 7) / 10 for i in range(rows)],
+        "blob": [os.urandom(100) for _ in range(rows)],
+    })
+    pq.write_table(table, tmp_path / "train-00000.parquet", row_group_size=10000)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    server.root, server.auth = str(tmp_path), []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, os.path.getsize(tmp_path / "train-00000.parquet")
+    server.shutdown()
+    server.server_close()
+
+
+def test_range_file_reads_and_seeks(shard_server):
+    server, size = shard_server
+    with open(os.path.join(server.root, "train-00000.parquet"), "rb") as fh:
+        local = fh.read()
+    rf = HttpRangeFile(f"http://127.0.0.1:{server.server_port}/hub/train-00000.parquet",
+                       headers={"Authorization": "Bearer secret"}, block_size=4096)
+    assert rf.size == size and rf.url.endswith("/cdn/train-00000.parquet")
+    assert rf.read(100) == local[:100]
+    rf.seek(-8, os.SEEK_END)
+    assert rf.read() == local[-8:]
+    rf.seek(5000)
+    assert rf.read(10000) == local[5000:15000]
+    rf.close()
+    # Same host redirect: credentials are kept.
+    assert set(server.auth) == {"Bearer secret"}
+
+
+def test_range_file_size_fallbacks(shard_server):
+    server, size = shard_server
+    root = f"http://127.0.0.1:{server.server_port}"
+    open(os.path.join(server.root, "empty.parquet"), "wb").close()
+    assert HttpRangeFile(f"{root}/cdn/empty.parquet").size == 0
+    rf = HttpRangeFile(f"{root}/bare/train-00000.parquet", block_size=4096)
+    assert rf.size == size
+    rf.seek(-4, os.SEEK_END)
+    assert rf.read() == b"PAR1"
+    with pytest.raises(OSError, match="cannot determine the size"):
+        HttpRangeFile(f"{root}/nolen/train-00000.parquet")
+
+
+def test_projection_and_row_group_skipping(shard_server):
+    server, _ = shard_server
+    url = f"http://127.0.0.1:{server.server_port}/cdn/train-00000.parquet"
+    full = ReadStats()
+    list(iter_shard_rows(url, ["id", "score", "text", "blob"], stats=full))
+    stats = ReadStats()
+    rows = list(iter_shard_rows(url, ["id", "score"], [parse_predicate("score >= 3.5")], "id", stats))
+    assert rows and all(row["score"] >= 3.5 and set(row) == {"id", "score"} for row, _, _ in rows)
+    assert {rg for _, _, rg in rows} == {3}
+    assert stats.read_row_groups == 1 and stats.skipped_row_groups == 3
+    assert full.read_row_groups == 4 and stats.bytes < full.bytes / 3
+
+
+def test_default_projection_skips_binary_columns(shard_server):
+    server, _ = shard_server
+    record = next(iter_records(None, shard_urls=[f"http://127.0.0.1:{server.server_port}/cdn/train-00000.parquet"]))
+    assert "blob" not in record["metadata"]["row_data"]
+
+
+def test_row_group_may_match(tmp_path):
+    pq.write_table(pa.table({"n": list(range(100)), "s": [f"k{i:03d}" for i in range(100)]}),
+                   tmp_path / "t.parquet", row_group_size=50)
+    meta = pq.ParquetFile(tmp_path / "t.parquet").metadata
+    index = {"n": 0, "s": 1}
+    first, second = meta.row_group(0), meta.row_group(1)
+    assert row_group_may_match(first, index, [parse_predicate("n < 10")])
+    assert not row_group_may_match(second, index, [parse_predicate("n < 10")])
+    assert not row_group_may_match(first, index, [parse_predicate("n == 75")])
+    assert row_group_may_match(second, index, [parse_predicate("s >= 'k060'")])
+    assert not row_group_may_match(first, index, [parse_predicate("s >= 'k060'")])
+    # Incomparable values never prune.
+    assert row_group_may_match(first, index, [parse_predicate("n == 'abc'")])
+    # Unknown columns never prune either.
+    assert row_group_may_match(first, {}, [parse_predicate("n == 75")])
+
+
+def test_parse_predicate():
+    assert parse_predicate("score >= 3.5") == ("score", ">=", 3.5)
+    assert parse_predicate("lang = en") == ("lang", "=", "en")
+    with pytest.raises(ValueError):
+        parse_predicate("nonsense")
+    assert hf_parquet.pick_text_column(pa.schema([("id", pa.int64()), ("content", pa.string())])) == "content"
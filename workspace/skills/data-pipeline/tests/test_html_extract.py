@@ -0,0 +1,57 @@
+import pytest
+
+import html_extract
+from html_extract import _extract_streaming, extract
+
+BODY = "This paragraph is the main body text of the article and should be kept."
+
+PAGES = {
+    "implicit_li": f"<nav><ul><li>a<li>b</ul></nav><p>{BODY}</p>",
+    "unclosed_skip": f"<div><div class='sidebar'><p>menu entry one two</div><p>{BODY}</p></div>",
+    "body_class": f"<html><body class='has-sidebar'><p>{BODY}</p></body></html>",
+    "html_id": f"<html id='main-nav'><body><p>{BODY}</p></body></html>",
+    "direct_div_text": f"<div>{BODY}</div><section>{BODY} Again.</section>",
+    "nested": f"<article><h2>A fine heading</h2><ul><li><p>{BODY}</p></li></ul>"
+              f"<div class='share-bar'><a href='/x'>share</a></div></article>",
+    "aspnet_form": f"<html><body><form id='form1' method='post' action='./'><input type='hidden' name='v'>"
+                   f"<div class='page'><p>{BODY}</p></div></form></body></html>",
+    "unclosed_head": f"<html><head><title>Page title</title><meta charset='utf-8'><p>{BODY}</p></html>",
+    "unclosed_head_body": f"<html><head><title>Page title</title><body><p>{BODY}</p></body></html>",
+    "content_id": f"<div id='main-menu-content'><p>{BODY}</p></div>",
+}
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_streaming_keeps_body_text(name):
+    text, _ = _extract_streaming(PAGES[name], 50000)
+    assert BODY in text
+
+
+def test_skip_region_ends_at_its_own_end_tag():
+    text, links = _extract_streaming(
+        "<nav><a href='/a'>a</a><ul><li>a<li>b</ul></nav><p>" + BODY + "</p>", 50000)
+    assert text == BODY
+    assert links == ["/a"]
+
+
+def test_boilerplate_tokens_are_whole_words():
+    page = (f"<div class='cookie-banner'><p>{BODY} cookie</p></div>"
+            f"<ul class='site-nav main'><li>{BODY} nav</li></ul><div id='main-menu-content'><p>{BODY}</p></div>")
+    text, _ = _extract_streaming(page, 50000)
+    assert text == BODY
+
+
+def test_max_chars_budget():
+    text, _ = _extract_streaming("".join(f"<p>{BODY}</p>" for _ in range(50)), 200)
+    assert len(text) <= 200
+
+
+@pytest.mark.skipif(html_extract.FastHTMLParser is None, reason="selectolax not installed")
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_backends_agree(name):
+    assert html_extract._extract_fast(PAGES[name], 50000)[0] == _extract_streaming(PAGES[name], 50000)[0]
+
+
+def test_extract_returns_links():
+    _, links = extract(f"<p>{BODY} <a href='/next'>next page</a></p>")
+    assert links == ["/next"]
@@ -0,0 +1,60 @@
+import email.message
+import io
+import zlib
+
+import pytest
+
+import http_fetch
+from http_fetch import SkippedResponse, _decompressor, read_capped, read_limited
+
+BOMB = b"\0" * (16 * 1024 * 1024)
+CAP = 1024 * 1024
+
+
+def _deflate(data, wbits):
+    c = zlib.compressobj(9, zlib.DEFLATED, wbits)
+    return c.compress(data) + c.flush()
+
+
+def _encoded():
+    yield "gzip", _deflate(BOMB, 16 + zlib.MAX_WBITS)
+    yield "deflate", _deflate(BOMB, zlib.MAX_WBITS)
+    yield "deflate", _deflate(BOMB, -zlib.MAX_WBITS)  # raw deflate, as some servers send it
+    if http_fetch.BROTLI_BOUNDED:
+        yield "br", http_fetch.brotli.compress(BOMB)
+
+
+class FakeResponse:
+    def __init__(self, body, encoding):
+        self.headers = email.message.Message()
+        self.headers["Content-Encoding"] = encoding
+        self._body = io.BytesIO(body)
+
+    def read(self, size):
+        return self._body.read(size)
+
+
+@pytest.mark.parametrize("encoding,payload", list(_encoded()), ids=lambda v: v if isinstance(v, str) else "")
+def test_decompression_bomb_is_capped(encoding, payload):
+    decode = _decompressor(encoding)
+    assert len(decode(payload, 1000)) <= 1000 + 64 * 1024
+    assert read_capped(FakeResponse(payload, encoding), CAP) == b"\0" * CAP
+
+
+def test_brotli_advertised_only_when_bounded():
+    assert ("br" in http_fetch.ACCEPT_ENCODING) == http_fetch.BROTLI_BOUNDED
+    if not http_fetch.BROTLI_BOUNDED:
+        with pytest.raises(SkippedResponse):
+            _decompressor("br")
+
+
+def test_plain_body_is_capped():
+    assert read_capped(FakeResponse(b"x" * 300_000, "identity"), 100_000) == b"x" * 100_000
+
+
+def test_truncation_flag():
+    assert read_limited(FakeResponse(b"x" * 1000, "identity"), 1000) == (b"x" * 1000, False)
+    assert read_limited(FakeResponse(b"x" * 1001, "identity"), 1000) == (b"x" * 1000, True)
+    gz = _deflate(b"y" * 5000, 16 + zlib.MAX_WBITS)
+    assert read_limited(FakeResponse(gz, "gzip"), 5000)[1] is False
+    assert read_limited(FakeResponse(gz, "gzip"), 4999)[1] is True
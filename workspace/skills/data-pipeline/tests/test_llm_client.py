@@ -0,0 +1,116 @@
+import http.server
+import json
+import threading
+
+import pytest
+
+from llm_client import LLMClient, LLMError
+
+
+class MockProvider(http.server.BaseHTTPRequestHandler):
+    """OpenAI-style /chat/completions that replays a scripted list of statuses.
+
+    `server.respond(prompt)` may build the reply text from the user prompt.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.peers.append(self.client_address)
+            status = server.script.pop(0) if server.script else 200
+            n = len(server.peers)
+        if status == 200:
+            prompt = request["messages"][-1]["content"]
+            content = server.respond(prompt) if server.respond else f"reply {n}"
+            body = json.dumps({
+                "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": 11, "completion_tokens": 7},
+            }).encode()
+        else:
+            body = b'{"error": "busy"}'
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MockProvider)
+    server.script, server.peers, server.respond = [], [], None
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    return LLMClient("test-key", provider="openai", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                     backoff_base=0.001, backoff_max=0.01, **kwargs)
+
+
+def test_keep_alive_connection_is_reused(provider):
+    client = make_client(provider)
+    for _ in range(3):
+        client.complete("hello")
+    client.close()
+    assert len(provider.peers) == 3
+    assert len(set(provider.peers)) == 1
+
+
+def test_retries_429_and_5xx(provider):
+    provider.script = [429, 503, 200]
+    client = make_client(provider)
+    assert client.complete("hello", purpose="label") == "reply 3"
+    summary = client.metrics.summary()
+    assert summary["calls"] == 1 and summary["retries"] == 2 and summary["failed_calls"] == 0
+
+
+def test_client_errors_are_not_retried(provider):
+    provider.script = [400]
+    client = make_client(provider)
+    with pytest.raises(LLMError) as excinfo:
+        client.complete("hello")
+    assert excinfo.value.status == 400
+    assert len(provider.peers) == 1
+    assert client.metrics.summary()["failed_calls"] == 1
+
+
+def test_gives_up_after_max_retries(provider):
+    provider.script = [500] * 10
+    client = make_client(provider, max_retries=2)
+    with pytest.raises(LLMError):
+        client.complete("hello")
+    assert len(provider.peers) == 3
+
+
+def test_metrics_record_tokens_by_purpose(provider):
+    client = make_client(provider)
+    client.complete("a", purpose="annotate")
+    client.complete("b", purpose="annotate")
+    client.complete("c", purpose="plan")
+    summary = client.metrics.summary()
+    assert summary["prompt_tokens"] == 33 and summary["completion_tokens"] == 21
+    assert summary["by_purpose"]["annotate"] == {"calls": 2, "prompt_tokens": 22, "completion_tokens": 14}
+    assert summary["latency_ms"]["p50"] > 0
+
+
+def test_latency_excludes_backoff_and_slot_wait(provider):
+    provider.script = [503, 200]
+    client = LLMClient("test-key", provider="openai", base_url=f"http://127.0.0.1:{provider.server_port}/v1",
+                       backoff_base=0.4, backoff_max=0.4)
+    client.complete("hello")
+    call = client.metrics.calls[0]
+    assert call["wait_ms"] >= 200
+    assert call["latency_ms"] < 200
+    assert client.metrics.summary()["wait_ms"] == call["wait_ms"]
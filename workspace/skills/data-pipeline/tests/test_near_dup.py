@@ -0,0 +1,36 @@
+import json
+
+from near_dup import SimHashIndex, TemplateTracker, hamming, simhash, url_template
+
+ARTICLE = ("The river flooded the lower town after three days of rain and the council "
+           "opened the school gym as a shelter for families from the east bank.")
+
+
+def test_url_template():
+    assert url_template("https://example.com/tags/python?page=3&sort=new") == "example.com/tags/*?page&sort"
+    assert url_template("https://example.com/posts/12345/comments") == "example.com/posts/{n}/*"
+
+
+def test_simhash_near_and_far():
+    near = simhash(ARTICLE.replace("three", "four"))
+    assert hamming(simhash(ARTICLE), near) <= 12
+    index = SimHashIndex(max_distance=3)
+    index.add(simhash(ARTICLE), "a")
+    assert index.find(simhash(ARTICLE)) == "a"
+    assert index.find(simhash("Completely unrelated words about baking sourdough bread at home today.")) is None
+
+
+def test_duplicate_template_is_pruned():
+    tracker = TemplateTracker(min_samples=3)
+    for i in range(5):
+        tracker.observe(f"https://example.com/print/{i}", ARTICLE)
+    assert tracker.action("https://example.com/print/99") == "prune"
+
+
+def test_empty_outputs_are_not_near_duplicates():
+    tracker = TemplateTracker(min_samples=2)
+    for section in ("audio", "news", "blog", "shop"):
+        for i in range(3):
+            assert tracker.observe(f"https://example.com/{section}/{i}/page", json.dumps([])) is None
+    assert tracker.report()["near_duplicate_pages"] == 0
+    assert all(tracker.action(f"https://example.com/{s}/9/page") == "crawl" for s in ("audio", "news"))
@@ -0,0 +1,71 @@
+import json
+import pstats
+import threading
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def no_global_profiler(monkeypatch):
+    monkeypatch.setattr(profiling, "_active", None)
+
+
+def test_helpers_are_noops_when_disabled(tmp_path):
+    with profiling.span("x"), profiling.cpu_section():
+        pass
+    assert profiling.traced()(lambda: 5)() == 5
+    assert profiling.write_outputs(str(tmp_path)) == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spans_record_nesting_threads_and_errors():
+    prof = profiling.enable()
+    with profiling.span("outer", cat="phase", rows=3, note="n" * 500):
+        with profiling.span("inner"):
+            pass
+    with pytest.raises(ValueError):
+        with profiling.span("boom"):
+            raise ValueError
+    worker = threading.Thread(target=profiling.traced("worker")(lambda: None), name="w1")
+    worker.start()
+    worker.join()
+
+    events = {e["name"]: e for e in prof._events}
+    outer, inner = events["outer"], events["inner"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert outer["cat"] == "phase" and outer["args"]["rows"] == 3
+    assert len(outer["args"]["note"]) == 200
+    assert "boom" in events
+    assert events["worker"]["tid"] != outer["tid"]
+
+
+def test_summary_totals_slowest_first():
+    prof = profiling.Profiler()
+    prof._events = [
+        {"name": "fast", "dur": 1000.0},
+        {"name": "slow", "dur": 5000.0},
+        {"name": "fast", "dur": 1500.0},
+    ]
+    assert prof.summary() == {
+        "slow": {"count": 1, "total_ms": 5.0},
+        "fast": {"count": 2, "total_ms": 2.5},
+    }
+
+
+def test_write_outputs_trace_and_pstats(tmp_path):
+    profiling.enable(cpu=True)
+    t = threading.Thread(target=profiling.traced("fetch", cat="http")(lambda: None), name="fetcher")
+    t.start()
+    t.join()
+    with profiling.span("refine"), profiling.cpu_section(), profiling.cpu_section():
+        sorted(range(1000), key=lambda i: -i)
+
+    outputs = profiling.write_outputs(str(tmp_path), prefix="run")
+    trace = json.load(open(outputs["trace"], encoding="utf-8"))
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert "fetcher" in names
+    assert {e["name"] for e in trace["traceEvents"] if e["ph"] == "X"} == {"fetch", "refine"}
+    stats = pstats.Stats(outputs["pstats"])
+    assert any(func[2] == "<lambda>" for func in stats.stats)
@@ -0,0 +1,137 @@
+import argparse
+import bisect
+import json
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import api_aggregate
+import pubmed_harvest
+from pubmed_harvest import ESEARCH_WINDOW, harvest, parse_article, plan_slices, run_harvest
+
+# 30,000 synthetic hits, several per day going back from 2024-06-30.
+HITS = [(f"{i}", date(2024, 6, 30) - timedelta(days=i // 4)) for i in range(30000)]
+ASCENDING = [d for _, d in reversed(HITS)]
+
+
+def _day(value):
+    return datetime.strptime(value, "%Y/%m/%d").date()
+
+
+class FakeEutils:
+    """esearch/efetch over HITS, newest first within a date range."""
+
+    def __init__(self, monkeypatch, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+        monkeypatch.setattr(pubmed_harvest, "esearch", self.esearch)
+        monkeypatch.setattr(pubmed_harvest, "efetch_batch", self.efetch_batch)
+
+    def esearch(self, term, throttle, mindate=None, maxdate=None, sort="pub_date"):
+        if not mindate:
+            return {"count": len(HITS), "hits": HITS}
+        lo = bisect.bisect_left(ASCENDING, _day(mindate))
+        hi = bisect.bisect_right(ASCENDING, _day(maxdate))
+        hits = HITS[len(HITS) - hi:len(HITS) - lo]
+        return {"count": len(hits), "hits": hits}
+
+    def efetch_batch(self, history, retstart, retmax, throttle, require_abstract=True):
+        self.calls.append(retstart)
+        if self.fail_after is not None and len(self.calls) > self.fail_after:
+            raise ConnectionError("network down")
+        page = history["hits"][retstart:retstart + retmax]
+        return [{"pmid": pmid} for pmid, _ in page], len(page)
+
+
+def test_plan_slices_cover_hits_within_window(monkeypatch):
+    FakeEutils(monkeypatch)
+    slices, total = plan_slices("q", None)
+    assert total == len(HITS)
+    assert all(s["count"] <= ESEARCH_WINDOW for s in slices)
+    assert sum(s["count"] for s in slices) == len(HITS)
+    # Newest slice first, and the slices do not overlap.
+    bounds = [(_day(s["mindate"]), _day(s["maxdate"])) for s in slices]
+    assert all(a[0] > b[1] for a, b in zip(bounds, bounds[1:]))
+
+
+def test_plan_slices_stop_once_max_records_is_covered(monkeypatch):
+    FakeEutils(monkeypatch)
+    slices, _ = plan_slices("q", None, max_records=5000)
+    assert sum(s["count"] for s in slices) >= 5000 and len(slices) == 1
+    assert plan_slices("q", None)[0] != slices
+
+
+def test_harvest_resumes_at_saved_offset(monkeypatch):
+    fake = FakeEutils(monkeypatch, fail_after=3)
+    state, got = {}, []
+    with pytest.raises(ConnectionError):
+        for record in harvest("q", 12000, state=state, batch_size=1000):
+            got.append(record["pmid"])
+    assert state["fetched"] == len(got) == 3000 and state["retstart"] == 3000
+    fake.fail_after = None
+    got += [r["pmid"] for r in harvest("q", 12000, state=state, batch_size=1000)]
+    assert got == [pmid for pmid, _ in HITS[:12000]]
+    assert state["done"] and fake.calls[3] == 3000
+
+
+def test_run_harvest_truncates_unsaved_records(monkeypatch, tmp_path):
+    FakeEutils(monkeypatch)
+    real_harvest = pubmed_harvest.harvest
+
+    def interrupted(*args, **kwargs):
+        # Records of a batch whose checkpoint never happened must not survive the resume.
+        for i, record in enumerate(real_harvest(*args, **kwargs)):
+            yield record
+            if i == 2500:
+                raise ConnectionError("killed mid-batch")
+
+    monkeypatch.setattr(pubmed_harvest, "harvest", interrupted)
+    args = argparse.Namespace(query="q", max_records=4000, batch_size=1000, output_dir=str(tmp_path),
+                              name="t", resume=False)
+    with pytest.raises(ConnectionError):
+        run_harvest(args)
+    state = json.loads((tmp_path / "pubmed_t.state.json").read_text())
+    assert state["harvested"] == 2000
+    assert len((tmp_path / "pubmed_t.jsonl").read_text().splitlines()) == 2501
+    monkeypatch.setattr(pubmed_harvest, "harvest", real_harvest)
+    args.resume = True
+    run_harvest(args)
+    lines = (tmp_path / "pubmed_t.jsonl").read_text().splitlines()
+    assert [json.loads(line)["pmid"] for line in lines] == [pmid for pmid, _ in HITS[:4000]]
+
+
+ARTICLE = """<PubmedArticle><MedlineCitation><PMID>42</PMID><Article>
+<Journal><Title>J Sleep</Title><JournalIssue><PubDate><Year>2020</Year></PubDate></JournalIssue></Journal>
+<ArticleTitle>Snoring and apnea</ArticleTitle>{abstract}
+<AuthorList><Author><ForeName>Ada</ForeName><LastName>Lovelace</LastName></Author></AuthorList>
+</Article></MedlineCitation></PubmedArticle>"""
+
+
+def test_parse_article_abstract_requirement():
+    long = ('<Abstract><AbstractText Label="BACKGROUND">Snoring is common and often precedes obstructive '
+            'sleep apnea in adults.</AbstractText></Abstract>')
+    record = parse_article(ET.fromstring(ARTICLE.format(abstract=long)))
+    assert record["text"].startswith("Snoring and apnea\n\nBACKGROUND: Snoring is common")
+    assert record["metadata"]["authors"] == ["Ada Lovelace"] and record["metadata"]["year"] == "2020"
+    bare = ET.fromstring(ARTICLE.format(abstract=""))
+    assert parse_article(bare) is None
+    assert parse_article(bare, require_abstract=False)["text"] == "Snoring and apnea"
+
+
+def test_aggregate_keeps_relevance_order_and_bare_articles(monkeypatch):
+    seen = {}
+
+    def esearch(term, throttle, mindate=None, maxdate=None, sort="pub_date"):
+        seen["sort"] = sort
+        return {"count": 2, "webenv": "w", "query_key": "1"}
+
+    def efetch_batch(history, retstart, retmax, throttle, require_abstract=True):
+        seen["require_abstract"] = require_abstract
+        return [parse_article(ET.fromstring(ARTICLE.format(abstract="")), require_abstract)], 1
+
+    monkeypatch.setattr(pubmed_harvest, "esearch", esearch)
+    monkeypatch.setattr(pubmed_harvest, "efetch_batch", efetch_batch)
+    records = api_aggregate.fetch_pubmed("snoring")
+    assert seen == {"sort": "relevance", "require_abstract": False}
+    assert [r["id"] for r in records] == ["42"] and records[0]["title"] == "Snoring and apnea"
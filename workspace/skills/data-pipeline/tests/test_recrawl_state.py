@@ -0,0 +1,111 @@
+import http.server
+import json
+import threading
+
+import pytest
+
+import scrape
+from recrawl_state import RecrawlState
+
+
+def test_record_classifies_new_changed_unchanged():
+    state = RecrawlState()
+    assert state.record("https://a.com/", "h1", ["https://a.com/x"], etag='"v1"') == "new"
+    assert state.record("https://a.com/", "h1") == "unchanged"
+    assert state.record("https://a.com/", "h2") == "changed"
+    assert state.summary() == {"tracked_urls": 1, "new": 1, "unchanged": 1, "changed": 1}
+
+
+def test_conditional_headers_use_stored_validators():
+    state = RecrawlState()
+    assert state.conditional_headers("https://a.com/") == {}
+    state.record("https://a.com/", "h", etag='"v1"', last_modified="Mon, 05 Oct 2026 10:00:00 GMT")
+    state.record("https://a.com/plain", "h")
+    assert state.conditional_headers("https://a.com/") == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"}
+    assert state.conditional_headers("https://a.com/plain") == {}
+
+
+def test_not_modified_keeps_links_and_refreshes_fetch_time():
+    state = RecrawlState()
+    state.record("https://a.com/", "h", ["https://a.com/1", "https://a.com/2"], etag='"v1"')
+    state.entries["https://a.com/"]["fetched_at"] = 0
+    assert state.not_modified("https://a.com/") == ["https://a.com/1", "https://a.com/2"]
+    assert state.get("https://a.com/")["fetched_at"] > 0
+    assert state.get("https://a.com/")["content_hash"] == "h"
+    assert state.summary()["not_modified"] == 1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "state.json")
+    assert RecrawlState.load(path).entries == {}
+    state = RecrawlState.load(path)
+    state.record("https://a.com/", "h", ["https://a.com/1"], etag='"v1"')
+    state.save()
+    assert not (tmp_path / "state.json.tmp").exists()
+    loaded = RecrawlState.load(path)
+    assert loaded.entries == state.entries
+    assert loaded.record("https://a.com/", "h") == "unchanged"
+    RecrawlState().save()  # no path: nothing to write
+
+
+class Site(http.server.BaseHTTPRequestHandler):
+    """Index with an ETag linking to a page without validators."""
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        if self.path == "/":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            body, extra = b"<html><body><p>Index page text.</p><a href='/child'>c</a></body></html>", {"ETag": '"v1"'}
+        else:
+            body, extra = self.server.child.encode(), {}
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    server.hits = []
+    server.child = "<html><body><p>Child page, first version.</p></body></html>"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_recrawl_emits_only_new_or_changed_pages(site, tmp_path):
+    root = f"http://127.0.0.1:{site.server_port}/"
+    path = str(tmp_path / "state.json")
+
+    def crawl():
+        state = RecrawlState.load(path)
+        records = scrape.scrape_with_fallback([root], 1, "text", {"recrawl": state, "sink": []})
+        state.save()
+        return {r["url"]: r["change"] for r in records}, state
+
+    first, _ = crawl()
+    assert first == {root: "new", root + "child": "new"}
+
+    site.hits.clear()
+    second, state = crawl()
+    assert second == {}
+    # The 304 index still leads the crawl to its child.
+    assert sorted(site.hits) == ["/", "/child"]
+    assert state.summary()["not_modified"] == 1 and state.summary()["unchanged"] == 1
+
+    site.child = "<html><body><p>Child page, second version.</p></body></html>"
+    third, _ = crawl()
+    assert third == {root + "child": "changed"}
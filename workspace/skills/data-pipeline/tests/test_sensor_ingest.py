@@ -0,0 +1,63 @@
+import io
+import json
+
+import pytest
+
+import sensor_ingest
+from sensor_ingest import infer_column, iter_json_rows, split_unit
+
+
+@pytest.mark.parametrize("column, expected", [
+    ("temp_min", ("temp_min", None)),
+    ("sign_in", ("sign_in", None)),
+    ("rate_s", ("rate_s", None)),
+    ("status_c", ("status_c", None)),
+    ("temp_f", ("temp", "f")),
+    ("height_in", ("height", "in")),
+    ("elapsed_min", ("elapsed", "min")),
+    ("battery_v", ("battery", "v")),
+    ("wind_kmh", ("wind", "kmh")),
+    ("Pressure (kPa)", ("pressure", "kpa")),
+    ("Depth (m)", ("depth", "m")),
+])
+def test_split_unit(column, expected):
+    assert split_unit(column) == expected
+
+
+def test_ambiguous_suffix_is_not_converted():
+    column = infer_column("temp_min", ["12.5", "13.0"])
+    assert column.name == "temp_min" and column.convert is None
+    column = infer_column("temp_f", ["50", "68"])
+    assert column.name == "temp_c" and column.convert(68) == pytest.approx(20)
+
+
+def test_wrapped_document_rows():
+    doc = '{"meta": {"device": "x"}, "data": [{"a": 1, "b": {"c": 2}}, {"a": 3}], "count": 2}'
+    assert list(iter_json_rows(io.StringIO(doc))) == [{"a": 1, "b_c": 2}, {"a": 3}]
+
+
+def test_array_and_ndjson_rows():
+    assert list(iter_json_rows(io.StringIO('[{"a": 1}, {"a": 2}]'))) == [{"a": 1}, {"a": 2}]
+    assert list(iter_json_rows(io.StringIO('{"a": 1}\n{"a": 2}\n'))) == [{"a": 1}, {"a": 2}]
+
+
+def test_nested_lists_stay_inside_their_rows():
+    rows = [{"ts": 1, "v": 2.5, "tags": [{"k": "a"}, {"k": "b"}]}, {"ts": 2, "v": 3.5, "tags": [{"k": "c"}]}]
+    ndjson = "".join(json.dumps(r) + "\n" for r in rows)
+    assert list(iter_json_rows(io.StringIO(ndjson))) == rows
+    assert list(iter_json_rows(io.StringIO(json.dumps(rows)))) == rows
+    assert list(iter_json_rows(io.StringIO(json.dumps(rows[0])), ndjson=True)) == rows[:1]
+    # A lone wrapper document is still unwrapped, even on one line.
+    assert list(iter_json_rows(io.StringIO(json.dumps({"data": rows}) + "\n"))) == rows
+
+
+def test_wrapped_document_is_decoded_incrementally():
+    doc = json.dumps({"meta": {"v": 1}, "data": [{"t": i, "temp_c": i / 10} for i in range(50000)]})
+    stream = sensor_ingest._JsonStream(io.StringIO(doc))
+    largest = 0
+    count = 0
+    for _ in stream.object():
+        largest = max(largest, len(stream.buf))
+        count += 1
+    assert count == 50000
+    assert largest <= 2 * sensor_ingest.TEXT_CHUNK < len(doc)
@@ -0,0 +1,115 @@
+import gzip
+import http.server
+import threading
+import time
+
+import pytest
+
+from url_discovery import RobotsCache, discover, iter_sitemap, lastmod_priority, parse_lastmod
+
+ROBOTS = b"""User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+
+Sitemap: {root}/sitemap_index.xml
+"""
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{}
+</urlset>"""
+
+
+def urlset(root, paths):
+    return URLSET.format("\n".join(f"<url><loc>{root}{p}</loc><lastmod>{d}</lastmod></url>" for p, d in paths))
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        root = f"http://127.0.0.1:{self.server.server_port}"
+        routes = self.server.routes(root)
+        if self.path not in routes:
+            self.send_error(self.server.missing)
+            return
+        body, headers = routes[self.path]
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def routes(root):
+    day = lambda n: time.strftime("%Y-%m-%d", time.gmtime(time.time() - n * 86400))  # noqa: E731
+    plain = urlset(root, [("/a", day(1)), ("/b", day(20))]).encode()
+    gz = gzip.compress(urlset(root, [("/c", "2024")]).encode())
+    return {
+        "/robots.txt": (ROBOTS.replace(b"{root}", root.encode()), {"Content-Type": "text/plain"}),
+        "/sitemap_index.xml": (f"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <sitemap><loc>{root}/plain.xml</loc></sitemap>
+            <sitemap><loc>{root}/file.xml.gz</loc></sitemap>
+            <sitemap><loc>{root}/labelled.xml.gz</loc></sitemap>
+            <sitemap><loc>{root}/double.xml.gz</loc></sitemap>
+            <sitemap><loc>{root}/decoded.xml.gz</loc></sitemap>
+            </sitemapindex>""".encode(), {}),
+        "/plain.xml": (plain, {}),
+        "/file.xml.gz": (gz, {}),
+        # The .gz file itself, mislabelled as a gzip transfer encoding.
+        "/labelled.xml.gz": (gzip.compress(urlset(root, [("/d", "")]).encode()), {"Content-Encoding": "gzip"}),
+        # A .gz file really gzip-encoded again for transfer.
+        "/double.xml.gz": (gzip.compress(gzip.compress(urlset(root, [("/e", "")]).encode())),
+                           {"Content-Encoding": "gzip"}),
+        # A .gz URL whose body the server already decoded.
+        "/decoded.xml.gz": (urlset(root, [("/f", "")]).encode(), {}),
+    }
+
+
+@pytest.fixture
+def site():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.routes, server.missing = routes, 404
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_robots_rules(site):
+    _, root = site
+    robots = RobotsCache()
+    assert robots.allowed(f"{root}/page") and not robots.allowed(f"{root}/private/x")
+    assert robots.crawl_delay(f"{root}/page") == 2.0
+    assert robots.sitemaps(f"{root}/") == [f"{root}/sitemap_index.xml"]
+
+
+@pytest.mark.parametrize("status,allowed", [(404, True), (403, False)])
+def test_missing_or_forbidden_robots(site, status, allowed):
+    server, root = site
+    server.routes, server.missing = lambda root: {}, status
+    assert RobotsCache().allowed(f"{root}/page") is allowed
+
+
+def test_sitemap_index_with_gzip_variants(site):
+    _, root = site
+    locs = [loc for loc, _ in iter_sitemap(f"{root}/sitemap_index.xml")]
+    assert locs == [f"{root}/{p}" for p in ("a", "b", "c", "d", "e", "f")]
+    assert [loc for loc, _ in iter_sitemap(f"{root}/sitemap_index.xml", max_urls=3)] == locs[:3]
+
+
+def test_discover_orders_by_lastmod(site):
+    _, root = site
+    seeds = dict(discover(f"{root}/", RobotsCache(), max_urls=100))
+    assert len(seeds) == 6
+    assert seeds[f"{root}/a"] < seeds[f"{root}/b"] < seeds[f"{root}/c"]
+    assert seeds[f"{root}/d"] == 0.99
+
+
+def test_parse_lastmod():
+    assert parse_lastmod("2024-01-02T03:04:05Z") == parse_lastmod("2024-01-02T03:04:05+00:00") == 1704164645
+    assert parse_lastmod("2024-01") == 1704067200
+    assert parse_lastmod("yesterday") is None
+    assert lastmod_priority("2024-01-01", now=1704067200) == 0.0
+    assert lastmod_priority(None) == 0.99
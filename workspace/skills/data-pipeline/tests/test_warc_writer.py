@@ -0,0 +1,65 @@
+import base64
+import gzip
+import hashlib
+import os
+
+from warc_writer import WarcWriter, iter_cdx, read_record, sha1_digest, surt_key
+
+PAGES = [
+    ("https://www.example.com/a?x=1", 200, [("Content-Type", "text/html; charset=utf-8"),
+                                            ("Content-Encoding", "gzip")], b"<p>first page</p>", False),
+    ("https://example.com/b", 404, {"Content-Type": "text/plain"}, b"missing", False),
+    ("https://example.com/big", 299, {"Content-Type": "text/html"}, b"x" * 5000, True),
+]
+
+
+def _write(stem, **kwargs):
+    writer = WarcWriter(stem, **kwargs)
+    for url, status, headers, body, truncated in PAGES:
+        writer.write_response(url, status, headers, body, truncated=truncated)
+    writer.close()
+    return writer
+
+
+def test_round_trip_through_cdx_offsets(tmp_path):
+    stem = str(tmp_path / "crawl")
+    writer = _write(stem)
+    entries = list(iter_cdx(f"{stem}.cdx"))
+    assert [e["url"] for e in entries] == [p[0] for p in PAGES]
+    assert entries[0]["urlkey"] == surt_key(PAGES[0][0]) == "com,example)/a?x=1"
+    for entry, (url, status, headers, body, truncated) in zip(entries, PAGES):
+        record = read_record(os.path.join(tmp_path, entry["filename"]), entry["offset"], entry["length"])
+        warc = record["warc_headers"]
+        assert record["status"] == status and record["body"] == body
+        assert warc["WARC-Target-URI"] == url
+        assert warc["WARC-Payload-Digest"] == sha1_digest(body) == "sha1:" + entry["digest"]
+        assert ("WARC-Truncated" in warc) == truncated
+        if truncated:
+            assert warc["WARC-Truncated"] == "length"
+        assert "Content-Encoding" not in record["http_headers"]
+        assert record["http_headers"]["Content-Length"] == str(len(body))
+    assert writer.records == 3
+
+
+def test_block_digest_and_length_match(tmp_path):
+    stem = str(tmp_path / "crawl")
+    _write(stem)
+    entry = next(iter_cdx(f"{stem}.cdx"))
+    with open(os.path.join(tmp_path, entry["filename"]), "rb") as fh:
+        fh.seek(entry["offset"])
+        raw = gzip.decompress(fh.read(entry["length"]))
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    fields = dict(line.split(": ", 1) for line in head.decode().split("\r\n")[1:])
+    block = rest[:int(fields["Content-Length"])]
+    assert rest[len(block):] == b"\r\n\r\n"
+    assert fields["WARC-Block-Digest"] == "sha1:" + base64.b32encode(hashlib.sha1(block).digest()).decode()
+
+
+def test_rotation_keeps_one_index(tmp_path):
+    stem = str(tmp_path / "crawl")
+    writer = _write(stem, max_file_bytes=1)
+    assert len(writer.files) == 3
+    entries = list(iter_cdx(f"{stem}.cdx"))
+    assert [e["filename"] for e in entries] == [os.path.basename(f) for f in writer.files]
+    assert all(read_record(os.path.join(tmp_path, e["filename"]), e["offset"], e["length"])["body"] == p[3]
+               for e, p in zip(entries, PAGES))
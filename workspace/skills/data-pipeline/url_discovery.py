@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – URL Discovery
+robots.txt handling and sitemap-based seeding for the scrape engines.
+
+  RobotsCache     fetches robots.txt once per host; answers allowed(url),
+                  crawl_delay(host) and sitemaps(host)
+  iter_sitemap()  streams <url> entries out of sitemap.xml files, following
+                  sitemap indexes and transparently gunzipping .xml.gz
+  discover()      seeds for a host, prioritised by <lastmod> (fresh first)
+
+Usage:
+  robots = RobotsCache()
+  for url, priority in discover("https://docs.example.com", robots, max_urls=5000):
+      frontier.push(url, depth=0, priority=priority)
+"""
+
+import gzip
+import threading
+import time
+import urllib.error
+import urllib.request
+import urllib.robotparser
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+USER_AGENT = "Text2LLM-DatasetCreator/1.0"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[discovery] {msg}", flush=True)
+
+
+def _open(url, timeout):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+# ---------------------------------------------------------------------------
+# robots.txt
+# ---------------------------------------------------------------------------
+
+class RobotsCache:
+    """
+    One parsed robots.txt per scheme+host. Follows the usual conventions:
+    401/403 disallows the whole host, any other failure allows everything.
+    """
+
+    def __init__(self, user_agent=USER_AGENT, timeout=10):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._parsers = {}
+        self._lock = threading.Lock()
+
+    def _load(self, scheme, netloc):
+        key = f"{scheme}://{netloc}"
+        with self._lock:
+            if key in self._parsers:
+                return self._parsers[key]
+        parser = urllib.robotparser.RobotFileParser(f"{key}/robots.txt")
+        try:
+            with _open(parser.url, self.timeout) as resp:
+                raw = resp.read()
+                if raw[:2] == GZIP_MAGIC:
+                    raw = gzip.decompress(raw)
+            parser.parse(raw.decode("utf-8", errors="replace").splitlines())
+        except urllib.error.HTTPError as e:
+            if e.code in (401, 403):
+                parser.disallow_all = True
+            else:
+                parser.allow_all = True
+        except (OSError, ValueError):
+            parser.allow_all = True
+        parser.modified()
+        with self._lock:
+            self._parsers.setdefault(key, parser)
+            return self._parsers[key]
+
+    def parser_for(self, url):
+        parts = urlsplit(url)
+        return self._load(parts.scheme, parts.netloc)
+
+    def allowed(self, url):
+        return self.parser_for(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """Seconds between requests requested by the host (Crawl-delay or Request-rate), or None."""
+        parser = self.parser_for(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            if rate and rate.requests:
+                delay = rate.seconds / rate.requests
+        return float(delay) if delay is not None else None
+
+    def sitemaps(self, url):
+        return list(self.parser_for(url).site_maps() or [])
+
+# ---------------------------------------------------------------------------
+# Sitemaps
+# ---------------------------------------------------------------------------
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_sitemap(url, timeout):
+    """
+    Response plus a stream of the sitemap XML. Gzip is recognised by its magic
+    bytes only: a .xml.gz served with Content-Encoding: gzip may arrive with
+    one gzip layer or two, and a decoded .xml.gz with none.
+    """
+    resp = _open(url, timeout)
+    stream = resp
+    for _ in range(2):
+        if stream.peek(2)[:2] != GZIP_MAGIC:
+            break
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    return resp, stream
+
+
+def iter_sitemap(url, timeout=20, max_urls=50000, max_depth=3, _seen=None):
+    """
+    Yield (loc, lastmod) from a sitemap or sitemap index. Entries are handled
+    as each element closes so multi-megabyte sitemaps are never held in memory.
+    """
+    seen = _seen if _seen is not None else set()
+    if url in seen or max_depth < 0:
+        return
+    seen.add(url)
+    count = 0
+    children = []
+    try:
+        resp, stream = _open_sitemap(url, timeout)
+        with resp:
+            loc = lastmod = None
+            for event, elem in ET.iterparse(stream, events=("end",)):
+                tag = _local(elem.tag)
+                if tag == "loc":
+                    loc = (elem.text or "").strip()
+                elif tag == "lastmod":
+                    lastmod = (elem.text or "").strip()
+                elif tag in ("url", "sitemap"):
+                    if loc:
+                        if tag == "sitemap":
+                            children.append(loc)
+                        else:
+                            yield loc, lastmod
+                            count += 1
+                    loc = lastmod = None
+                    elem.clear()
+                    if count >= max_urls:
+                        return
+    except (OSError, ET.ParseError, EOFError) as e:
+        log(f"Skipping sitemap {url}: {e}")
+        return
+
+    for child in children:
+        for entry in iter_sitemap(child, timeout, max_urls - count, max_depth - 1, seen):
+            yield entry
+            count += 1
+        if count >= max_urls:
+            return
+
+
+def parse_lastmod(value):
+    """W3C datetime (YYYY, YYYY-MM-DD or full timestamp) -> epoch seconds, or None."""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    for fmt in (None, "%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            dt = datetime.fromisoformat(value) if fmt is None else datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+def lastmod_priority(lastmod, now=None):
+    """
+    Map lastmod to a frontier priority in [0, 1): recently modified pages come
+    first, undated ones last, and all of them ahead of depth-1 links.
+    """
+    ts = parse_lastmod(lastmod)
+    if ts is None:
+        return 0.99
+    age_days = max(0.0, ((now or time.time()) - ts) / 86400)
+    return round(age_days / (age_days + 30.0), 4)
+
+
+def discover(seed_url, robots=None, max_urls=10000, timeout=20):
+    """Yield (url, priority) from the sitemaps of seed_url's host."""
+    parts = urlsplit(seed_url)
+    root = f"{parts.scheme}://{parts.netloc}"
+    sitemap_urls = robots.sitemaps(seed_url) if robots else []
+    if not sitemap_urls:
+        sitemap_urls = [f"{root}/sitemap.xml"]
+    seen = set()
+    count = 0
+    for sitemap in sitemap_urls:
+        for loc, lastmod in iter_sitemap(sitemap, timeout, max_urls - count, _seen=seen):
+            yield loc, lastmod_priority(lastmod)
+            count += 1
+        if count >= max_urls:
+            break
+    log(f"{root}: {count} URLs from {len(seen)} sitemap(s)")
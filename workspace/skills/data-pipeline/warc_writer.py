@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Dataset Creator – WARC Snapshots
+Raw page snapshots for auditability and offline re-extraction.
+
+Every fetched page is written as a WARC/1.1 `response` record compressed as
+its own gzip member, so a record can be read by seeking to its offset and
+inflating just that member. A CDX index (urlkey, timestamp, URL, mime,
+status, digest, length, offset, file) is written alongside.
+
+Payloads are stored as delivered to the crawler, i.e. after transfer and
+content decoding; Content-Encoding/Transfer-Encoding headers are dropped and
+Content-Length rewritten to match. Bodies cut at the fetcher's byte cap carry
+`WARC-Truncated: length`.
+
+Usage:
+  writer = WarcWriter("output/scraped_docs")
+  writer.write_response(url, 200, headers, body)
+  writer.close()
+
+  python warc_writer.py reextract --cdx output/scraped_docs.cdx --output reextracted.jsonl
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import http
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def log(msg):
+    print(f"[warc] {msg}", flush=True)
+
+CDX_HEADER = " CDX N b a m s k r M S V g\n"
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+def sha1_digest(data):
+    return "sha1:" + base64.b32encode(hashlib.sha1(data).digest()).decode("ascii")
+
+
+def surt_key(url):
+    """SURT-style sort key: com,example)/path?query"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    key = ",".join(reversed(host.split("."))) + ")" + (parts.path or "/").lower()
+    if parts.query:
+        key += "?" + parts.query.lower()
+    return key
+
+
+def _header_items(headers):
+    if hasattr(headers, "items"):
+        return list(headers.items())
+    return list(headers or [])
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class WarcWriter:
+    """
+    Thread-safe WARC writer rotating to a new `<stem>-NNNNN.warc.gz` once
+    `max_file_bytes` is exceeded; all files share one `<stem>.cdx` index.
+    """
+
+    def __init__(self, stem, max_file_bytes=1024 ** 3, software="Text2LLM-DatasetCreator/1.0"):
+        self.stem = stem
+        self.max_file_bytes = max_file_bytes
+        self.software = software
+        self.records = 0
+        self.files = []
+        self._lock = threading.Lock()
+        self._fh = None
+        new_index = not os.path.exists(f"{stem}.cdx")
+        self._cdx = open(f"{stem}.cdx", "a", encoding="utf-8")
+        if new_index:
+            self._cdx.write(CDX_HEADER)
+
+    def _open_next(self):
+        if self._fh:
+            self._fh.close()
+        index = 0
+        while os.path.exists(f"{self.stem}-{index:05d}.warc.gz"):
+            index += 1
+        path = f"{self.stem}-{index:05d}.warc.gz"
+        self._fh = open(path, "ab")
+        self.files.append(path)
+        info = f"software: {self.software}\r\nformat: WARC File Format 1.1\r\n".encode("utf-8")
+        self._write_member(self._record("warcinfo", info, {"WARC-Filename": os.path.basename(path),
+                                                           "Content-Type": "application/warc-fields"}))
+
+    def _record(self, warc_type, block, extra):
+        headers = {
+            "WARC-Type": warc_type,
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **extra,
+            "WARC-Block-Digest": sha1_digest(block),
+            "Content-Length": str(len(block)),
+        }
+        head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        return head.encode("utf-8") + block + b"\r\n\r\n"
+
+    def _write_member(self, record):
+        offset = self._fh.tell()
+        member = gzip.compress(record)
+        self._fh.write(member)
+        return offset, len(member)
+
+    def write_response(self, url, status, headers, body, mime=None, truncated=False):
+        """Append one response record and its CDX line; truncated marks a body cut at a size cap."""
+        body = body or b""
+        try:
+            reason = http.HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}".rstrip()]
+        for name, value in _header_items(headers):
+            if name.lower() not in DROPPED_HEADERS:
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        block = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8", errors="replace") + body
+        payload_digest = sha1_digest(body)
+        extra = {
+            "WARC-Target-URI": url,
+            "WARC-Payload-Digest": payload_digest,
+            "Content-Type": "application/http;msgtype=response",
+        }
+        if truncated:
+            extra["WARC-Truncated"] = "length"
+        record = self._record("response", block, extra)
+        if mime is None:
+            content_type = dict((k.lower(), v) for k, v in _header_items(headers)).get("content-type", "")
+            mime = content_type.split(";")[0].strip() or "-"
+
+        with self._lock:
+            if self._fh is None or self._fh.tell() >= self.max_file_bytes:
+                self._open_next()
+            offset, length = self._write_member(record)
+            self._fh.flush()
+            timestamp = time.strftime("%Y%m%d%H%M%S", time.gmtime())
+            self._cdx.write(" ".join([surt_key(url), timestamp, url, mime, str(status),
+                                      payload_digest.split(":", 1)[1], "-", "-", str(length), str(offset),
+                                      os.path.basename(self.files[-1])]) + "\n")
+            self._cdx.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+            self._cdx.close()
+
+# ---------------------------------------------------------------------------
+# Random-access reading
+# ---------------------------------------------------------------------------
+
+def iter_cdx(cdx_path):
+    """Yield CDX entries as dicts."""
+    fields = ["urlkey", "timestamp", "url", "mime", "status", "digest", "redirect", "robotflags",
+              "length", "offset", "filename"]
+    with open(cdx_path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith(" CDX") or not line.strip():
+                continue
+            entry = dict(zip(fields, line.rstrip("\n").split(" ")))
+            entry["length"] = int(entry["length"])
+            entry["offset"] = int(entry["offset"])
+            yield entry
+
+
+def read_record(warc_path, offset, length):
+    """Seek to one gzip member and return {"warc_headers", "status", "http_headers", "body"}."""
+    with open(warc_path, "rb") as fh:
+        fh.seek(offset)
+        data = gzip.decompress(fh.read(length))
+    stream = io.BytesIO(data)
+    stream.readline()  # WARC/1.1
+    warc_headers = {}
+    for line in iter(stream.readline, b"\r\n"):
+        name, _, value = line.decode("utf-8").partition(":")
+        warc_headers[name.strip()] = value.strip()
+    status_line = stream.readline().decode("utf-8", errors="replace").split(" ", 2)
+    http_headers = {}
+    for line in iter(stream.readline, b"\r\n"):
+        name, _, value = line.decode("utf-8", errors="replace").partition(":")
+        http_headers[name.strip()] = value.strip()
+    body = stream.read(int(http_headers.get("Content-Length", 0)))
+    return {"warc_headers": warc_headers, "status": int(status_line[1]), "http_headers": http_headers,
+            "body": body}
+
+
+def reextract(cdx_path, output_path, max_chars=50000):
+    """Run the current HTML extractor over every archived page, without touching the network."""
+    from html_extract import extract
+    from http_fetch import sniff_charset
+
+    base_dir = os.path.dirname(os.path.abspath(cdx_path))
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for entry in iter_cdx(cdx_path):
+            record = read_record(os.path.join(base_dir, entry["filename"]), entry["offset"], entry["length"])
+            content_type = record["http_headers"].get("Content-Type", "")
+            charset = content_type.split("charset=", 1)[1].strip() if "charset=" in content_type else None
+            html = record["body"].decode(sniff_charset(record["body"], charset), errors="replace")
+            text, _ = extract(html, max_chars=max_chars)
+            out.write(json.dumps({
+                "url": entry["url"],
+                "captured_at": entry["timestamp"],
+                "content_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                "content_length": len(text),
+                "text": text,
+            }, ensure_ascii=False) + "\n")
+            count += 1
+    log(f"Re-extracted {count} pages → {output_path}")
+    return count
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset Creator – WARC Snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("reextract", help="Re-run text extraction over archived pages")
+    p.add_argument("--cdx", required=True, help="CDX index written next to the WARC files")
+    p.add_argument("--output", required=True, help="JSONL output path")
+    p.add_argument("--max-text-chars", type=int, default=50000)
+    p = sub.add_parser("show", help="Print one archived record")
+    p.add_argument("--cdx", required=True)
+    p.add_argument("--url", required=True)
+    args = parser.parse_args()
+
+    if args.command == "reextract":
+        reextract(args.cdx, args.output, args.max_text_chars)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(args.cdx))
+        for entry in iter_cdx(args.cdx):
+            if entry["url"] == args.url:
+                record = read_record(os.path.join(base_dir, entry["filename"]), entry["offset"], entry["length"])
+                print(json.dumps(record["warc_headers"], indent=2))
+                print(record["status"], json.dumps(record["http_headers"], indent=2))
+                print(record["body"][:2000].decode("utf-8", errors="replace"))
+                return
+        log(f"{args.url} not found in {args.cdx}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import fs from 'node:fs/promises';
 import { fileURLToPath } from 'node:url';
-import { exec, spawn } from 'node:child_process';
+import { exec, execFile, spawn } from 'node:child_process';
 import util from 'node:util';
 import path from 'node:path';
 const execPromise = util.promisify(exec);
+const execFilePromise = util.promisify(execFile);
 
 // A simple polling worker to pick up dataset jobs and process them
 // In a real production environment, use BullMQ / Redis or AWS SQS.
@@ -126,6 +127,7 @@ async function pollJobs() {
     // ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
     let command = `python ${skillDir}/run.py --input ${job.file_key} --output-format ${job.output_format}`;
+    let argv = null;
     
     // Dataset Creator: Web Scraping
     if (job.scrape_config) {
@@ -135,8 +137,19 @@ async function pollJobs() {
     }
     // Dataset Creator: External API
     else if (job.api_config) {
-      console.log(`[Worker] Detected external API job for provider: ${job.api_config.provider}`);
-      command = `python ${skillDir}/api_aggregate.py --provider ${job.api_config.provider} --query "${job.api_config.query}" --output-format ${job.output_format}`;
+      // Several providers/queries run as one fan-out process with a merged, deduplicated output.
+      const providers = (job.api_config.providers || [job.api_config.provider]).join(",");
+      const queries = job.api_config.queries || [job.api_config.query];
+      console.log(`[Worker] Detected external API job for provider(s): ${providers}`);
+      // Queries are free text: pass them as argv entries so no shell ever parses them.
+      argv = [
+        path.join(skillDir, 'api_aggregate.py'),
+        '--provider', providers,
+        ...queries.flatMap((q) => ['--query', String(q)]),
+        '--name', String(job.id),
+        '--output-format', job.output_format
+      ];
+      command = `python ${argv.map((a) => JSON.stringify(a)).join(' ')}`;
     }
     // Dataset Creator: Synthetic Generation
     else if (job.synth_config) {
@@ -149,7 +162,7 @@ async function pollJobs() {
     }
 
     try {
-      await execPromise(command);
+      await (argv ? execFilePromise('python', argv) : execPromise(command));
       console.log(`[Worker] Executed: ${command}`);
       await updateJobStatus(job.id, "completed", `https://storage.example.com/outputs/${job.id}.${job.output_format}`, isLocal);
       console.log(`[Worker] Job ${job.id} completed.`);
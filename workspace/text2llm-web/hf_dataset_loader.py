@@ -5,14 +5,48 @@ This script uses datasets<3.0 (which supports trust_remote_code=True) to fetch
 rows from HF datasets that the modern datasets-server API rejects.
 
 It automatically creates/reuses an isolated venv with the correct version.
+
+One-shot:  python hf_dataset_loader.py <id> <config> <split> <limit> [offset] [--ndjson]
+           --ndjson prints {"row": ...} lines as rows are read, then {"ok": true, "done": true}.
+Stats:     python hf_dataset_loader.py --cache-stats
+Daemon:    python hf_dataset_loader.py --serve
+           Reads one JSON request per line on stdin
+             {"id": 1, "dataset": "...", "config": "default", "split": "train",
+              "offset": 0, "limit": 100, "stream": false}
+           and answers each with one JSON line on stdout
+             {"id": 1, "ok": true, "rows": [...], "total": null}
+           or, with "stream": true, one {"id": 1, "row": {...}} line per row
+           followed by {"id": 1, "ok": true, "done": true, "count": n, "total": ...}.
+           Later pages resume from buffered rows or saved shard positions.
+           {"id": 2, "op": "cache_stats"} returns the row cache hit rates.
+           Imported modules, loaded builders and open streaming iterators stay
+           warm between requests; idle streams are evicted and the daemon exits
+           after a long idle period (the web server respawns it on demand).
+
+Fetched rows are cached on disk as Arrow IPC files (.hf_cache/, LRU within
+HF_PREVIEW_CACHE_MB, default 512; 0 disables) keyed by dataset, config, split
+and the revision's commit sha; a repeated preview is a file read.
 """
 import sys
 import os
 import json
+import time
+import hashlib
+import threading
+import contextlib
+from collections import Counter
 import traceback
 import subprocess
 
 VENV_DIR_NAME = ".hf_venv"
+STREAM_IDLE_SECONDS = 300      # drop an open stream unused this long
+DAEMON_IDLE_SECONDS = 1800     # exit the daemon after this long without requests
+MAX_BUFFERED_ROWS = 5000       # rows kept per open stream for repeated previews
+CHECKPOINT_ROWS = 1000         # save a resumable shard position this often
+CACHE_DIR_NAME = ".hf_cache"
+CACHE_BUDGET_MB = float(os.environ.get("HF_PREVIEW_CACHE_MB", "512"))  # 0 disables the row cache
+MAX_CACHED_ROWS = 50000        # longest cached prefix per dataset/config/split/revision
+REVISION_TTL_SECONDS = 600     # how long a resolved commit sha is trusted
 
 def get_venv_python():
     venv_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), VENV_DIR_NAME)
@@ -34,50 +68,564 @@ def ensure_venv():
     )
     return python_exe
 
-def do_load(dataset_id, config_name, split_name, limit):
-    """Actually load the dataset (runs inside the venv)."""
+def open_stream(dataset_id, config_name, split_name, revision=None):
+    """Load the streaming dataset (runs inside the venv); media columns are left undecoded."""
     from datasets import load_dataset
 
     kwargs = dict(split=split_name, streaming=True, trust_remote_code=True)
+    if revision:
+        kwargs["revision"] = revision
 
     if not config_name or config_name.lower() == "default":
         ds = load_dataset(dataset_id, **kwargs)
     else:
         ds = load_dataset(dataset_id, config_name, **kwargs)
+    return skip_media_decoding(ds)
 
-    rows = []
-    for i, row in enumerate(ds):
-        if i >= limit:
-            break
-        clean_row = {}
-        for k, v in row.items():
-            if isinstance(v, (str, int, float, bool, type(None))):
-                clean_row[k] = v
-            elif isinstance(v, dict) and "array" in v and "sampling_rate" in v:
-                clean_row[k] = f"<Audio: {v.get('sampling_rate')}Hz>"
-            elif isinstance(v, list):
-                clean_row[k] = json.dumps(v, ensure_ascii=False, default=str)[:500]
-            else:
-                clean_row[k] = str(v)[:500]
-        rows.append(clean_row)
+def _undecoded(feature):
+    """
+    (feature with decode=False on every Audio/Image inside it, media spec or None).
+    The spec mirrors the feature: the media feature itself at a leaf, {key: spec}
+    for struct members holding media, and the element spec for sequences/lists.
+    """
+    from dataclasses import replace
+    from datasets import Audio, Image, Sequence
+
+    if isinstance(feature, (Audio, Image)):
+        return (replace(feature, decode=False) if feature.decode else feature), feature
+    if isinstance(feature, Sequence):
+        inner, media = _undecoded(feature.feature)
+        return (replace(feature, feature=inner) if media else feature), media
+    if isinstance(feature, list) and len(feature) == 1:
+        inner, media = _undecoded(feature[0])
+        return ([inner] if media else feature), media
+    if isinstance(feature, dict):
+        members = {k: _undecoded(v) for k, v in feature.items()}
+        media = {k: spec for k, (_, spec) in members.items() if spec is not None}
+        if not media:
+            return feature, None
+        return {k: inner for k, (inner, _) in members.items()}, media
+    return feature, None
+
+def skip_media_decoding(ds):
+    """
+    Cast audio/image columns (including media nested in structs and sequences)
+    to decode=False so previews never materialise waveforms or pixels.
+    Returns (dataset, {column: media spec}) for rendering.
+    """
+    media = {}
+    for name, feature in (ds.features or {}).items():
+        undecoded, spec = _undecoded(feature)
+        if spec is None:
+            continue
+        media[name] = spec
+        if undecoded is not feature:
+            ds = ds.cast_column(name, undecoded)
+    return ds, media
+
+def _describe_media(value, feature):
+    """Describe one undecoded media cell from its metadata (rate, file name, size)."""
+    if not isinstance(value, dict):
+        return str(value)[:500]
+    kind = type(feature).__name__
+    parts = []
+    data = value.get("bytes")
+    if kind == "Audio" and getattr(feature, "sampling_rate", None):
+        parts.append(f"{feature.sampling_rate}Hz")
+    if kind == "Image" and data:
+        try:
+            import io
+            from PIL import Image as PILImage
+            with PILImage.open(io.BytesIO(data)) as img:  # reads the header only
+                parts.append(f"{img.width}x{img.height} {img.format or ''}".strip())
+        except Exception:
+            pass
+    if value.get("path"):
+        parts.append(os.path.basename(str(value["path"])))
+    if data:
+        parts.append(f"{len(data) / 1024:.1f} KB")
+    return f"<{kind}: {', '.join(parts)}>" if parts else f"<{kind}>"
+
+def _render_nested(value, spec):
+    if isinstance(value, list):
+        return [_render_nested(v, spec) for v in value]
+    if isinstance(spec, dict):
+        # Struct values are dicts; a Sequence of structs arrives as a dict of lists.
+        if not isinstance(value, dict):
+            return value
+        return {k: _render_nested(v, spec[k]) if k in spec else v for k, v in value.items()}
+    return _describe_media(value, spec)
+
+def render_media(value, spec):
+    """Render a cell holding undecoded media, following the column's media spec."""
+    rendered = _render_nested(value, spec)
+    if isinstance(rendered, str):
+        return rendered
+    return json.dumps(rendered, ensure_ascii=False, default=str)[:500]
+
+def clean_row(row, media=None):
+    clean = {}
+    for k, v in row.items():
+        if media and k in media:
+            clean[k] = render_media(v, media[k])
+        elif isinstance(v, (str, int, float, bool, type(None))):
+            clean[k] = v
+        elif isinstance(v, dict) and "array" in v and "sampling_rate" in v:
+            clean[k] = f"<Audio: {v.get('sampling_rate')}Hz>"
+        elif isinstance(v, list):
+            clean[k] = json.dumps(v, ensure_ascii=False, default=str)[:500]
+        else:
+            clean[k] = str(v)[:500]
+    return clean
+
+def do_load(dataset_id, config_name, split_name, limit, offset=0, revision=None):
+    """Actually load the dataset (runs inside the venv), through the row cache."""
+    key = (dataset_id, config_name or "default", split_name or "train", resolve_revision(dataset_id, revision))
+    return load_rows(open_cache(), lambda: WarmStream(key), key, offset, limit, {})
+
+def protocol_stdout():
+    """Keep the real stdout for protocol lines; library prints go to stderr."""
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return out
+
+def write_line(out, payload):
+    out.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+
+# ── Daemon mode ──
+
+class WarmStream:
+    """
+    An open streaming iterator, the rows it has produced so far and resume
+    points. `position` counts rows consumed from the iterator; every
+    CHECKPOINT_ROWS rows the dataset's shard position (IterableDataset.state_dict,
+    datasets>=2.18) is saved so a deep page restores the nearest checkpoint
+    instead of rescanning from row 0.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.dataset, self.media = open_stream(*key)
+        self.resumable = hasattr(self.dataset, "state_dict")
+        self.checkpoints = {0: self.dataset.state_dict()} if self.resumable else {}
+        self.iterator = iter(self.dataset)
+        self.position = 0
+        self.rows = []
+        self.total = None
+        self.last_used = time.monotonic()
+
+    def _next(self):
+        row = next(self.iterator)
+        self.position += 1
+        if self.resumable and self.position % CHECKPOINT_ROWS == 0:
+            self.checkpoints[self.position] = self.dataset.state_dict()
+        return row
+
+    def _seek(self, target):
+        if target < self.position or target - self.position > CHECKPOINT_ROWS:
+            best = max((p for p in self.checkpoints if p <= target), default=0)
+            if target < self.position or best > self.position:
+                if self.resumable:
+                    self.dataset.load_state_dict(self.checkpoints[best])
+                else:
+                    best = 0
+                self.iterator = iter(self.dataset)
+                self.position = best
+        while self.position < target:
+            self._next()
+
+    def iter_rows(self, offset, limit):
+        """Rows offset..offset+limit: buffered prefix first, then the live iterator."""
+        self.last_used = time.monotonic()
+        end = offset + limit
+        pos = offset
+        while pos < min(end, len(self.rows)):
+            yield self.rows[pos]
+            pos += 1
+        if pos >= end or (self.total is not None and pos >= self.total):
+            return
+        try:
+            self._seek(pos)
+            while pos < end:
+                row = clean_row(self._next(), self.media)
+                if pos == len(self.rows) and pos < MAX_BUFFERED_ROWS:
+                    self.rows.append(row)
+                yield row
+                pos += 1
+        except StopIteration:
+            self.total = self.position
+
+_revisions = {}
+
+def resolve_revision(dataset_id, revision=None):
+    """Pin a branch/tag to its commit sha so cached rows follow dataset updates."""
+    if revision and len(revision) == 40 and all(c in "0123456789abcdef" for c in revision):
+        return revision
+    cached = _revisions.get((dataset_id, revision))
+    if cached and time.monotonic() - cached[1] < REVISION_TTL_SECONDS:
+        return cached[0]
+    try:
+        from huggingface_hub import HfApi
+        sha = HfApi().dataset_info(dataset_id, revision=revision or None, timeout=10).sha or revision or "main"
+    except Exception:
+        sha = revision or "main"
+    _revisions[(dataset_id, revision)] = (sha, time.monotonic())
+    return sha
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive advisory lock shared by the daemon and one-shot loader processes."""
+    with open(path, "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)  # retries for ~10 s, then raises
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _rows_table(rows):
+    """
+    Arrow table for rows when it round-trips them exactly (keys from every row,
+    no int->float promotion or filled-in nulls), else one JSON text column.
+    """
+    import pyarrow as pa
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    try:
+        table = pa.table({c: pa.array([row.get(c) for row in rows]) for c in columns})
+        exact = json.dumps(table.to_pylist(), default=str) == json.dumps(rows, default=str)
+    except (pa.ArrowException, TypeError, ValueError):
+        exact = False
+    if exact:
+        return table
+    return pa.table({"__json__": [json.dumps(r, ensure_ascii=False, default=str) for r in rows]})
+
+class RowCache:
+    """
+    On-disk LRU cache of preview rows, one Arrow IPC file per
+    (dataset, config, split, revision) holding a prefix of the split.
+    Requests inside the prefix are a memory-mapped file read; requests past it
+    are served partly from the file and the prefix is extended with the newly
+    streamed rows. Least recently used files are evicted past the disk budget.
+    index.json is shared with other loader processes: every save re-reads it
+    under a lock and merges this process's changes before writing.
+    """
+
+    def __init__(self, root, budget_bytes):
+        self.root = root
+        self.budget = budget_bytes
+        self.index_path = os.path.join(root, "index.json")
+        os.makedirs(root, exist_ok=True)
+        self.index = self._load_index()
+        self._counts = Counter()     # stats increments not yet written
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha1(json.dumps(list(key)).encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fh:
+                index = json.load(fh)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("stats", {"hits": 0, "partial_hits": 0, "misses": 0})
+        return index
 
-    return rows
+    def _save_index(self, keep=None):
+        with _file_lock(self.index_path + ".lock"):
+            index = self._load_index()
+            entries = index["entries"]
+            for name, entry in self.index["entries"].items():
+                other = entries.get(name)
+                if other is not None and other.get("written", 0) > entry.get("written", 0):
+                    entry, other = other, entry     # another process rewrote this file since
+                last_access = max(entry["last_access"], other["last_access"]) if other else entry["last_access"]
+                entries[name] = dict(entry, last_access=last_access)
+            # Files evicted by any process (including this one) drop out of the index.
+            for name in [n for n, e in entries.items() if not os.path.exists(os.path.join(self.root, e["file"]))]:
+                del entries[name]
+            for outcome, n in self._counts.items():
+                index["stats"][outcome] = index["stats"].get(outcome, 0) + n
+            self.index, self._counts = index, Counter()
+            self._evict(keep)
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.index, fh, indent=2)
+            os.replace(tmp, self.index_path)
+
+    def lookup(self, key):
+        entry = self.index["entries"].get(self._name(key))
+        if entry and not os.path.exists(os.path.join(self.root, entry["file"])):
+            del self.index["entries"][self._name(key)]
+            return None
+        return entry
+
+    def _read_table(self, entry):
+        import pyarrow as pa
+        with pa.memory_map(os.path.join(self.root, entry["file"])) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def read(self, key, offset, limit):
+        entry = self.lookup(key)
+        table = self._read_table(entry).slice(offset, limit)
+        if table.column_names == ["__json__"]:
+            return [json.loads(v) for v in table.column(0).to_pylist()]
+        return table.to_pylist()
+
+    def record(self, outcome, key=None):
+        """Count a lookup outcome, mark key as just used, and save the index."""
+        self._counts[outcome] += 1
+        entry = self.lookup(key) if key else None
+        if entry:
+            entry["last_access"] = time.time()
+        self._save_index()
+
+    def extend(self, key, start, rows, complete):
+        """Append rows that continue the cached prefix at `start`."""
+        import pyarrow as pa
+        entry = self.lookup(key)
+        cached = entry["rows"] if entry else 0
+        if start != cached or cached >= MAX_CACHED_ROWS or not (rows or complete):
+            return
+        if len(rows) > MAX_CACHED_ROWS - cached:
+            # The split continues past the cap, so the cached prefix is not the whole split.
+            rows, complete = rows[:MAX_CACHED_ROWS - cached], False
+        existing = self.read(key, 0, cached) if cached else []
+        merged = existing + rows
+        table = _rows_table(merged)
+        name = self._name(key)
+        path = os.path.join(self.root, f"{name}.arrow")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        now = time.time()
+        self.index["entries"][name] = {
+            "key": list(key),
+            "file": f"{name}.arrow",
+            "rows": len(merged),
+            "complete": bool(complete),
+            "bytes": os.path.getsize(path),
+            "last_access": now,
+            "written": now,
+        }
+        self._save_index(keep=name)
+
+    def _evict(self, keep=None):
+        entries = self.index["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+        for name, entry in sorted(entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.budget:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except OSError:
+                pass
+            total -= entry["bytes"]
+            del entries[name]
+
+    def stats(self):
+        stats = dict(self.index["stats"])
+        lookups = sum(stats.values())
+        stats["hit_rate"] = round((stats["hits"] + stats["partial_hits"]) / lookups, 4) if lookups else 0.0
+        stats["full_hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["entries"] = len(self.index["entries"])
+        stats["bytes"] = sum(e["bytes"] for e in self.index["entries"].values())
+        stats["budget_bytes"] = self.budget
+        return stats
+
+def cache_root():
+    return os.environ.get("HF_PREVIEW_CACHE_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), CACHE_DIR_NAME)
+
+def open_cache():
+    if CACHE_BUDGET_MB <= 0:
+        return None
+    try:
+        import pyarrow  # noqa: F401
+        return RowCache(cache_root(), int(CACHE_BUDGET_MB * 1024 * 1024))
+    except Exception as e:
+        sys.stderr.write(f"HF preview cache disabled: {e}\n")
+        return None
+
+def load_rows(cache, get_stream, key, offset, limit, info):
+    """
+    Rows offset..offset+limit for key = (dataset, config, split, revision):
+    from the cache file where it covers them, the stream for the rest.
+    `info` receives the cache outcome and the split's total when known.
+    """
+    entry = cache.lookup(key) if cache else None
+    cached = entry["rows"] if entry else 0
+    end = offset + limit
+    if entry and (end <= cached or entry["complete"]):
+        info.update(cache="hit", total=cached if entry["complete"] else None)
+        rows = cache.read(key, offset, limit)
+        cache.record("hits", key)
+        yield from rows
+        return
+    pos = offset
+    if entry and offset < cached:
+        info["cache"] = "partial"
+        yield from cache.read(key, offset, cached - offset)
+        pos = cached
+    else:
+        info["cache"] = "miss" if cache else "off"
+    stream = get_stream()
+    fresh = []
+    for row in stream.iter_rows(pos, end - pos):
+        fresh.append(row)
+        yield row
+    info["total"] = stream.total
+    if cache:
+        cache.record("partial_hits" if info["cache"] == "partial" else "misses", key)
+        cache.extend(key, pos, fresh, complete=stream.total is not None and stream.total <= end)
+
+class LoaderDaemon:
+    def __init__(self, out):
+        self.out = out
+        self.streams = {}
+        self.lock = threading.Lock()
+        self.last_request = time.monotonic()
+        self.last_info = {}
+        self.cache = open_cache()
+
+    def handle(self, request):
+        """Yield the requested rows while holding the stream table lock."""
+        dataset_id = str(request["dataset"])
+        limit = int(request.get("limit") or 100)
+        offset = max(0, int(request.get("offset") or 0))
+        with self.lock:
+            self.last_request = time.monotonic()
+            key = (
+                dataset_id,
+                str(request.get("config") or "default"),
+                str(request.get("split") or "train"),
+                resolve_revision(dataset_id, request.get("revision")),
+            )
+
+            def get_stream():
+                stream = self.streams.get(key)
+                if stream is None:
+                    stream = self.streams[key] = WarmStream(key)
+                return stream
+
+            self.last_info = {}
+            yield from load_rows(self.cache, get_stream, key, offset, limit, self.last_info)
+
+    def evict_idle(self):
+        while True:
+            time.sleep(30)
+            now = time.monotonic()
+            with self.lock:
+                for key in [k for k, s in self.streams.items() if now - s.last_used > STREAM_IDLE_SECONDS]:
+                    del self.streams[key]
+                if now - self.last_request > DAEMON_IDLE_SECONDS:
+                    sys.stderr.write("hf loader daemon idle, exiting\n")
+                    os._exit(0)
+
+    def serve(self, stdin):
+        threading.Thread(target=self.evict_idle, daemon=True).start()
+        for line in stdin:
+            if not line.strip():
+                continue
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                if request.get("op") == "cache_stats":
+                    write_line(self.out, {"id": request_id, "ok": True,
+                                          "stats": self.cache.stats() if self.cache else None})
+                    continue
+                if request.get("stream"):
+                    # NDJSON: one line per row as it is read, then a summary line.
+                    count = 0
+                    for row in self.handle(request):
+                        write_line(self.out, {"id": request_id, "row": row})
+                        count += 1
+                    reply = {"id": request_id, "ok": True, "done": True, "count": count,
+                             "total": self.last_info.get("total"), "cache": self.last_info.get("cache")}
+                else:
+                    rows = list(self.handle(request))
+                    reply = {"id": request_id, "ok": True, "rows": rows,
+                             "total": self.last_info.get("total"), "cache": self.last_info.get("cache")}
+            except Exception as e:
+                reply = {"id": request_id, "ok": False, "error": str(e), "traceback": traceback.format_exc()}
+            write_line(self.out, reply)
+
+def serve():
+    """Run the daemon loop; stdout is reserved for protocol replies."""
+    out = protocol_stdout()
+    import datasets  # noqa: F401  (import once, up front)
+    LoaderDaemon(out).serve(sys.stdin)
 
 def main():
+    # ── Row cache statistics (reads the index only; no venv needed) ──
+    if len(sys.argv) > 1 and sys.argv[1] == "--cache-stats":
+        cache = RowCache(cache_root(), int(CACHE_BUDGET_MB * 1024 * 1024))
+        print(json.dumps({"ok": True, "stats": cache.stats()}))
+        return
+
+    # ── Daemon inside the venv ──
+    if len(sys.argv) > 1 and sys.argv[1] == "__VENV_SERVE__":
+        serve()
+        return
+
+    # ── Daemon entry point: ensure venv, then become the venv interpreter ──
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        try:
+            venv_python = ensure_venv()
+        except Exception as e:
+            print(json.dumps({"id": None, "ok": False, "error": f"Failed to setup venv: {e}"}), flush=True)
+            sys.exit(1)
+        if os.name != "nt":
+            # Replace this process so the caller's pid (and kill) is the daemon itself.
+            os.execv(venv_python, [venv_python, __file__, "__VENV_SERVE__"])
+        # Windows has no real exec; the web server kills the whole process tree instead.
+        sys.exit(subprocess.call([venv_python, __file__, "__VENV_SERVE__"]))
+
     # ── Called with __VENV_RUN__: we are inside the venv, do the real work ──
     if len(sys.argv) > 1 and sys.argv[1] == "__VENV_RUN__":
-        if len(sys.argv) < 6:
-            print(json.dumps({"ok": False, "error": "Usage: ... __VENV_RUN__ <id> <config> <split> <limit>"}))
+        ndjson = "--ndjson" in sys.argv
+        args = [a for a in sys.argv[2:] if a != "--ndjson"]
+        if len(args) < 4:
+            print(json.dumps({"ok": False, "error": "Usage: ... __VENV_RUN__ <id> <config> <split> <limit> [offset]"}))
             sys.exit(1)
-        dataset_id = sys.argv[2]
-        config_name = sys.argv[3]
-        split_name = sys.argv[4]
-        limit = int(sys.argv[5]) if sys.argv[5].isdigit() else 100
+        dataset_id, config_name, split_name = args[:3]
+        limit = int(args[3]) if args[3].isdigit() else 100
+        offset = int(args[4]) if len(args) > 4 and args[4].isdigit() else 0
+        out = protocol_stdout() if ndjson else sys.stdout
         try:
-            rows = do_load(dataset_id, config_name, split_name, limit)
-            print(json.dumps({"ok": True, "rows": rows}))
+            rows = do_load(dataset_id, config_name, split_name, limit, offset)
+            if ndjson:
+                count = 0
+                for row in rows:
+                    write_line(out, {"row": row})
+                    count += 1
+                write_line(out, {"ok": True, "done": True, "count": count})
+            else:
+                print(json.dumps({"ok": True, "rows": list(rows)}))
         except Exception as e:
-            print(json.dumps({"ok": False, "error": str(e), "traceback": traceback.format_exc()}))
+            write_line(out, {"ok": False, "error": str(e), "traceback": traceback.format_exc()})
             sys.exit(1)
         return
 
@@ -92,6 +640,10 @@ def main():
         print(json.dumps({"ok": False, "error": f"Failed to setup venv: {e}"}))
         sys.exit(1)
 
+    # NDJSON: let rows flow straight through as the venv process prints them
+    if "--ndjson" in sys.argv:
+        sys.exit(subprocess.call([venv_python, __file__, "__VENV_RUN__"] + sys.argv[1:], timeout=300))
+
     # Re-run this same script inside the venv
     result = subprocess.run(
         [venv_python, __file__, "__VENV_RUN__"] + sys.argv[1:],
@@ -3337,6 +3337,133 @@ async function fetchRemoteDatasetRows(url, options = {}) {
   ];
 }
 
+// Long-lived `hf_dataset_loader.py --serve` process. It keeps `datasets`, resolved
+// builders and open streaming iterators warm between previews, so only the first
+// request pays for venv checks and imports. The daemon serves one request at a
+// time, so requests queue here and are written to it one by one; replies are JSON
+// lines matched by id. The daemon exits when idle and is respawned on demand.
+let hfLoaderChild = null;
+let hfLoaderActive = null;
+const hfLoaderQueue = [];
+let hfLoaderNextId = 1;
+
+function killHfLoader(child) {
+  if (process.platform === "win32") {
+    // On Windows the venv interpreter runs under a wrapper process; end the whole tree.
+    spawn("taskkill", ["/pid", String(child.pid), "/T", "/F"], { stdio: "ignore" }).on("error", () => {});
+  } else {
+    child.kill("SIGKILL");
+  }
+}
+
+function getHfLoader() {
+  if (hfLoaderChild) {
+    return hfLoaderChild;
+  }
+  const child = spawn("python", [path.join(__dirname, "hf_dataset_loader.py"), "--serve"], {
+    cwd: __dirname,
+    stdio: ["pipe", "pipe", "pipe"],
+  });
+  let buffered = "";
+  let stderrTail = "";
+  child.stdout.setEncoding("utf8");
+  child.stdout.on("data", (chunk) => {
+    buffered += chunk;
+    let newline;
+    while ((newline = buffered.indexOf("\n")) >= 0) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (!line) {
+        continue;
+      }
+      let reply;
+      try {
+        reply = JSON.parse(line);
+      } catch {
+        continue;
+      }
+      const entry = hfLoaderActive;
+      if (!entry || entry.child !== child || reply.id !== entry.id) {
+        continue;
+      }
+      if ("row" in reply) {
+        entry.onRow?.(reply.row);
+        armHfLoaderTimer(entry);
+      } else if (reply.ok) {
+        settleHfLoader(entry, null, reply);
+      } else {
+        settleHfLoader(entry, new Error(reply.error || "Unknown python loader error"));
+      }
+    }
+  });
+  child.stderr.on("data", (d) => {
+    stderrTail = (stderrTail + d).slice(-2000);
+  });
+  child.stdin.on("error", () => {});
+  const shutdown = (message) => {
+    if (hfLoaderChild === child) {
+      hfLoaderChild = null;
+    }
+    if (hfLoaderActive?.child === child) {
+      settleHfLoader(hfLoaderActive, new Error(message));
+    }
+  };
+  child.on("exit", (code) => shutdown(`HF loader exited (${code}): ${stderrTail.trim()}`));
+  child.on("error", (e) => shutdown(`Failed to spawn HF loader: ${e.message}`));
+  hfLoaderChild = child;
+  return child;
+}
+
+// The timeout covers the request being served (reset on every streamed row), never
+// time spent waiting in the queue.
+function armHfLoaderTimer(entry) {
+  clearTimeout(entry.timer);
+  entry.timer = setTimeout(() => {
+    // A wedged stream would stall everything queued behind it: restart the daemon
+    // and fail only this request; the queue continues on a fresh process.
+    const { child } = entry;
+    if (hfLoaderChild === child) {
+      hfLoaderChild = null;
+    }
+    killHfLoader(child);
+    settleHfLoader(entry, new Error(`HF loader timed out after ${entry.timeoutMs}ms`));
+  }, entry.timeoutMs);
+}
+
+function settleHfLoader(entry, error, reply = null) {
+  if (hfLoaderActive !== entry) {
+    return;
+  }
+  clearTimeout(entry.timer);
+  hfLoaderActive = null;
+  if (error) {
+    entry.reject(error);
+  } else {
+    entry.resolve(reply);
+  }
+  pumpHfLoader();
+}
+
+function pumpHfLoader() {
+  if (hfLoaderActive || hfLoaderQueue.length === 0) {
+    return;
+  }
+  const entry = hfLoaderQueue.shift();
+  entry.child = getHfLoader();
+  hfLoaderActive = entry;
+  armHfLoaderTimer(entry);
+  entry.child.stdin.write(`${JSON.stringify({ id: entry.id, ...entry.payload, stream: Boolean(entry.onRow) })}\n`);
+}
+
+// With `onRow`, rows are delivered one at a time as the loader reads them (NDJSON
+// mode) and the promise resolves with the closing { count, total } summary.
+function requestHfLoader(payload, { timeoutMs = 300_000, onRow = null } = {}) {
+  return new Promise((resolve, reject) => {
+    hfLoaderQueue.push({ id: hfLoaderNextId++, payload, timeoutMs, onRow, resolve, reject, timer: null, child: null });
+    pumpHfLoader();
+  });
+}
+
 async function fetchHuggingFaceDatasetRows(datasetId, options = {}) {
   const normalizedId = String(datasetId || "").trim();
   if (!normalizedId) {
@@ -3378,33 +3505,17 @@ async function fetchHuggingFaceDatasetRows(datasetId, options = {}) {
 
   const resolvedDatasetId = await resolveCanonicalDatasetId(normalizedId);
   const runPythonFallback = async (errMessage) => {
-    return new Promise((resolve, reject) => {
-      const args = [
-        path.join(__dirname, "hf_dataset_loader.py"),
-        resolvedDatasetId,
-        options.config || "default",
-        options.split || "train",
-        "100"
-      ];
-      
-      const child = spawn("python", args, { cwd: __dirname, timeout: 300_000 });
-      let out = "";
-      let err = "";
-      child.stdout.on("data", d => out += d);
-      child.stderr.on("data", d => err += d);
-      child.on("close", code => {
-        try {
-          const parsed = JSON.parse(out);
-          if (parsed.ok && Array.isArray(parsed.rows)) {
-             return resolve(parsed.rows);
-          }
-          throw new Error(parsed.error || "Unknown python script error");
-        } catch (e) {
-          reject(new Error(`Fallback script failed: ${errMessage}\nPython error: ${err.trim() || out.trim() || e.message}`));
-        }
+    try {
+      const reply = await requestHfLoader({
+        dataset: resolvedDatasetId,
+        config: options.config || "default",
+        split: options.split || "train",
+        limit: 100,
       });
-      child.on("error", (e) => reject(new Error(`Failed to spawn python fallback: ${e.message}`)));
-    });
+      return reply.rows;
+    } catch (e) {
+      throw new Error(`Fallback script failed: ${errMessage}\nPython error: ${e.message}`);
+    }
   };
 
   const splitResp = await fetch(
@@ -6506,6 +6617,76 @@ app.get("/api/data-studio/library/resources", async (req, res) => {
   }
 });
 
+// Streams Hugging Face preview rows as NDJSON ({"row": ...} lines, then a summary
+// line). `offset` pages resume inside the warm loader instead of rescanning.
+app.get("/api/data-studio/huggingface/rows", async (req, res) => {
+  const dataset = String(req.query.dataset || "").trim();
+  if (!dataset) {
+    return res.status(400).json({ ok: false, error: "dataset is required" });
+  }
+  const offset = Math.max(0, Number(req.query.offset || 0));
+  const limit = Math.min(1000, Math.max(1, Number(req.query.limit || 100)));
+  req.setTimeout(600_000);
+  res.setTimeout(600_000);
+  res.setHeader("Content-Type", "application/x-ndjson");
+  try {
+    const summary = await requestHfLoader(
+      {
+        dataset,
+        config: String(req.query.config || "default"),
+        split: String(req.query.split || "train"),
+        revision: req.query.revision ? String(req.query.revision) : undefined,
+        offset,
+        limit,
+      },
+      { onRow: (row) => res.write(`${JSON.stringify({ row })}\n`) },
+    );
+    return res.end(`${JSON.stringify({
+      ok: true,
+      done: true,
+      offset,
+      count: summary.count,
+      total: summary.total ?? null,
+      cache: summary.cache ?? null,
+    })}\n`);
+  } catch (error) {
+    const message = error instanceof Error ? error.message : "Unknown error";
+    if (!res.headersSent) {
+      return res.status(500).json({ ok: false, error: message });
+    }
+    return res.end(`${JSON.stringify({ ok: false, error: message })}\n`);
+  }
+});
+
+// Read straight from the cache index (see RowCache.stats in hf_dataset_loader.py):
+// no venv, and no waiting behind a preview the loader daemon is serving.
+app.get("/api/data-studio/huggingface/cache-stats", async (req, res) => {
+  try {
+    const cacheDir = process.env.HF_PREVIEW_CACHE_DIR || path.join(__dirname, ".hf_cache");
+    let index = {};
+    try {
+      index = JSON.parse(await readFile(path.join(cacheDir, "index.json"), "utf-8"));
+    } catch {}
+    const counts = { hits: 0, partial_hits: 0, misses: 0, ...(index.stats || {}) };
+    const entries = Object.values(index.entries || {});
+    const lookups = counts.hits + counts.partial_hits + counts.misses;
+    const rate = (value) => (lookups ? Math.round((value / lookups) * 10000) / 10000 : 0);
+    return res.json({
+      ok: true,
+      stats: {
+        ...counts,
+        hit_rate: rate(counts.hits + counts.partial_hits),
+        full_hit_rate: rate(counts.hits),
+        entries: entries.length,
+        bytes: entries.reduce((sum, entry) => sum + Number(entry.bytes || 0), 0),
+        budget_bytes: Math.floor(Number(process.env.HF_PREVIEW_CACHE_MB || 512) * 1024 * 1024),
+      },
+    });
+  } catch (error) {
+    return res.status(500).json({ ok: false, error: error instanceof Error ? error.message : "Unknown error" });
+  }
+});
+
 app.post("/api/data-studio/datasets/import/library", async (req, res) => {
   req.setTimeout(600_000); // 10 minutes
   res.setTimeout(600_000);
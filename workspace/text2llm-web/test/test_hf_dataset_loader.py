@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hf_dataset_loader as loader  # noqa: E402
+
+pytest.importorskip("pyarrow")
+
+KEY = ("org/ds", "default", "train", "0" * 40)
+
+
+class ListStream:
+    """Stands in for WarmStream over a fixed split."""
+
+    def __init__(self, rows):
+        self.all = rows
+        self.total = None
+
+    def iter_rows(self, offset, limit):
+        chunk = self.all[offset:offset + limit]
+        if offset + limit >= len(self.all):
+            self.total = len(self.all)
+        yield from chunk
+
+
+def page(cache, stream, offset, limit):
+    info = {}
+    rows = list(loader.load_rows(cache, lambda: stream, KEY, offset, limit, info))
+    return rows, info
+
+
+def test_partial_hit_extends_prefix(tmp_path):
+    cache = loader.RowCache(str(tmp_path), 1 << 20)
+    stream = ListStream([{"i": i} for i in range(30)])
+    assert page(cache, stream, 0, 10)[1]["cache"] == "miss"
+    rows, info = page(cache, stream, 5, 10)
+    assert [r["i"] for r in rows] == list(range(5, 15)) and info["cache"] == "partial"
+    rows, info = page(cache, stream, 0, 15)
+    assert len(rows) == 15 and info["cache"] == "hit"
+
+
+def test_truncated_prefix_is_not_complete(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, "MAX_CACHED_ROWS", 50)
+    cache = loader.RowCache(str(tmp_path), 1 << 20)
+    stream = ListStream([{"i": i} for i in range(55)])
+    for offset in range(0, 60, 20):
+        page(cache, stream, offset, 20)
+    entry = cache.lookup(KEY)
+    assert entry["rows"] == 50 and not entry["complete"]
+    rows, info = page(cache, stream, 50, 10)
+    assert [r["i"] for r in rows] == list(range(50, 55))
+    assert info["cache"] != "hit" and info["total"] == 55
+
+
+def test_lru_eviction_keeps_budget(tmp_path):
+    cache = loader.RowCache(str(tmp_path), 1)
+    for n in range(3):
+        key = ("org/ds", "default", f"split{n}", "main")
+        list(loader.load_rows(cache, lambda: ListStream([{"t": "x" * 100}] * 5), key, 0, 5, {}))
+    assert cache.stats()["entries"] == 1
+
+
+class Audio:
+    sampling_rate = 16000
+
+
+class Image:
+    pass
+
+
+def test_clean_row_renders_nested_media():
+    media = {
+        "clip": Audio(),
+        "pair": {"img": Image()},
+        "turns": {"speech": Audio()},  # Sequence({"speech": Audio()}) -> dict of lists
+        "pages": {"scan": Image()},    # [{"scan": Image()}] -> list of dicts
+    }
+    row = {
+        "clip": {"bytes": b"\0" * 2048, "path": "a/b.wav"},
+        "pair": {"img": {"bytes": None, "path": "x.png"}, "caption": "hi"},
+        "turns": {"speech": [{"bytes": None, "path": "1.wav"}, {"bytes": None, "path": "2.wav"}], "who": ["a", "b"]},
+        "pages": [{"scan": {"bytes": None, "path": "p1.png"}, "n": 1}],
+    }
+    clean = loader.clean_row(row, media)
+    assert clean["clip"] == "<Audio: 16000Hz, b.wav, 2.0 KB>"
+    assert json.loads(clean["pair"]) == {"img": "<Image: x.png>", "caption": "hi"}
+    assert json.loads(clean["turns"]) == {"speech": ["<Audio: 16000Hz, 1.wav>", "<Audio: 16000Hz, 2.wav>"],
+                                          "who": ["a", "b"]}
+    assert json.loads(clean["pages"]) == [{"scan": "<Image: p1.png>", "n": 1}]
+
+
+def test_undecoded_recurses_into_structs():
+    datasets = pytest.importorskip("datasets")
+    feature = datasets.Sequence(feature={"img": datasets.Image(), "label": datasets.Value("string")})
+    undecoded, spec = loader._undecoded({"inner": feature, "id": datasets.Value("int64")})
+    assert undecoded["inner"].feature["img"].decode is False
+    assert undecoded["inner"].feature["label"] == datasets.Value("string")
+    assert list(spec) == ["inner"] and isinstance(spec["inner"]["img"], datasets.Image)
+    plain = {"id": datasets.Value("int64")}
+    assert loader._undecoded(plain) == (plain, None)
+
+
+@pytest.mark.parametrize("rows", [
+    [{"a": 1}, {"a": 2, "b": "late key"}],
+    [{"v": 1}, {"v": 2.5}],
+    [{"v": 1, "s": None}, {"v": 2, "s": "x"}],
+])
+def test_cached_rows_match_live_rows(tmp_path, rows):
+    cache = loader.RowCache(str(tmp_path), 1 << 20)
+    stream = ListStream(rows)
+    assert page(cache, stream, 0, 10)[0] == rows
+    cached, info = page(cache, stream, 0, 10)
+    assert info["cache"] == "hit"
+    assert json.dumps(cached) == json.dumps(rows)
+
+
+def test_index_merges_entries_from_other_processes(tmp_path):
+    daemon = loader.RowCache(str(tmp_path), 1 << 20)
+    one_shot = loader.RowCache(str(tmp_path), 1 << 20)
+    other = ("org/other", "default", "train", "main")
+    page(daemon, ListStream([{"i": i} for i in range(5)]), 0, 5)
+    list(loader.load_rows(one_shot, lambda: ListStream([{"j": 1}] * 5), other, 0, 5, {}))
+    page(daemon, ListStream([{"i": i} for i in range(5)]), 0, 5)
+    stats = loader.RowCache(str(tmp_path), 1 << 20).stats()
+    assert stats["entries"] == 2
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_eviction_counts_files_written_by_other_processes(tmp_path):
+    daemon = loader.RowCache(str(tmp_path), 1)
+    one_shot = loader.RowCache(str(tmp_path), 1)
+    list(loader.load_rows(one_shot, lambda: ListStream([{"t": "x" * 100}] * 5), KEY, 0, 5, {}))
+    other = ("org/other", "default", "train", "main")
+    list(loader.load_rows(daemon, lambda: ListStream([{"t": "y" * 100}] * 5), other, 0, 5, {}))
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith(".arrow")) == [daemon._name(other) + ".arrow"]
+
+
+def test_hit_persists_lru_order(tmp_path):
+    cache = loader.RowCache(str(tmp_path), 1 << 20)
+    other = ("org/other", "default", "train", "main")
+    page(cache, ListStream([{"i": 1}] * 5), 0, 5)
+    list(loader.load_rows(cache, lambda: ListStream([{"i": 2}] * 5), other, 0, 5, {}))
+    assert page(cache, ListStream([]), 0, 5)[1]["cache"] == "hit"
+    entries = loader.RowCache(str(tmp_path), 1 << 20).index["entries"]
+    assert entries[cache._name(KEY)]["last_access"] > entries[cache._name(other)]["last_access"]